@@ -1,23 +1,72 @@
 """  
 Routes pour l'export de notes (PDF, DOCX, TXT)  
 """  
-from fastapi import APIRouter, Depends, HTTPException, Response  
-from fastapi.responses import FileResponse  
+from fastapi import APIRouter, Depends, Header, HTTPException, Response  
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse  
+from datetime import datetime, timezone  
+from pathlib import Path  
 from typing import Optional, List  
 from app.api.deps import get_current_user  
 from app.db.repositories.note_repo import NoteRepository  
 from app.db.repositories.export_repo import ExportRepository  
 from app.db.mongo import get_database  # 🔧 CORRECTION BLOQUANTE : Import ajouté  
-from app.schemas.export import ExportOut, ExportCreate  
+from app.schemas.export import BulkExportRequest, ExportOut, ExportCreate  
+from app.core.config import settings  
 from app.core.logger import get_logger  
-from app.services.export.pdf import generate_pdf  
-from app.services.export.docx import generate_docx  
-from app.services.export.txt import generate_txt  
+from app.services.export.pdf import generate_pdf, render_pdf_bytes  
+from app.services.export.docx import generate_docx, render_docx_bytes  
+from app.services.export.txt import generate_txt, txt_exporter  
+from app.services.export.cache_key import export_content_hash  
+from app.services.export.render_pool import ExportQueueFull, render_pool  
+from app.services.export.bulk import iter_zip, note_payloads  
+from app.services.export.streaming import RangeNotSatisfiable, content_etag, iter_bytes, iter_encoded, parse_range  
+from app.services.tasks.bulk_export_task import bulk_export_task  
   
   
 router = APIRouter()  
 logger = get_logger("routes.export")  
   
+MEDIA_TYPES = {  
+    "pdf": "application/pdf",  
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  
+    "txt": "text/plain",  
+    "zip": "application/zip"  
+}  
+  
+  
+@router.post("/bulk")  
+async def bulk_export(  
+    request: BulkExportRequest,  
+    current_user = Depends(get_current_user),  
+    db = Depends(get_database)  
+):  
+    """  
+    Exporte plusieurs notes (liste d'IDs et/ou filtre) dans une archive ZIP envoyée en flux.  
+    Au-delà de EXPORT_BULK_SYNC_MAX_NOTES notes, l'archive est produite en tâche de fond  
+    et apparaîtra dans la liste des exports (format "zip").  
+    """  
+    user_id = str(current_user.id)  
+    filters = request.filters()  
+    note_repo = NoteRepository(db)  
+    count = min(await note_repo.count_for_export(user_id, **filters), settings.EXPORT_BULK_MAX_NOTES)  
+    if count == 0:  
+        raise HTTPException(status_code=404, detail="Aucune note à exporter")  
+  
+    if count > settings.EXPORT_BULK_SYNC_MAX_NOTES:  
+        task = bulk_export_task.delay(user_id, request.model_dump(mode="json"))  
+        logger.info("📦 Export groupé de %d notes mis en file (tâche %s)", count, task.id)  
+        return JSONResponse(status_code=202, content={"status": "queued", "task_id": task.id, "notes": count})  
+  
+    notes = note_repo.iter_for_export(user_id, limit=settings.EXPORT_BULK_MAX_NOTES, **filters)  
+    archive = iter_zip(note_payloads(notes), request.format, settings.EXPORT_BULK_CONCURRENCY)  
+    filename = f"notes_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}_{request.format}.zip"  
+    logger.info("📦 Export groupé de %d notes envoyé en flux", count)  
+    return StreamingResponse(  
+        archive,  
+        media_type=MEDIA_TYPES["zip"],  
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}  
+    )  
+  
   
 @router.post("/{note_id}", response_model=ExportOut)  
 async def export_note(  
@@ -35,38 +84,116 @@ async def export_note(
     if not note or str(note.user_id) != str(current_user.id):  
         raise HTTPException(status_code=404, detail="Note non trouvée")  
       
+    if format not in ("pdf", "docx", "txt"):  
+        raise HTTPException(status_code=400, detail=f"Format {format} non supporté")  
+  
+    # Export déjà rendu pour ce contenu, ce format et cette version d'exporteur : on le réutilise  
+    export_repo = ExportRepository(db)  
+    content_hash = export_content_hash(note.title, note.content, format)  
+    cached = await export_repo.find_cached(note_id, str(current_user.id), content_hash)  
+    if cached and Path(cached.file_path).exists():  
+        logger.info("♻️ Export %s réutilisé pour note %s", format, note_id)  
+        return cached  
+  
     # Préparer les données pour l'export  
     note_data = {  
         "title": note.title,  
         "content": note.content  
     }  
   
-    # Générer le fichier d'export  
-    if format == "pdf":  
-        file_path, file_size = await generate_pdf(note_data)  
-    elif format == "docx":  
-        file_path, file_size = await generate_docx(note_data)  
-    elif format == "txt":  
-        file_path, file_size = await generate_txt(note_data)  
-    else:  
-        raise HTTPException(status_code=400, detail=f"Format {format} non supporté")  
+    # Générer le fichier d'export (rendu dans le pool d'exports, hors event loop)  
+    try:  
+        if format == "pdf":  
+            file_path, file_size = await generate_pdf(note_data)  
+        elif format == "docx":  
+            file_path, file_size = await generate_docx(note_data)  
+        else:  
+            file_path, file_size = await generate_txt(note_data)  
+    except ExportQueueFull as e:  
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})  
+    except TimeoutError as e:  
+        raise HTTPException(status_code=504, detail=str(e))  
   
     export_data = ExportCreate(  
         note_id=note_id,  
         format=format,  
         file_path=str(file_path),  
         file_size=file_size,  
-        user_id=str(current_user.id)  
+        user_id=str(current_user.id),  
+        content_hash=content_hash  
     )  
       
-    # 🔧 CORRECTION BLOQUANTE : Utilisation du pattern instance  
-    export_repo = ExportRepository(db)  
     export_id = await export_repo.create(export_data.model_dump())  
       
     logger.info("📄 Export %s créé pour note %s", format, note_id)  
       
     return await export_repo.get_by_id(export_id)  
   
+@router.get("/{note_id}/stream")  
+async def stream_export(  
+    note_id: str,  
+    format: str = "pdf",  # pdf, docx, txt  
+    range_header: Optional[str] = Header(None, alias="Range"),  
+    if_range: Optional[str] = Header(None, alias="If-Range"),  
+    current_user = Depends(get_current_user),  
+    db = Depends(get_database)  
+):  
+    """  
+    Télécharge une note exportée à la volée, sans fichier dans DOCS_DIR ni enregistrement d'export.  
+    TXT : envoyé ligne par ligne. PDF/DOCX : rendus en mémoire (déterministes), avec Content-Length,  
+    ETag fort et support de Range / If-Range.  
+    """  
+    note_repo = NoteRepository(db)  
+    note = await note_repo.get_by_id(note_id)  
+    if not note or str(note.user_id) != str(current_user.id):  
+        raise HTTPException(status_code=404, detail="Note non trouvée")  
+  
+    if format not in ("pdf", "docx", "txt"):  
+        raise HTTPException(status_code=400, detail=f"Format {format} non supporté")  
+  
+    note_data = {  
+        "title": note.title,  
+        "content": note.content  
+    }  
+    headers = {"Content-Disposition": f'attachment; filename="note_{note_id}.{format}"'}  
+    chunk_size = settings.EXPORT_STREAM_CHUNK_SIZE  
+  
+    if format == "txt":  
+        # Taille inconnue à l'avance : réponse chunked, générée au fil de l'envoi  
+        chunks = iter_encoded(txt_exporter.iter_text(note_data), chunk_size)  
+        return StreamingResponse(chunks, media_type="text/plain; charset=utf-8", headers=headers)  
+  
+    renderer = render_pdf_bytes if format == "pdf" else render_docx_bytes  
+    try:  
+        data = await render_pool.run(renderer, note_data)  
+    except ExportQueueFull as e:  
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})  
+    except TimeoutError as e:  
+        raise HTTPException(status_code=504, detail=str(e))  
+  
+    size = len(data)  
+    etag = content_etag(data)  
+    headers["Accept-Ranges"] = "bytes"  
+    headers["ETag"] = etag  
+    try:  
+        byte_range = parse_range(range_header, size, if_range, etag)  
+    except RangeNotSatisfiable:  
+        raise HTTPException(status_code=416, detail="Plage non satisfiable", headers={"Content-Range": f"bytes */{size}"})  
+  
+    start, end = byte_range or (0, size - 1)  
+    if byte_range:  
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"  
+    headers["Content-Length"] = str(end - start + 1)  
+  
+    logger.info("📤 Export %s envoyé en direct pour note %s (%d octets)", format, note_id, size)  
+    return StreamingResponse(  
+        iter_bytes(data, start, end, chunk_size),  
+        status_code=206 if byte_range else 200,  
+        media_type=MEDIA_TYPES[format],  
+        headers=headers  
+    )  
+  
+  
 @router.get("/{export_id}/download")  
 async def download_export(  
     export_id: str,  
@@ -80,21 +207,14 @@ async def download_export(
     if not export or str(export.user_id) != str(current_user.id):  
         raise HTTPException(status_code=404, detail="Export non trouvé")  
       
-    from pathlib import Path  
     file_path = Path(export.file_path)  
       
     if not file_path.exists():  
         raise HTTPException(status_code=404, detail="Fichier d'export introuvable")  
       
-    media_type_map = {  
-        "pdf": "application/pdf",  
-        "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  
-        "txt": "text/plain"  
-    }  
-      
     return FileResponse(  
         path=str(file_path),  
-        media_type=media_type_map.get(export.format, "application/octet-stream"),  
+        media_type=MEDIA_TYPES.get(export.format, "application/octet-stream"),  
         filename=f"export_{export_id}.{export.format}"  
     )  
   
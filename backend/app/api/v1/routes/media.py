@@ -2,8 +2,8 @@ import uuid
 import shutil  
 import asyncio  
 from pathlib import Path  
-from typing import List  
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException  
+from typing import List, Optional  
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException  
   
 from app.api.deps import get_current_user  
 from app.db.repositories.media_repo import MediaRepository  
@@ -12,6 +12,7 @@ from app.schemas.media import MediaOut
 from app.models.media import Media  
 from app.core.config import settings  
 from app.core.logger import get_logger  
+from app.services.media.ocr_engine import OCR_ENGINES  
 from app.services.tasks.process_full_media_task import process_full_media_task  
   
 router = APIRouter()  
@@ -22,6 +23,7 @@ ALLOWED_EXTENSIONS = {"mp4", "mp3", "wav", "m4a", "mov", "webm", "mkv"}
 @router.post("/upload", response_model=MediaOut)  
 async def upload_media(  
     file: UploadFile = File(...),  
+    ocr_engine: Optional[str] = Form(None),  # "tesseract" / "paddleocr" (défaut: config)  
     current_user = Depends(get_current_user),  
     db = Depends(get_database)  # 🔧 CORRECTION BLOQUANTE : Ajout de la dépendance DB  
 ):  
@@ -29,6 +31,8 @@ async def upload_media(
     ext = file.filename.split(".")[-1].lower()  
     if ext not in ALLOWED_EXTENSIONS:  
         raise HTTPException(status_code=400, detail=f"Format .{ext} non supporté")  
+    if ocr_engine and ocr_engine.lower() not in OCR_ENGINES:  
+        raise HTTPException(status_code=400, detail=f"Moteur OCR inconnu: {ocr_engine}")  
   
     # 2. Préparation du stockage  
     user_id_str = str(current_user.id)  
@@ -72,7 +76,8 @@ async def upload_media(
     process_full_media_task.delay(  
         media_id=str(media_id),   
         file_path=str(file_path),   
-        user_id=user_id_str  
+        user_id=user_id_str,  
+        ocr_engine=ocr_engine.lower() if ocr_engine else None,  
     )  
       
     logger.info("🚀 Task envoyée au worker: media_id=%s", media_id)  
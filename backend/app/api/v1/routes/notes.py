@@ -11,6 +11,7 @@ from app.schemas.note import NoteOut, NoteUpdate
 from app.core.logger import get_logger
 from app.services.ia.manager import ia_manager
 from app.services.nlp.text_cleaner import text_cleaner
+from app.services.nlp.transcript_compressor import transcript_compressor
 from app.models.note import Note
 
 router = APIRouter()
@@ -33,12 +34,14 @@ async def generate_notes(
 
     logger.info("📝 Génération de notes pour transcription %s", transcription_id)
 
+    compressed = transcript_compressor.compress(transcription.text)
+
     effective_content_type = content_type or "auto"
     if effective_content_type == "auto":
-        effective_content_type = await ia_manager.detect_content_type(transcription.text)
+        effective_content_type = await ia_manager.detect_content_type(compressed.text)
 
     generated = await ia_manager.generate_notes(
-        transcription=transcription.text,
+        transcription=compressed.text,
         content_type=effective_content_type,
         visual_context=getattr(transcription, "visual_context", "") or "",
     )
@@ -53,6 +56,7 @@ async def generate_notes(
         content_type=effective_content_type,
         status="completed",
         model_used="llama-3.3-70b",
+        generation_params={"prompt_tokens_saved": compressed.tokens_saved},
     )
 
     saved_note = await repo_note.create(new_note)
@@ -1,7 +1,9 @@
 from .config import settings
-from .celery_app import celery_app
 from .logger import get_logger
 
 # On prépare l'export pour faciliter les imports ailleurs dans le projet
-# Exemple : from app.core import settings, celery_app
-__all__ = ["settings", "celery_app", "get_logger"]
\ No newline at end of file
+# Exemple : from app.core import settings
+# celery_app n'est pas ré-exporté : son autodiscover importe les tâches, donc tout
+# le pipeline, qui importe app.core.config (import circulaire). Importer
+# app.core.celery_app directement.
+__all__ = ["settings", "get_logger"]
@@ -38,6 +38,8 @@ class Settings(BaseSettings):
     VIDEO_DIR: Path = STORAGE_PATH / "video"  
     FRAMES_DIR: Path = STORAGE_PATH / "keyframes"  # <-- Indispensable pour la Vision  
     DOCS_DIR: Path = STORAGE_PATH / "exports"  
+    CACHE_DIR: Path = STORAGE_PATH / "cache"  
+    ASSETS_DIR: Path = STORAGE_PATH / "assets"  # Images des notes, adressées par contenu  
   
     # 🔹 IA Cloud (Groq & Gemini)  
     GROQ_API_KEY: str  
@@ -48,11 +50,76 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434"  
     LOCAL_LLM_MODEL: str = "mistral-smartscribe:latest" # Ton modèle fine-tuné  
     VISION_MODEL: str = "moondream:latest"             # Ton modèle de vision léger  
+    LOCAL_LLM_ENABLED: bool = False        # Active Ollama comme backend de débordement  
+    LOCAL_LLM_MAX_TIER: int = 0            # Tâches de tier <= valeur envoyées en local (1 = classify/refine)  
+    OLLAMA_NUM_CTX: int = 8192             # Fenêtre de contexte demandée à Ollama (défaut serveur: 2048)  
+    OLLAMA_POOL_SIZE: int = 4              # Connexions keep-alive max vers Ollama  
+    OLLAMA_KEEPALIVE_SECONDS: int = 60  
+    OLLAMA_TIMEOUT_SECONDS: int = 300  
+    GROQ_QUOTA_COOLDOWN_SECONDS: int = 60  # Pause Groq après un 429 sans en-tête retry-after  
       
     # Paramètres Fine-tuning (Unsloth)  
     DATASET_PATH: Path = STORAGE_PATH / "datasets"  
     LORA_OUTPUT_DIR: Path = STORAGE_PATH / "lora_adapters"  
   
+    # 🔹 Routage LLM (tailles en tokens estimés localement)  
+    LLM_REFINE_CHUNK_TOKENS: int = 2500      # Taille max d'un morceau envoyé au raffinage  
+    LLM_NOTES_MAX_OUTPUT_TOKENS: int = 8192  # Réserve de sortie pour la génération de notes  
+  
+    # 🔹 Raffinage guidé par la confiance Whisper (seuils par segment)  
+    REFINE_LOGPROB_THRESHOLD: float = -0.5       # avg_logprob en dessous => envoyé au LLM  
+    REFINE_NO_SPEECH_THRESHOLD: float = 0.6      # + avg_logprob < -1.0 => silence halluciné  
+    REFINE_HALLUCINATION_LOGPROB: float = -1.0  
+    REFINE_COMPRESSION_RATIO_MAX: float = 2.4    # Au-delà : texte en boucle (seuil Whisper)  
+  
+    # 🔹 Sélection des keyframes (changement de scène + dHash)  
+    KEYFRAME_SAMPLE_SECONDS: float = 1.0  
+    KEYFRAME_MIN_GAP_SECONDS: float = 2.0  
+    KEYFRAME_MAX_GAP_SECONDS: float = 120.0  
+    KEYFRAME_HASH_THRESHOLD: int = 10      # Distance de Hamming (/64) = nouvelle slide  
+    KEYFRAME_DIFF_THRESHOLD: float = 8.0   # Écart moyen de vignette (0-255)  
+    KEYFRAME_MAX_WIDTH: int = 1280  
+    KEYFRAME_MAX_FRAMES: int = 400         # Plafond par vidéo (gardées en JPEG en mémoire)  
+    KEYFRAME_JPEG_QUALITY: int = 85        # Captures persistées pour les notes  
+    ASSET_MAX_WIDTH: int = 1280  
+    ASSET_MAX_BYTES: int = 250_000         # Poids cible d'une capture (qualité JPEG réduite au besoin)  
+  
+    # 🔹 OCR  
+    OCR_ENGINE: str = "tesseract"          # Moteur par défaut ("tesseract" ou "paddleocr"), surchargeable par job  
+    PADDLE_OCR_BATCH_SIZE: int = 4         # Images empilées par appel PaddleOCR  
+    OCR_WORKERS: int = 0                   # 0 = un worker par cœur  
+    OCR_TIMEOUT_SECONDS: float = 30.0      # Par image  
+    OCR_TEXT_DETECTION: bool = True        # Ignorer les frames sans texte, recadrer les autres  
+    OCR_MIN_CONFIDENCE: float = 60.0       # Confiance Tesseract (0-100) minimale par mot ; 0 = pas de filtre  
+    VISUAL_CONTEXT_MAX_CHARS: int = 5000   # Budget du contexte visuel envoyé au LLM  
+    OCR_CACHE_ENABLED: bool = True  
+    OCR_CACHE_SIZE: int = 2048             # Entrées du LRU en mémoire  
+    OCR_CACHE_DISK_SIZE: int = 100_000     # Lignes du cache SQLite (éviction LRU au-delà)  
+    OCR_CACHE_MAX_DISTANCE: int = 0        # Hamming max (sur 2048 bits) ; 0 = hash identique  
+  
+    # 🔹 Documents  
+    PDF_WORKERS: int = 0                   # 0 = un worker par cœur  
+    PDF_PAGES_PER_TASK: int = 8            # Pages par plage soumise au pool  
+    PDF_PARALLEL_MIN_PAGES: int = 16       # En dessous, extraction directe (sans pool)  
+    PDF_TIMEOUT_SECONDS: float = 120.0     # Par plage de pages  
+    PDF_OCR_FALLBACK: bool = True          # OCR des pages scannées (sans couche texte)  
+    PDF_OCR_MIN_CHARS: int = 20            # En dessous, la page est considérée comme scannée  
+    PDF_OCR_DPI: int = 200                 # Résolution de rastérisation pour l'OCR  
+    DOCUMENT_WINDOW_TOKENS: int = 6000     # Taille max d'une fenêtre envoyée à la génération de notes  
+    DOCUMENT_WINDOW_MIN_TOKENS: int = 2500 # Au-delà, une fenêtre se ferme au titre suivant  
+    DOCUMENT_WINDOW_CONCURRENCY: int = 4   # Fenêtres générées simultanément  
+  
+    # 🔹 Exports  
+    EXPORT_WORKERS: int = 0                # Process de rendu PDF/DOCX/TXT (0 = un par cœur)  
+    EXPORT_MAX_PENDING: int = 32           # Rendus en cours + en attente avant de refuser (503)  
+    EXPORT_TIMEOUT_SECONDS: float = 60.0   # Par export  
+    EXPORT_STREAM_CHUNK_SIZE: int = 64 * 1024  # Taille des morceaux en téléchargement direct  
+    EXPORT_IMAGE_DPI: int = 150            # Résolution des captures à leur taille affichée  
+    EXPORT_IMAGE_QUALITY: int = 80         # Qualité JPEG des captures redimensionnées  
+    EXPORT_BULK_CONCURRENCY: int = 4       # Notes rendues simultanément dans un export groupé  
+    EXPORT_BULK_SYNC_MAX_NOTES: int = 50   # Au-delà, l'export groupé passe en tâche de fond  
+    EXPORT_BULK_MAX_NOTES: int = 1000      # Plafond de notes par export groupé  
+  
     # 🔹 Configuration Pydantic  
     model_config = SettingsConfigDict(  
         # Chemin absolu => robuste quel que soit le cwd (root repo, backend/, docker, etc.)  
@@ -66,7 +133,7 @@ class Settings(BaseSettings):
         directories = [  
             self.UPLOAD_DIR, self.AUDIO_DIR, self.VIDEO_DIR,   
             self.FRAMES_DIR, self.DOCS_DIR, self.DATASET_PATH,  
-            self.LORA_OUTPUT_DIR  
+            self.LORA_OUTPUT_DIR, self.CACHE_DIR, self.ASSETS_DIR  
         ]  
         for folder in directories:  
             folder.mkdir(parents=True, exist_ok=True)  
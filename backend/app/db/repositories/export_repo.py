@@ -41,6 +41,32 @@ class ExportRepository:
         export_dict = await self.collection.find_one({"_id": ObjectId(export_id)})
         return Export(**export_dict) if export_dict else None
     
+    async def find_cached(self, note_id: str, user_id: str, content_hash: str) -> Optional[Export]:
+        """Export le plus récent de cette note pour ce hash de contenu (None si à régénérer)"""
+        if not ObjectId.is_valid(note_id) or not ObjectId.is_valid(user_id):
+            return None
+
+        export_dict = await self.collection.find_one(
+            {
+                "note_id": ObjectId(note_id),
+                "user_id": ObjectId(user_id),
+                "content_hash": content_hash,
+            },
+            sort=[("created_at", -1)],
+        )
+        return Export(**export_dict) if export_dict else None
+
+    async def invalidate_note(self, note_id: str) -> int:
+        """Retire les exports d'une note du cache (les fichiers et l'historique restent)"""
+        if not ObjectId.is_valid(note_id):
+            return 0
+
+        result = await self.collection.update_many(
+            {"note_id": ObjectId(note_id), "content_hash": {"$exists": True}},
+            {"$unset": {"content_hash": ""}},
+        )
+        return result.modified_count
+    
     async def get_by_note_id(self, note_id: str, user_id: str) -> List[Export]:
         """Récupère tous les exports d'une note"""
         if not ObjectId.is_valid(note_id) or not ObjectId.is_valid(user_id):
@@ -1,18 +1,20 @@
 """
 Repository pour les notes (pattern instance)
 """
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List
 from bson import ObjectId
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pymongo import ReturnDocument
 
+from app.db.repositories.export_repo import ExportRepository
 from app.models.note import Note
 from app.schemas.note import NoteCreate, NoteUpdate
 
 
 class NoteRepository:
     def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
         self.collection = db["notes"]
 
     async def create(self, note: Note) -> Note:
@@ -61,6 +63,47 @@ class NoteRepository:
         docs = await cursor.to_list(length=limit)
         return [Note(**doc) for doc in docs]
 
+    @staticmethod
+    def _export_query(
+        user_id: str,
+        note_ids: Optional[List[str]] = None,
+        media_id: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> dict:
+        """Filtre Mongo d'un export groupé (toujours restreint aux notes de l'utilisateur)"""
+        query: dict = {"user_id": ObjectId(user_id)}
+        if note_ids is not None:
+            query["_id"] = {"$in": [ObjectId(i) for i in note_ids if ObjectId.is_valid(i)]}
+        if media_id and ObjectId.is_valid(media_id):
+            query["media_id"] = ObjectId(media_id)
+        if created_after or created_before:
+            query["created_at"] = {}
+            if created_after:
+                query["created_at"]["$gte"] = created_after
+            if created_before:
+                query["created_at"]["$lt"] = created_before
+        return query
+
+    async def count_for_export(self, user_id: str, **filters) -> int:
+        if not ObjectId.is_valid(user_id):
+            return 0
+        return await self.collection.count_documents(self._export_query(user_id, **filters))
+
+    async def iter_for_export(self, user_id: str, limit: int = 1000, **filters) -> AsyncIterator[Note]:
+        """Notes à exporter, lues au fil du curseur (plus récentes d'abord)"""
+        if not ObjectId.is_valid(user_id):
+            return
+
+        cursor = (
+            self.collection
+            .find(self._export_query(user_id, **filters))
+            .sort("created_at", -1)
+            .limit(limit)
+        )
+        async for doc in cursor:
+            yield Note(**doc)
+
     async def update(self, note_id: str, update_data: NoteUpdate) -> Optional[Note]:
         if not ObjectId.is_valid(note_id):
             return None
@@ -73,8 +116,12 @@ class NoteRepository:
             {"$set": update_dict},
             return_document=ReturnDocument.AFTER,
         )
+        if result is None:
+            return None
 
-        return Note(**result) if result else None
+        # Les exports générés avant la modification ne doivent plus être réutilisés
+        await ExportRepository(self.db).invalidate_note(note_id)
+        return Note(**result)
 
     async def delete(self, note_id: str) -> bool:
         if not ObjectId.is_valid(note_id):
@@ -5,7 +5,9 @@ from app.db.mongo import connect_to_mongo, close_mongo_connection
 from app.core.logger import get_logger  
 from contextlib import asynccontextmanager  
 from app.core.redis_cache import redis_cache  
+from app.services.ia.local.ollama_client import ollama_client  
 from app.api.v1.api import api_router  
+from app.services.export.render_pool import close_render_pool  
 
 logger = get_logger("app")  
 
@@ -19,7 +21,9 @@ async def lifespan(app: FastAPI):
     # --- ARRÊT ---  
     logger.info("🛑 Fermeture de SmartScribe...")  
     await redis_cache.disconnect()  
+    await ollama_client.close()  
     await close_mongo_connection()  
+    close_render_pool()  
   
 app = FastAPI(  
     title="SmartScribe API",  
@@ -1,5 +1,5 @@
 """
-Modèle pour les exports (PDF, DOCX, TXT)
+Modèle pour les exports (PDF, DOCX, TXT, ZIP groupé)
 """
 from typing import Optional
 from datetime import datetime
@@ -11,11 +11,12 @@ class Export(MongoBaseModel):
     Modèle DB pour stocker les exports générés.
     """
     user_id: PyObjectId = Field(...)
-    note_id: PyObjectId = Field(..., description="ID de la note exportée")
+    note_id: Optional[PyObjectId] = Field(None, description="ID de la note exportée (None pour un export groupé)")
     
-    format: str = Field(..., description="Format d'export: pdf, docx, txt")
+    format: str = Field(..., description="Format d'export: pdf, docx, txt, zip (export groupé)")
     file_path: str = Field(..., description="Chemin du fichier exporté")
     file_size: int = Field(..., description="Taille du fichier en bytes")
+    content_hash: Optional[str] = Field(None, description="Hash titre + contenu + format + version (cache)")
     
     # Métadonnées
     generated_at: Optional[datetime] = Field(None, description="Date de génération")
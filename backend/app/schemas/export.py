@@ -1,20 +1,21 @@
 """
 Schémas Pydantic pour les exports
 """
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 
 class ExportBase(BaseModel):
     """Schéma de base pour un export"""
-    format: str = Field(..., pattern="^(pdf|docx|txt)$")
-    note_id: str
+    format: str = Field(..., pattern="^(pdf|docx|txt|zip)$")
+    note_id: Optional[str] = None  # None pour un export groupé (zip)
 
 class ExportCreate(ExportBase):
     """Schéma pour la création d'un export"""
     user_id: str
     file_path: str
     file_size: int
+    content_hash: Optional[str] = None
 
 class ExportOut(ExportBase):
     """Schéma de sortie pour un export"""
@@ -27,3 +28,14 @@ class ExportOut(ExportBase):
     updated_at: datetime
     
     model_config = {"from_attributes": True, "populate_by_name": True}
+
+class BulkExportRequest(BaseModel):
+    """Export groupé : liste de notes et/ou filtre (toutes les notes de l'utilisateur par défaut)"""
+    format: str = Field("pdf", pattern="^(pdf|docx|txt)$")
+    note_ids: Optional[List[str]] = None
+    media_id: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def filters(self) -> dict:
+        return self.model_dump(exclude={"format"})
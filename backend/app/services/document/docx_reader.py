@@ -0,0 +1,153 @@
+"""
+Lecture en flux d'un fichier DOCX (word/document.xml lu directement dans le zip).
+
+Les blocs sont produits au fil de la lecture, en Markdown réutilisable par
+DocumentStructurer : titres (`#`, `##`...), listes (`- `), tableaux (`| a | b |`)
+et paragraphes. Chaque bloc traité est retiré de l'arbre XML : la mémoire reste
+constante quelle que soit la taille du document (hors tableau en cours).
+"""
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY, _P, _TBL, _TR, _TC = f"{_W}body", f"{_W}p", f"{_W}tbl", f"{_W}tr", f"{_W}tc"
+_T, _TAB, _BR, _CR = f"{_W}t", f"{_W}tab", f"{_W}br", f"{_W}cr"
+_VAL = f"{_W}val"
+# Noms de styles de titre ("heading 1", "Titre 2", "Title"...)
+_HEADING_NAME_RE = re.compile(r"^(?:heading|titre)\s*(\d)$", re.IGNORECASE)
+_TITLE_NAMES = {"title", "titre"}
+
+
+def _paragraph_styles(archive: zipfile.ZipFile) -> Tuple[Dict[str, int], Set[str]]:
+    """
+    D'après word/styles.xml : styleId -> niveau de titre (1 = titre principal),
+    et styleIds des styles de liste ("List Bullet" porte sa numérotation).
+    """
+    try:
+        root = ET.fromstring(archive.read("word/styles.xml"))
+    except KeyError:
+        return {}, set()
+    levels: Dict[str, int] = {}
+    lists: Set[str] = set()
+    for style in root.iter(f"{_W}style"):
+        style_id = style.get(f"{_W}styleId")
+        name = style.find(f"{_W}name")
+        outline = style.find(f"{_W}pPr/{_W}outlineLvl")
+        label = (name.get(_VAL) if name is not None else "") or ""
+        match = _HEADING_NAME_RE.match(label.strip())
+        if label.strip().lower() in _TITLE_NAMES:
+            levels[style_id] = 1
+        elif match:
+            levels[style_id] = int(match.group(1))
+        elif outline is not None and outline.get(_VAL, "").isdigit() and int(outline.get(_VAL)) < 9:
+            levels[style_id] = int(outline.get(_VAL)) + 1
+        elif style.find(f"{_W}pPr/{_W}numPr") is not None:
+            lists.add(style_id)
+    return levels, lists
+
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    parts: List[str] = []
+    for node in paragraph.iter():
+        if node.tag == _T:
+            parts.append(node.text or "")
+        elif node.tag == _TAB:
+            parts.append("\t")
+        elif node.tag in (_BR, _CR):
+            parts.append("\n")
+    return "".join(parts).strip()
+
+
+def _paragraph_block(paragraph: ET.Element, headings: Dict[str, int], list_styles: Set[str]) -> str:
+    text = _paragraph_text(paragraph)
+    if not text:
+        return ""
+    props = paragraph.find(f"{_W}pPr")
+    if props is not None:
+        style = props.find(f"{_W}pStyle")
+        outline = props.find(f"{_W}outlineLvl")
+        style_id = style.get(_VAL) if style is not None else None
+        level = headings.get(style_id)
+        if level is None and outline is not None and outline.get(_VAL, "").isdigit():
+            level = int(outline.get(_VAL)) + 1 if int(outline.get(_VAL)) < 9 else None
+        if level:
+            return f"{'#' * min(level, 6)} {' '.join(text.split())}"
+        numbering = props.find(f"{_W}numPr")
+        if numbering is not None or style_id in list_styles:
+            ilvl = numbering.find(f"{_W}ilvl") if numbering is not None else None
+            depth = int(ilvl.get(_VAL, "0")) if ilvl is not None else 0
+            return f"{'  ' * depth}- {text}"
+    return text
+
+
+def _table_block(rows: List[List[str]]) -> str:
+    """Tableau Markdown ; la première ligne sert d'en-tête."""
+    rows = [row for row in rows if any(cell for cell in row)]
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows)
+    cells = [
+        [" ".join(cell.split()).replace("|", "\\|") for cell in row] + [""] * (width - len(row))
+        for row in rows
+    ]
+    lines = ["| " + " | ".join(cells[0]) + " |", "|" + " --- |" * width]
+    lines.extend("| " + " | ".join(row) + " |" for row in cells[1:])
+    return "\n".join(lines)
+
+
+def iter_docx_blocks(file_path: Path) -> Iterator[str]:
+    """
+    Itère sur les blocs Markdown du document, dans l'ordre de lecture.
+
+    Un tableau imbriqué dans une cellule est aplati dans le texte de cette cellule.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        headings, list_styles = _paragraph_styles(archive)
+        with archive.open("word/document.xml") as xml:
+            body = None
+            depth = body_depth = 0
+            # Pile des tableaux ouverts : lignes -> cellules -> paragraphes de la cellule
+            tables: List[List[List[List[str]]]] = []
+
+            for event, elem in ET.iterparse(xml, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if elem.tag == _BODY:
+                        body, body_depth = elem, depth
+                    elif elem.tag == _TBL:
+                        tables.append([])
+                    elif elem.tag == _TR and tables:
+                        tables[-1].append([])
+                    elif elem.tag == _TC and tables and tables[-1]:
+                        tables[-1][-1].append([])
+                    continue
+
+                depth -= 1
+                block = ""
+                if elem.tag == _P:
+                    block = _paragraph_block(elem, headings, list_styles)
+                    elem.clear()  # Un paragraphe de zone de texte n'est pas relu par son parent
+                    if tables and tables[-1] and tables[-1][-1]:
+                        if block:
+                            tables[-1][-1][-1].append(block)
+                        block = ""
+                elif elem.tag == _TBL and tables:
+                    rows = [[" ".join(paragraphs) for paragraphs in row] for row in tables.pop()]
+                    if tables and tables[-1] and tables[-1][-1]:
+                        # Tableau imbriqué : ses lignes rejoignent la cellule parente
+                        flat = " / ".join(" ; ".join(cell for cell in row if cell) for row in rows)
+                        tables[-1][-1][-1].append(flat)
+                    else:
+                        block = _table_block(rows)
+                    elem.clear()
+
+                if block:
+                    yield block
+                # Bloc de premier niveau terminé : on le détache du corps du document
+                if body is not None and depth == body_depth:
+                    body.clear()
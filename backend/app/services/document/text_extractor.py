@@ -1,37 +1,228 @@
 """  
 Service d'extraction de texte depuis différents formats de documents  
+  
+Les PDF volumineux sont découpés en plages de pages extraites en parallèle  
+(pool de process) ; les pages sont rendues dans l'ordre au fil de l'eau.  
+Les pages scannées sont rastérisées (pypdfium2, sinon pdftoppm) puis OCRisées.  
 """  
+import hashlib  
+import os  
+import re  
+import shutil  
+import subprocess  
+import time  
+from collections import deque  
+from concurrent.futures import Executor, Future  
 from pathlib import Path  
-from typing import Optional  
+from typing import Deque, Iterator, List, Optional, Tuple  
+import cv2  
 import PyPDF2  
-from docx import Document  
   
+from app.core.config import settings  
 from app.core.logger import get_logger  
+from app.services.document.docx_reader import iter_docx_blocks  
+from app.services.media.ocr_engine import get_ocr_engine  
+from app.utils.process_pool import LazyProcessPool  
   
 logger = get_logger("text_extractor")  
   
+_PARAGRAPHS_RE = re.compile(r"\n\s*\n")  
+  
+try:  
+    import pypdfium2 as pdfium  
+    PDFIUM_AVAILABLE = True  
+except ImportError:  
+    pdfium = None  
+    PDFIUM_AVAILABLE = False  
+  
+_pool = LazyProcessPool("d'extraction PDF")  
+  
+  
+def _get_pool() -> Executor:  
+    """Pool créé à la première utilisation puis réutilisé (process, y compris dans un worker Celery)."""  
+    return _pool.get(settings.PDF_WORKERS)  
+  
+  
+def close_pdf_pool() -> None:  
+    _pool.close()  
+  
+  
+def _needs_ocr(text: str) -> bool:  
+    return len(text.strip()) < settings.PDF_OCR_MIN_CHARS  
+  
+  
+def _rasterize_pages(file_path: str, page_indices: List[int], dpi: int, cache_dir: Path) -> List[Optional[Path]]:  
+    """  
+    Rend les pages en PNG niveaux de gris à `dpi`.  
+  
+    Les images sont gardées dans `cache_dir` (propre au fichier) : un retry de la  
+    tâche relit le PNG au lieu de rastériser la page à nouveau. Le dossier est  
+    supprimé une fois le document entièrement extrait.  
+    """  
+    targets = [cache_dir / f"p{index + 1:05d}-{dpi}.png" for index in page_indices]  
+    missing = [(index, target) for index, target in zip(page_indices, targets) if not target.exists()]  
+    if not missing:  
+        return targets  
+    cache_dir.mkdir(parents=True, exist_ok=True)  
+  
+    if PDFIUM_AVAILABLE:  
+        document = pdfium.PdfDocument(file_path)  
+        try:  
+            for index, target in missing:  
+                image = document[index].render(scale=dpi / 72, grayscale=True).to_numpy()  
+                if image.ndim == 3:  
+                    image = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)  
+                tmp = target.with_name(f"{target.stem}.tmp.png")  
+                cv2.imwrite(str(tmp), image)  
+                os.replace(tmp, target)  
+        finally:  
+            document.close()  
+    elif shutil.which("pdftoppm"):  
+        for index, target in missing:  
+            tmp = target.with_name(f"{target.stem}.tmp")  
+            subprocess.run(  
+                ["pdftoppm", "-f", str(index + 1), "-l", str(index + 1), "-r", str(dpi),  
+                 "-gray", "-png", "-singlefile", file_path, str(tmp)],  
+                check=True, capture_output=True, timeout=settings.PDF_TIMEOUT_SECONDS,  
+            )  
+            os.replace(f"{tmp}.png", target)  
+    else:  
+        logger.warning("⚠️ Ni pypdfium2 ni pdftoppm : pages scannées ignorées")  
+        return [None] * len(page_indices)  
+    return targets  
+  
+  
+def _extract_page_range(  
+    file_path: str, start: int, stop: int, raster_dir: Optional[str] = None, dpi: int = 200  
+) -> List[Tuple[str, Optional[str]]]:  
+    """  
+    Extrait les pages [start, stop[ (exécuté dans un worker du pool).  
+  
+    Avec `raster_dir`, les pages sans texte (scans) sont aussi rastérisées :  
+    chaque page renvoie (texte, chemin de l'image à OCRiser ou None).  
+    """  
+    with open(file_path, 'rb') as file:  
+        pdf_reader = PyPDF2.PdfReader(file)  
+        texts = [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]  
+  
+    rasters: List[Optional[str]] = [None] * len(texts)  
+    if raster_dir:  
+        scanned = [start + offset for offset, text in enumerate(texts) if _needs_ocr(text)]  
+        if scanned:  
+            for index, path in zip(scanned, _rasterize_pages(file_path, scanned, dpi, Path(raster_dir))):  
+                rasters[index - start] = str(path) if path else None  
+    return list(zip(texts, rasters))  
+  
+  
+def _raster_cache_dir(file_path: Path) -> Path:  
+    """Dossier de cache des pages rastérisées, indexé par le contenu du fichier."""  
+    digest = hashlib.sha256()  
+    with open(file_path, 'rb') as file:  
+        for block in iter(lambda: file.read(1 << 20), b""):  
+            digest.update(block)  
+    return settings.CACHE_DIR / "pdf_pages" / digest.hexdigest()[:24]  
+  
+  
+def _ocr_scanned(pages: List[Tuple[str, Optional[str]]]) -> List[str]:  
+    """Remplace le texte des pages scannées par l'OCR du lot (un appel `ocr_batch` par plage)."""  
+    texts = [text for text, _ in pages]  
+    scanned = [(offset, raster) for offset, (_, raster) in enumerate(pages) if raster]  
+    if scanned:  
+        ocr_texts = get_ocr_engine().ocr_batch([raster for _, raster in scanned])  
+        for (offset, _), ocr_text in zip(scanned, ocr_texts):  
+            if len(ocr_text.strip()) > len(texts[offset].strip()):  
+                texts[offset] = ocr_text  
+    return texts  
+  
+  
+def iter_pdf_pages(file_path: Path, pages_per_task: Optional[int] = None) -> Iterator[Tuple[int, str]]:  
+    """  
+    Itère sur (numéro de page, texte) dans l'ordre du document.  
+  
+    Les plages de `pages_per_task` pages sont soumises au pool par fenêtre  
+    glissante (deux plages par worker) : la première page est disponible dès  
+    que sa plage est extraite, et la mémoire ne dépend pas de la taille du PDF.  
+  
+    Les pages scannées (moins de PDF_OCR_MIN_CHARS caractères) sont rastérisées  
+    dans le même worker puis passées à l'OCR par lot.  
+    """  
+    with open(file_path, 'rb') as file:  
+        total = len(PyPDF2.PdfReader(file).pages)  
+  
+    step = pages_per_task or settings.PDF_PAGES_PER_TASK  
+    raster_dir = str(_raster_cache_dir(file_path)) if settings.PDF_OCR_FALLBACK else None  
+    args = (str(file_path),)  
+    options = (raster_dir, settings.PDF_OCR_DPI)  
+    workers = settings.PDF_WORKERS or os.cpu_count() or 1  
+    started = time.perf_counter()  
+    ocr_pages = 0  
+  
+    # Petit document ou un seul cœur : le pool coûterait plus qu'il ne rapporte  
+    if total < settings.PDF_PARALLEL_MIN_PAGES or workers == 1:  
+        ranges: Iterator[Tuple[int, List[Tuple[str, Optional[str]]]]] = (  
+            (start, _extract_page_range(*args, start, min(start + step, total), *options))  
+            for start in range(0, total, step)  
+        )  
+        pending: Deque[Tuple[int, Future]] = deque()  
+    else:  
+        pool = _get_pool()  
+        starts = iter(range(0, total, step))  
+        pending = deque()  
+  
+        def submit_next() -> None:  
+            start = next(starts, None)  
+            if start is not None:  
+                pending.append((start, pool.submit(_extract_page_range, *args, start, min(start + step, total), *options)))  
+  
+        def collect() -> Iterator[Tuple[int, List[Tuple[str, Optional[str]]]]]:  
+            for _ in range(2 * _pool.size):  
+                submit_next()  
+            while pending:  
+                start, future = pending.popleft()  
+                result = future.result(timeout=settings.PDF_TIMEOUT_SECONDS)  
+                submit_next()  
+                yield start, result  
+  
+        ranges = collect()  
+  
+    try:  
+        for start, pages in ranges:  
+            ocr_pages += sum(1 for _, raster in pages if raster)  
+            for offset, text in enumerate(_ocr_scanned(pages)):  
+                yield start + offset + 1, text  
+    finally:  
+        for _, future in pending:  
+            future.cancel()  
+  
+    # Extraction complète : les PNG ne servaient qu'à reprendre après un échec  
+    # (ceux d'une tâche abandonnée sont purgés par cleanup_exports_task)  
+    if raster_dir:  
+        shutil.rmtree(raster_dir, ignore_errors=True)  
+  
+    elapsed = time.perf_counter() - started  
+    logger.info(  
+        "📑 %d pages extraites en %.2fs (%.0f pages/s, %d OCRisées)",  
+        total, elapsed, total / max(elapsed, 1e-6), ocr_pages,  
+    )  
+  
+  
 def extract_text_from_pdf(file_path: Path) -> str:  
     """Extrait le texte d'un fichier PDF."""  
     try:  
-        text_content = []  
-        with open(file_path, 'rb') as file:  
-            pdf_reader = PyPDF2.PdfReader(file)  
-            for page_num, page in enumerate(pdf_reader.pages):  
-                page_text = page.extract_text()  
-                if page_text:  
-                    text_content.append(f"--- Page {page_num + 1} ---\n{page_text}")  
-          
+        text_content = [  
+            f"--- Page {page_num} ---\n{page_text}"  
+            for page_num, page_text in iter_pdf_pages(file_path)  
+            if page_text  
+        ]  
         return "\n\n".join(text_content)  
     except Exception as e:  
         logger.error("❌ Erreur extraction PDF: %s", e)  
         raise  
    
 def extract_text_from_docx(file_path: Path) -> str:  
-    """Extrait le texte d'un fichier DOCX."""  
+    """Extrait le texte d'un fichier DOCX (titres, listes et tableaux en Markdown)."""  
     try:  
-        doc = Document(file_path)  
-        paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]  
-        return "\n\n".join(paragraphs)  
+        return "\n\n".join(iter_docx_blocks(file_path))  
     except Exception as e:  
         logger.error("❌ Erreur extraction DOCX: %s", e)  
         raise  
@@ -74,4 +265,28 @@ def extract_text_from_document(file_path: Path) -> Optional[str]:
             return None  
     except Exception as e:  
         logger.error("❌ Échec extraction texte: %s", e)  
-        return None
\ No newline at end of file
+        return None
+  
+  
+def iter_document_blocks(file_path: Path) -> Iterator[str]:  
+    """  
+    Itère sur les blocs de texte d'un document, au fil de l'extraction :  
+    pages (PDF), blocs Markdown (DOCX) ou paragraphes (TXT).  
+  
+    Lève ValueError si le format n'est pas supporté.  
+    """  
+    ext = file_path.suffix.lower()  
+    logger.info("📄 Extraction en flux depuis %s (format: %s)", file_path.name, ext)  
+  
+    if ext == ".pdf":  
+        for _, page_text in iter_pdf_pages(file_path):  
+            if page_text.strip():  
+                yield page_text  
+    elif ext in [".docx", ".doc"]:  
+        yield from iter_docx_blocks(file_path)  
+    elif ext == ".txt":  
+        for paragraph in _PARAGRAPHS_RE.split(extract_text_from_txt(file_path)):  
+            if paragraph.strip():  
+                yield paragraph  
+    else:  
+        raise ValueError(f"Format de document non supporté: {ext}")  
@@ -0,0 +1,144 @@
+"""
+Export groupé : plusieurs notes dans une archive ZIP produite en flux.
+
+Les notes sont rendues en parallèle dans le pool de rendu (au plus
+`concurrency` à la fois) et chaque fichier est ajouté à l'archive dès qu'il est
+prêt. L'archive est écrite dans un flux non "seekable" : zipfile place alors la
+taille et le CRC de chaque entrée après ses données (data descriptor), et les
+octets produits peuvent partir vers le client immédiatement. En mémoire : au
+plus `concurrency` documents rendus, jamais l'archive entière.
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Set
+
+from app.core.logger import get_logger
+from app.services.export.docx import render_docx_bytes
+from app.services.export.pdf import render_pdf_bytes
+from app.services.export.render_pool import ExportQueueFull, render_pool
+from app.services.export.txt import render_txt_bytes
+
+logger = get_logger("export.bulk")
+
+RENDERERS: Dict[str, Callable[[Dict], bytes]] = {
+    "pdf": render_pdf_bytes,
+    "docx": render_docx_bytes,
+    "txt": render_txt_bytes,
+}
+# PDF et DOCX sont déjà compressés : les recompresser coûte du CPU pour rien
+_COMPRESSION = {"pdf": zipfile.ZIP_STORED, "docx": zipfile.ZIP_STORED, "txt": zipfile.ZIP_DEFLATED}
+_QUEUE_FULL_RETRY_SECONDS = 0.5
+_UNSAFE_NAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+class _ZipSink:
+    """Flux d'écriture sans seek() : zipfile y écrit, on récupère les octets au fur et à mesure."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def entry_name(title: str, fmt: str, used: Set[str]) -> str:
+    """Nom de fichier lisible et unique dans l'archive ("Titre.pdf", "Titre (2).pdf"...)."""
+    stem = " ".join(_UNSAFE_NAME_RE.sub(" ", title or "").split())[:100].strip(" .") or "note"
+    name, n = f"{stem}.{fmt}", 1
+    while name.lower() in used:
+        n += 1
+        name = f"{stem} ({n}).{fmt}"
+    used.add(name.lower())
+    return name
+
+
+async def _render(note_data: Dict, fmt: str) -> bytes:
+    while True:
+        try:
+            return await render_pool.run(RENDERERS[fmt], note_data)
+        except ExportQueueFull:
+            # Export groupé : on attend une place plutôt que d'échouer au milieu de l'archive
+            await asyncio.sleep(_QUEUE_FULL_RETRY_SECONDS)
+
+
+async def iter_zip(notes: AsyncIterator[Dict], fmt: str, concurrency: int = 4) -> AsyncIterator[bytes]:
+    """
+    Octets de l'archive ZIP, produits au fil des rendus.
+
+    `notes` fournit des dictionnaires {"title", "content"}. L'ordre des entrées
+    suit la fin des rendus, pas l'ordre des notes. Une note dont le rendu
+    échoue est listée dans ERREURS.txt au lieu d'interrompre l'archive.
+    """
+    sink = _ZipSink()
+    used: Set[str] = set()
+    errors: List[str] = []
+    pending: Dict[asyncio.Task, str] = {}
+    exhausted = False
+    count = 0
+
+    with zipfile.ZipFile(sink, "w") as archive:
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < concurrency:
+                    note = await anext(notes, None)
+                    if note is None:
+                        exhausted = True
+                        break
+                    task = asyncio.create_task(_render(note, fmt))
+                    pending[task] = entry_name(note.get("title", ""), fmt, used)
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        data = task.result()
+                    except Exception as e:
+                        logger.error(f"❌ Export groupé : rendu de '{name}' impossible : {e}")
+                        errors.append(f"{name} : {e}")
+                        continue
+                    info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+                    info.compress_type = _COMPRESSION[fmt]
+                    archive.writestr(info, data)
+                    count += 1
+                    yield sink.drain()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if errors:
+            archive.writestr("ERREURS.txt", "\n".join(errors) + "\n")
+
+    # Répertoire central, écrit à la fermeture de l'archive
+    logger.info(f"📦 Export groupé {fmt} : {count} fichier(s), {len(errors)} erreur(s)")
+    yield sink.drain()
+
+
+async def write_zip(notes: AsyncIterator[Dict], fmt: str, path, concurrency: int = 4) -> int:
+    """Écrit l'archive dans `path` (export groupé en tâche de fond) ; renvoie sa taille."""
+    size = 0
+    with open(path, "wb") as f:
+        async for chunk in iter_zip(notes, fmt, concurrency):
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+async def note_payloads(notes: AsyncIterator) -> AsyncIterator[Dict]:
+    """Adapte des modèles Note au format attendu par les exporteurs."""
+    async for note in notes:
+        yield {"title": note.title, "content": note.content}
@@ -0,0 +1,23 @@
+"""
+Clé de cache des exports : un fichier exporté est réutilisé tant que le titre,
+le contenu de la note, le format et la version de l'exporteur sont identiques.
+"""
+import hashlib
+
+from app.services.export.docx import DOCXExporter
+from app.services.export.pdf import PDFExporter
+from app.services.export.txt import TXTExporter
+
+EXPORTER_VERSIONS = {
+    "pdf": PDFExporter.VERSION,
+    "docx": DOCXExporter.VERSION,
+    "txt": TXTExporter.VERSION,
+}
+
+
+def export_content_hash(title: str, content: str, fmt: str) -> str:
+    digest = hashlib.sha256()
+    for part in (fmt, str(EXPORTER_VERSIONS.get(fmt, 0)), title or "", content or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -1,16 +1,42 @@
+import io
 import re
 import uuid
-import asyncio
+import zipfile
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import BinaryIO, Dict, Optional, Union
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from app.core.logger import get_logger
 from app.core.config import settings
+from app.services.export.render_pool import render_pool
+from app.services.media.image_derivatives import image_derivatives
+from app.services.nlp.markdown_ast import BLANK, BULLET, HEADING, IMAGE, NUMBERED, QUOTE, parse_markdown
+
+# Dates fixes d'un rendu déterministe (métadonnées et entrées du ZIP)
+_FIXED_DATE = datetime(2000, 1, 1)
+_FIXED_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def _with_fixed_timestamps(data: bytes) -> bytes:
+    """Réécrit l'archive DOCX avec des dates d'entrée fixes (python-docx y met l'heure courante)."""
+    source = zipfile.ZipFile(io.BytesIO(data))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as target:
+        for info in source.infolist():
+            entry = zipfile.ZipInfo(info.filename, date_time=_FIXED_ZIP_DATE)
+            entry.compress_type = info.compress_type
+            entry.external_attr = info.external_attr
+            target.writestr(entry, source.read(info))
+    return buffer.getvalue()
+
 
 class DOCXExporter:
     """Génère des fichiers DOCX professionnels avec images intégrées"""
+
+    # À incrémenter quand le rendu change : invalide les exports déjà en cache
+    VERSION = 2
     
     def __init__(self):
         self.logger = get_logger("export.docx")
@@ -37,95 +63,123 @@ class DOCXExporter:
                 filename += '.docx'
             
             file_path = self.output_dir / filename
-            doc = Document()
-
-            # --- Style par défaut ---
-            style = doc.styles['Normal']
-            font = style.font
-            font.name = 'Calibri'
-            font.size = Pt(11)
-
-            # 1) Titre Principal
-            title = self._clean_text(note_data.get('title', 'Notes de cours'))
-            title_para = doc.add_heading(title, level=0)
-            title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            content = note_data.get('content', '')
-            lines = content.split('\n')
+            # Rendu complet dans le pool d'exports : l'event loop reste libre
+            file_size = await render_pool.run(render_docx, note_data, str(file_path))
+            self.logger.info(f"✅ DOCX généré avec succès: {file_path}")
+            return str(file_path), file_size
+
+        except Exception as e:
+            self.logger.error(f"❌ Erreur critique lors de la génération DOCX: {e}")
+            raise e
+
+    def _add_image(self, doc, src: str) -> None:
+        img_path = Path(src)
+        if not img_path.exists():
+            return
+        try:
+            # Insertion de l'image centrée, redimensionnée pour sa largeur affichée
+            width = Inches(5.0)
+            doc.add_picture(str(image_derivatives.for_width(img_path, width.pt)), width=width)
+            last_paragraph = doc.paragraphs[-1]
+            last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
             
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                # --- GESTION DES IMAGES ---
-                image_match = re.match(r'!\[.*?\]\((.*?)\)', line)
-                if image_match:
-                    img_path = Path(image_match.group(1))
-                    if img_path.exists():
-                        try:
-                            # Insertion de l'image centrée
-                            doc.add_picture(str(img_path), width=Inches(5.0))
-                            last_paragraph = doc.paragraphs[-1]
-                            last_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            
-                            # Légende optionnelle
-                            # Dans la gestion des images, remplace la partie caption par :
-                            try:
-                                caption_text = "Illustration technique"
-                                caption = doc.add_paragraph(caption_text)
-                                caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                                # On tente d'appliquer le style, sinon on formate manuellement
-                                try:
-                                    caption.style = 'Caption'
-                                except KeyError:
-                                    run = caption.runs[0] if caption.runs else caption.add_run(caption_text)
-                                    run.font.size = Pt(9)
-                                    run.italic = True
-                            except Exception as e:
-                                self.logger.warning(f"Légende non ajoutée : {e}")
-                        except Exception as e:
-                            self.logger.error(f"Erreur insertion image DOCX: {e}")
-                    continue
-
-                # --- NETTOYAGE DE LA LIGNE ---
-                line = self._clean_text(line)
+            # Légende optionnelle
+            # Dans la gestion des images, remplace la partie caption par :
+            try:
+                caption_text = "Illustration technique"
+                caption = doc.add_paragraph(caption_text)
+                caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                # On tente d'appliquer le style, sinon on formate manuellement
+                try:
+                    caption.style = 'Caption'
+                except KeyError:
+                    run = caption.runs[0] if caption.runs else caption.add_run(caption_text)
+                    run.font.size = Pt(9)
+                    run.italic = True
+            except Exception as e:
+                self.logger.warning(f"Légende non ajoutée : {e}")
+        except Exception as e:
+            self.logger.error(f"Erreur insertion image DOCX: {e}")
+
+    def render(self, note_data: Dict, output: Union[Path, BinaryIO], deterministic: bool = False) -> None:
+        """
+        Construit le DOCX (synchrone) dans un fichier ou un flux binaire.
 
+        `deterministic` : dates des propriétés et des entrées du ZIP fixes, pour
+        qu'une même note donne toujours les mêmes octets (reprise de téléchargement).
+        """
+        doc = Document()
+        if deterministic:
+            doc.core_properties.created = _FIXED_DATE
+            doc.core_properties.modified = _FIXED_DATE
+            doc.core_properties.last_printed = _FIXED_DATE
+
+        # --- Style par défaut ---
+        style = doc.styles['Normal']
+        font = style.font
+        font.name = 'Calibri'
+        font.size = Pt(11)
+
+        # 1) Titre Principal
+        title = self._clean_text(note_data.get('title', 'Notes de cours'))
+        title_para = doc.add_heading(title, level=0)
+        title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        blocks = note_data.get('blocks') or parse_markdown(note_data.get('content', ''))
+        
+        for block in blocks:
+            if block.kind == BLANK:
+                continue
+
+            # --- NETTOYAGE DE LA LIGNE ---
+            text = self._clean_text(block.text)
+
+            if block.kind != IMAGE and text:
                 # --- GESTION DES BLOCS D'ALERTE (> ⚠️) ---
-                if line.startswith('> '):
-                    p = doc.add_paragraph(line.replace('> ', ''), style='Quote')
+                if block.kind == QUOTE:
+                    p = doc.add_paragraph(text, style='Quote')
                     if p.runs:
                         run = p.runs[0]
                         run.font.color.rgb = RGBColor(200, 0, 0)
                         run.bold = True
-                    continue
-
                 # --- GESTION DU MARKDOWN CLASSIQUE ---
-                if line.startswith('# '):
-                    doc.add_heading(line[2:], level=1)
-                elif line.startswith('## '):
-                    doc.add_heading(line[3:], level=2)
-                elif line.startswith('### '):
-                    doc.add_heading(line[4:], level=3)
-                elif line.startswith('- ') or line.startswith('* '):
-                    doc.add_paragraph(line[2:], style='List Bullet')
-                elif line.startswith('1. ') or re.match(r'^\d+\.', line):
-                    text = re.sub(r'^\d+\.\s', '', line)
+                elif block.kind == HEADING:
+                    doc.add_heading(text, level=min(block.level, 3))
+                elif block.kind == BULLET:
+                    doc.add_paragraph(text, style='List Bullet')
+                elif block.kind == NUMBERED:
                     doc.add_paragraph(text, style='List Number')
                 else:
-                    doc.add_paragraph(line)
+                    doc.add_paragraph(text)
 
-            # Sauvegarde asynchrone pour ne pas bloquer l'event loop
-            await asyncio.to_thread(doc.save, str(file_path))
-            
-            file_size = file_path.stat().st_size
-            self.logger.info(f"✅ DOCX généré avec succès: {file_path}")
-            return str(file_path), file_size
+            # --- GESTION DES IMAGES (ligne image, ou images au fil du texte placées après lui) ---
+            for image in (block,) if block.kind == IMAGE else block.images:
+                self._add_image(doc, image.src)
 
-        except Exception as e:
-            self.logger.error(f"❌ Erreur critique lors de la génération DOCX: {e}")
-            raise e
+        if deterministic:
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            data = _with_fixed_timestamps(buffer.getvalue())
+            if isinstance(output, Path):
+                output.write_bytes(data)
+            else:
+                output.write(data)
+            return
+        doc.save(str(output) if isinstance(output, Path) else output)
 
 # Instance et alias pour l'export
 docx_exporter = DOCXExporter()
-generate_docx = docx_exporter.generate_docx
\ No newline at end of file
+generate_docx = docx_exporter.generate_docx
+
+
+def render_docx(note_data: Dict, file_path: str) -> int:
+    """Point d'entrée du pool de rendu (fonction de module, donc picklable)."""
+    docx_exporter.render(note_data, Path(file_path))
+    return Path(file_path).stat().st_size
+
+
+def render_docx_bytes(note_data: Dict) -> bytes:
+    """Rendu en mémoire et déterministe, pour un téléchargement direct (requêtes Range)."""
+    buffer = io.BytesIO()
+    docx_exporter.render(note_data, buffer, deterministic=True)
+    return buffer.getvalue()
@@ -1,9 +1,8 @@
 import html
-import re
+import io
 import uuid
-import asyncio
 from pathlib import Path
-from typing import Dict, Optional
+from typing import BinaryIO, Dict, Optional, Union
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -11,8 +10,14 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from reportlab.lib.enums import TA_CENTER
 from app.core.logger import get_logger
 from app.core.config import settings
+from app.services.export.render_pool import render_pool
+from app.services.media.image_derivatives import image_derivatives
+from app.services.nlp.markdown_ast import BLANK, BULLET, HEADING, IMAGE, NUMBERED, QUOTE, parse_markdown
 
 class PDFExporter:
+    # À incrémenter quand le rendu change : invalide les exports déjà en cache
+    VERSION = 2
+
     def __init__(self):
         self.logger = get_logger("export.pdf")
         self.output_dir = Path(settings.DOCS_DIR)
@@ -33,97 +38,118 @@ class PDFExporter:
                 filename = f"export_{uuid.uuid4().hex}.pdf"
             
             file_path = self.output_dir / filename
-            # Ajout de marges pour un look plus pro
-            doc = SimpleDocTemplate(
-                str(file_path), 
-                pagesize=A4,
-                rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=50
-            )
-            
-            story = []
-            styles = getSampleStyleSheet()
-
-            # Style Titre principal
-            title_style = ParagraphStyle(
-                'CustomTitle', 
-                parent=styles['Heading1'], 
-                fontSize=24, 
-                alignment=TA_CENTER, 
-                spaceAfter=30,
-                textColor='#2C3E50'
-            )
-            
-            # Style pour les citations/warnings
-            warning_style = ParagraphStyle(
-                'Warning', 
-                parent=styles['Normal'], 
-                textColor='#34495E', 
-                backColor='#F2F4F4', 
-                borderPadding=10, 
-                leftIndent=20,
-                fontName='Helvetica-Oblique'
-            )
-
-            # 1. Titre
-            clean_title = self._escape_and_clean(note_data.get('title', 'Notes'))
-            story.append(Paragraph(clean_title, title_style))
-
-            content = note_data.get('content', '')
-            lines = content.split('\n')
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    story.append(Spacer(1, 0.1*inch))
-                    continue
-
-                # --- IMAGES ---
-                image_match = re.match(r'!\[.*?\]\((.*?)\)', line)
-                if image_match:
-                    img_path = Path(image_match.group(1))
-                    if img_path.exists():
-                        try:
-                            # Ajustement automatique de l'image
-                            img = Image(str(img_path))
-                            # Ratio pour ne pas dépasser la largeur de la page
-                            max_width = 450 
-                            if img.drawWidth > max_width:
-                                ratio = max_width / img.drawWidth
-                                img.drawWidth = max_width
-                                img.drawHeight = img.drawHeight * ratio
-                            
-                            img.hAlign = 'CENTER'
-                            story.append(Spacer(1, 0.1*inch))
-                            story.append(img)
-                            story.append(Spacer(1, 0.1*inch))
-                        except Exception as e:
-                            self.logger.error(f"Erreur image PDF: {e}")
-                    continue
-
-                # --- TEXTE ---
-                if line.startswith('# '):
-                    story.append(Paragraph(self._escape_and_clean(line[2:]), styles['Heading1']))
-                elif line.startswith('## '):
-                    story.append(Paragraph(self._escape_and_clean(line[3:]), styles['Heading2']))
-                elif line.startswith('### '):
-                    story.append(Paragraph(self._escape_and_clean(line[4:]), styles['Heading3']))
-                elif line.startswith('> '):
-                    story.append(Paragraph(self._escape_and_clean(line[2:]), warning_style))
-                elif line.startswith('- ') or line.startswith('* '):
-                    # Utilisation de puces HTML pour ReportLab
-                    story.append(Paragraph(f"&bull; {self._escape_and_clean(line[2:])}", styles['Normal']))
-                else:
-                    story.append(Paragraph(self._escape_and_clean(line), styles['Normal']))
-
-            # Construction asynchrone
-            await asyncio.to_thread(doc.build, story)
-            
-            file_size = file_path.stat().st_size
+            # Rendu complet dans le pool d'exports : l'event loop reste libre
+            file_size = await render_pool.run(render_pdf, note_data, str(file_path))
             return str(file_path), file_size
 
         except Exception as e:
             self.logger.error(f"❌ Erreur PDF: {str(e)}")
             raise e
 
+    def _add_image(self, story: list, src: str) -> None:
+        img_path = Path(src)
+        if not img_path.exists():
+            return
+        try:
+            # Ratio pour ne pas dépasser la largeur de la page
+            max_width = 450 
+            # Capture redimensionnée pour cette largeur (pas l'original pleine résolution)
+            img = Image(str(image_derivatives.for_width(img_path, max_width)))
+            if img.drawWidth > max_width:
+                ratio = max_width / img.drawWidth
+                img.drawWidth = max_width
+                img.drawHeight = img.drawHeight * ratio
+            
+            img.hAlign = 'CENTER'
+            story.append(Spacer(1, 0.1*inch))
+            story.append(img)
+            story.append(Spacer(1, 0.1*inch))
+        except Exception as e:
+            self.logger.error(f"Erreur image PDF: {e}")
+
+    def render(self, note_data: Dict, output: Union[Path, BinaryIO], deterministic: bool = False) -> None:
+        """
+        Construit le PDF (synchrone) dans un fichier ou un flux binaire.
+
+        `deterministic` : date de création et /ID fixes (reportlab "invariant"), pour
+        qu'une même note donne toujours les mêmes octets (reprise de téléchargement).
+        """
+        # Ajout de marges pour un look plus pro
+        doc = SimpleDocTemplate(
+            str(output) if isinstance(output, Path) else output, 
+            pagesize=A4,
+            rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=50,
+            invariant=1 if deterministic else None
+        )
+        
+        story = []
+        styles = getSampleStyleSheet()
+
+        # Style Titre principal
+        title_style = ParagraphStyle(
+            'CustomTitle', 
+            parent=styles['Heading1'], 
+            fontSize=24, 
+            alignment=TA_CENTER, 
+            spaceAfter=30,
+            textColor='#2C3E50'
+        )
+        
+        # Style pour les citations/warnings
+        warning_style = ParagraphStyle(
+            'Warning', 
+            parent=styles['Normal'], 
+            textColor='#34495E', 
+            backColor='#F2F4F4', 
+            borderPadding=10, 
+            leftIndent=20,
+            fontName='Helvetica-Oblique'
+        )
+
+        # 1. Titre
+        clean_title = self._escape_and_clean(note_data.get('title', 'Notes'))
+        story.append(Paragraph(clean_title, title_style))
+
+        blocks = note_data.get('blocks') or parse_markdown(note_data.get('content', ''))
+
+        for block in blocks:
+            if block.kind == BLANK:
+                story.append(Spacer(1, 0.1*inch))
+                continue
+
+            # --- TEXTE ---
+            if block.kind != IMAGE and block.text:
+                text = self._escape_and_clean(block.text)
+                if block.kind == HEADING:
+                    story.append(Paragraph(text, styles[f'Heading{min(block.level, 3)}']))
+                elif block.kind == QUOTE:
+                    story.append(Paragraph(text, warning_style))
+                elif block.kind == BULLET:
+                    # Utilisation de puces HTML pour ReportLab
+                    story.append(Paragraph(f"&bull; {text}", styles['Normal']))
+                elif block.kind == NUMBERED:
+                    story.append(Paragraph(f"{block.level}. {text}", styles['Normal']))
+                else:
+                    story.append(Paragraph(text, styles['Normal']))
+
+            # --- IMAGES (ligne image, ou images au fil du texte placées après lui) ---
+            for image in (block,) if block.kind == IMAGE else block.images:
+                self._add_image(story, image.src)
+
+        doc.build(story)
+
 pdf_exporter = PDFExporter()
-generate_pdf = pdf_exporter.generate_pdf
\ No newline at end of file
+generate_pdf = pdf_exporter.generate_pdf
+
+
+def render_pdf(note_data: Dict, file_path: str) -> int:
+    """Point d'entrée du pool de rendu (fonction de module, donc picklable)."""
+    pdf_exporter.render(note_data, Path(file_path))
+    return Path(file_path).stat().st_size
+
+
+def render_pdf_bytes(note_data: Dict) -> bytes:
+    """Rendu en mémoire et déterministe, pour un téléchargement direct (requêtes Range)."""
+    buffer = io.BytesIO()
+    pdf_exporter.render(note_data, buffer, deterministic=True)
+    return buffer.getvalue()
@@ -0,0 +1,109 @@
+"""
+Pool de rendu des exports (PDF, DOCX, TXT).
+
+Tout le rendu d'une note (analyse Markdown, construction du document, écriture)
+s'exécute hors de l'event loop, dans un pool de process partagé par tous les
+exports du process courant (API ou worker Celery). Le nombre de rendus en cours
+ou en attente est borné : au-delà, `ExportQueueFull` est levée (l'API répond 503)
+au lieu d'empiler des demandes qu'aucun worker ne pourra servir à temps.
+
+Un rendu qui dépasse son délai bloquerait son process (et sa place) indéfiniment :
+les process du pool sont alors tués et recréés. Les autres rendus interrompus par
+ce recyclage sont relancés une fois (le rendu est une fonction pure).
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.utils.process_pool import LazyProcessPool
+
+logger = get_logger("export.render_pool")
+
+T = TypeVar("T")
+
+
+class ExportQueueFull(RuntimeError):
+    """Trop de rendus d'export en cours : la demande est refusée."""
+
+
+class RenderPool:
+    def __init__(self, workers: int = 0, max_pending: int = 32, timeout: float = 60.0):
+        """
+        Args:
+            workers: Process de rendu (0 = un par cœur)
+            max_pending: Rendus en cours + en attente au-delà desquels on refuse
+            timeout: Délai max d'attente d'un rendu, en secondes
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pool = LazyProcessPool("de rendu des exports")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> Future:
+        """Soumet un rendu ; lève ExportQueueFull si la file est pleine."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExportQueueFull(f"{self._pending} exports en cours, réessayez plus tard")
+            self._pending += 1
+            try:
+                future = self._pool.get(self.workers).submit(fn, *args)
+            except BaseException:
+                self._pending -= 1
+                raise
+        # La place n'est libérée qu'à la fin réelle du rendu (y compris après un timeout)
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Exécute `fn(*args)` dans le pool sans bloquer l'event loop.
+
+        `fn` et ses arguments doivent être picklables (fonction de module).
+        Lève ExportQueueFull si la file est pleine, TimeoutError au-delà du délai.
+        """
+        retried = False
+        while True:
+            future = self.submit(fn, *args)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                logger.warning("⏱️ Rendu d'export abandonné après %.0fs : process de rendu recyclés", self.timeout)
+                self._pool.terminate()
+                raise TimeoutError(f"Rendu de l'export trop long (> {self.timeout:.0f}s)") from None
+            except BrokenProcessPool:
+                # Pool recyclé pendant ce rendu (timeout d'un autre export, process tué)
+                if retried:
+                    raise
+                retried = True
+                logger.warning("♻️ Rendu d'export interrompu par le recyclage du pool : nouvel essai")
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+# Instance globale
+render_pool = RenderPool(
+    workers=settings.EXPORT_WORKERS,
+    max_pending=settings.EXPORT_MAX_PENDING,
+    timeout=settings.EXPORT_TIMEOUT_SECONDS,
+)
+
+
+def close_render_pool() -> None:
+    render_pool.close()
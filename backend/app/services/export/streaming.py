@@ -0,0 +1,83 @@
+"""
+Téléchargement direct d'un export, sans fichier dans DOCS_DIR.
+
+Le TXT est envoyé ligne par ligne au fil de sa génération (taille inconnue :
+réponse chunked). Le PDF et le DOCX sont rendus en mémoire dans le pool de
+rendu : leur taille est connue, on annonce donc Content-Length et on sert les
+requêtes `Range` (reprise de téléchargement, lecteurs PDF). Chaque requête
+rend à nouveau le document : le rendu est déterministe et la réponse porte un
+ETag fort calculé sur les octets, une reprise (`If-Range`) ne peut donc pas
+mélanger deux fichiers.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Iterable, Iterator, Optional, Tuple
+
+# Une seule plage "bytes=debut-fin" ; les requêtes multi-plages reçoivent le fichier entier
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    """Plage demandée hors du fichier (réponse 416)."""
+
+
+def content_etag(data: bytes) -> str:
+    """ETag fort : identique si et seulement si les octets le sont."""
+    return f'"{hashlib.sha256(data).hexdigest()}"'
+
+
+def parse_range(
+    header: Optional[str], size: int, if_range: Optional[str] = None, etag: Optional[str] = None
+) -> Optional[Tuple[int, int]]:
+    """
+    Plage (début, fin incluse) demandée par l'en-tête `Range`, ou None pour le fichier entier.
+
+    Avec `If-Range`, la plage n'est servie que si le validateur est l'ETag courant
+    (une date ne correspond jamais : pas de Last-Modified) ; sinon fichier entier.
+    Lève RangeNotSatisfiable si la plage ne recouvre aucun octet du fichier.
+    """
+    if not header:
+        return None
+    if if_range is not None and if_range.strip() != etag:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # "bytes=-N" : les N derniers octets
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def iter_bytes(data: bytes, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    """Octets `start`..`end` (inclus) par morceaux, sans copier tout le buffer."""
+    view = memoryview(data)
+    for offset in range(start, end + 1, chunk_size):
+        yield bytes(view[offset:min(offset + chunk_size, end + 1)])
+
+
+def iter_encoded(chunks: Iterable[str], chunk_size: int) -> Iterator[bytes]:
+    """Regroupe de petits morceaux de texte en blocs UTF-8 d'environ `chunk_size` octets."""
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= chunk_size:
+            yield b"".join(pending)
+            pending, pending_size = [], 0
+    if pending:
+        yield b"".join(pending)
@@ -1,13 +1,16 @@
-import re
 import uuid
-import asyncio
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, Optional
 from app.core.logger import get_logger
 from app.core.config import settings
+from app.services.export.render_pool import render_pool
+from app.services.nlp.markdown_ast import IMAGE_RE, parse_markdown
 
 class TXTExporter:
     """Génère des fichiers TXT propres et lisibles sans balises parasites."""
+
+    # À incrémenter quand le rendu change : invalide les exports déjà en cache
+    VERSION = 1
     
     def __init__(self):
         self.logger = get_logger("export.txt")
@@ -31,25 +34,8 @@ class TXTExporter:
             
             file_path = self.output_dir / filename
             
-            title = self._clean_text(note_data.get('title', 'Notes'))
-            content = note_data.get('content', '')
-
-            # --- NETTOYAGE DES BALISES D'IMAGES ---
-            # On remplace ![alt](path) par [ILLUSTRATION]
-            clean_content = re.sub(r'!\[(.*?)\]\(.*?\)', r'[ILLUSTRATION : \1]', content)
-
-            # Nettoyage des sauts de lignes excessifs
-            clean_content = re.sub(r'\n{3,}', '\n\n', clean_content)
-            
-            # Formatage visuel du TXT
-            header_line = "=" * min(len(title), 80)
-            text_content = f"{header_line}\n{title.upper()}\n{header_line}\n\n{clean_content}"
-            
-            # SAUVEGARDE ASYNCHRONE
-            # On utilise asyncio.to_thread pour ne pas bloquer l'event loop pendant l'écriture disque
-            await asyncio.to_thread(self._write_file, file_path, text_content)
-            
-            file_size = file_path.stat().st_size
+            # Rendu complet dans le pool d'exports : l'event loop reste libre
+            file_size = await render_pool.run(render_txt, note_data, str(file_path))
             self.logger.info(f"✅ TXT généré avec succès: {file_path}")
             return str(file_path), file_size
             
@@ -57,11 +43,52 @@ class TXTExporter:
             self.logger.error(f"❌ Erreur lors de la génération TXT: {e}")
             raise e
 
-    def _write_file(self, path: Path, content: str):
-        """Méthode synchrone appelée dans un thread."""
+    def iter_text(self, note_data: Dict) -> Iterator[str]:
+        """
+        Contenu du TXT morceau par morceau (en-tête, puis une ligne à la fois).
+
+        Les sauts de ligne sont comptés au fil de l'eau : plus de deux à la
+        suite sont ramenés à deux, sans jamais assembler le texte complet.
+        """
+        title = self._clean_text(note_data.get('title', 'Notes'))
+        blocks = note_data.get('blocks') or parse_markdown(note_data.get('content', ''))
+
+        # Formatage visuel du TXT
+        header_line = "=" * min(len(title), 80)
+        yield f"{header_line}\n{title.upper()}\n{header_line}\n\n"
+
+        newlines = -1  # Pas de saut de ligne avant la première ligne
+        for block in blocks:
+            newlines += 1
+            # --- NETTOYAGE DES BALISES D'IMAGES ---
+            # On remplace chaque ![alt](path) de la ligne par [ILLUSTRATION : alt]
+            line = IMAGE_RE.sub(r"[ILLUSTRATION : \g<alt>]", block.raw)
+            if line:
+                yield "\n" * min(newlines, 2) + line
+                newlines = 0
+        if newlines > 0:
+            yield "\n" * min(newlines, 2)
+
+    def render(self, note_data: Dict, file_path: Path) -> int:
+        """Écrit le TXT dans `file_path` (synchrone) et renvoie sa taille."""
+        self._write_file(file_path, self.iter_text(note_data))
+        return file_path.stat().st_size
+
+    def _write_file(self, path: Path, chunks: Iterable[str]):
+        """Écriture synchrone (appelée depuis le pool de rendu)."""
         with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
+            f.writelines(chunks)
 
 # Instance globale et alias
 txt_exporter = TXTExporter()
-generate_txt = txt_exporter.generate_txt
\ No newline at end of file
+generate_txt = txt_exporter.generate_txt
+
+
+def render_txt(note_data: Dict, file_path: str) -> int:
+    """Point d'entrée du pool de rendu (fonction de module, donc picklable)."""
+    return txt_exporter.render(note_data, Path(file_path))
+
+
+def render_txt_bytes(note_data: Dict) -> bytes:
+    """Rendu en mémoire (export groupé)."""
+    return "".join(txt_exporter.iter_text(note_data)).encode("utf-8")
@@ -8,9 +8,17 @@ from groq import AsyncGroq
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.ia.router import TIER_FAST, TIER_SMART, model_router
+from app.services.ia.tokens import estimate_chat_tokens
 
 logger = get_logger("ia.groq_client")
 
+REFINE_SYSTEM_PROMPT = (
+    "Tu es un expert en transcription académique. "
+    "Corrige les erreurs phonétiques, améliore la ponctuation, "
+    "supprime les répétitions. Réponds uniquement par le texte corrigé."
+)
+
 
 class GroqAIClient:
     """
@@ -22,9 +30,10 @@ class GroqAIClient:
     def __init__(self) -> None:
         self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
         self.model_stt = "whisper-large-v3"
-        # 💡 On sépare les modèles selon la difficulté de la tâche
-        self.model_fast = "llama-3.1-8b-instant" 
-        self.model_smart = "llama-3.3-70b-versatile"
+        # 💡 On sépare les modèles selon la difficulté de la tâche (catalogue du routeur)
+        self.router = model_router
+        self.model_fast = self.router.smallest(TIER_FAST).name
+        self.model_smart = self.router.smallest(TIER_SMART).name
         # 💡 SOLUTION : On définit model_llm pour qu'il pointe par défaut sur le modèle "smart"
         self.model_llm = self.model_smart
 
@@ -47,33 +56,60 @@ class GroqAIClient:
         return {"text": response.text, "segments": response.segments, "language": lang}
     
     async def refine_text(self, raw_text: str) -> str:
-        """Correction rapide avec le modèle 8b."""
-        completion = await self.client.chat.completions.create(
-            model=self.model_fast, # 🚀 Gain de vitesse énorme
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Tu es un expert en transcription académique. "
-                        "Corrige les erreurs phonétiques, améliore la ponctuation, "
-                        "supprime les répétitions. Réponds uniquement par le texte corrigé."
-                    ),
-                },
-                {"role": "user", "content": raw_text},
-            ],
-            temperature=0.1,
-            max_tokens=4096 # Sécurité
-        )
-        return completion.choices[0].message.content or raw_text
+        """
+        Correction rapide (modèle 8b).
+
+        Le routeur découpe le texte pour que chaque morceau et sa sortie tiennent
+        dans le modèle : plus de correction coupée à 4096 tokens.
+        """
+        if not raw_text or not raw_text.strip():
+            return raw_text
+
+        plan = self.router.plan_refine(raw_text, REFINE_SYSTEM_PROMPT)
+        if len(plan) > 1:
+            logger.info("✂️ Raffinage découpé en %d morceaux", len(plan))
+
+        refined_parts = []
+        for chunk in plan:
+            completion = await self.client.chat.completions.create(
+                model=chunk.model.name,
+                messages=[
+                    {"role": "system", "content": REFINE_SYSTEM_PROMPT},
+                    {"role": "user", "content": chunk.text},
+                ],
+                temperature=0.1,
+                max_tokens=chunk.max_tokens,
+            )
+            refined = (completion.choices[0].message.content or chunk.text).strip()
+            # Morceau coupé en plein paragraphe : recollé par une espace, pas par un saut
+            refined_parts.append(chunk.separator + refined)
+
+        return "".join(refined_parts)
+
+    async def generate_completion(
+        self,
+        prompt: str,
+        system_msg: str = "Tu es un assistant utile.",
+        temperature: float = 0.2,
+        task: str = "notes",
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        # 🎯 Le plus petit modèle capable de la tâche et qui contient le prompt
+        prompt_tokens = estimate_chat_tokens(system_msg, prompt)
+        model = self.router.pick(task, prompt_tokens, max_tokens or 0)
+
+        params: Dict[str, Any] = {}
+        if max_tokens:
+            params["max_tokens"] = min(max_tokens, model.max_output_tokens)
 
-    async def generate_completion(self, prompt: str, system_msg: str = "Tu es un assistant utile.", temperature: float = 0.2) -> str:
         completion = await self.client.chat.completions.create(
-            model=self.model_llm,
+            model=model.name,
             messages=[
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": prompt},
             ],
             temperature=temperature,
+            **params,
         )
         return completion.choices[0].message.content or ""
 
@@ -0,0 +1,112 @@
+"""
+Aiguillage des appels texte entre Groq (cloud) et Ollama (local).
+
+Règles :
+- `LOCAL_LLM_ENABLED=False` : tout part chez Groq (comportement historique)
+- Tâches dont le tier est <= `LOCAL_LLM_MAX_TIER` : traitées en local
+- Quota Groq épuisé (429) : Groq est mis en pause et le local prend le relais, sauf
+  pour un prompt qui ne tient pas dans le contexte local (`OLLAMA_NUM_CTX`) : le 429
+  remonte et la tâche Celery réessaie plus tard (pas de notes tronquées)
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Optional, Protocol
+
+from groq import RateLimitError
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.ia.groq_client import groq_client
+from app.services.ia.local.ollama_client import ollama_client
+from app.services.ia.router import TASK_TIERS, TIER_SMART
+
+logger = get_logger("ia.llm_dispatcher")
+
+
+class TextLLMClient(Protocol):
+    async def refine_text(self, raw_text: str) -> str: ...
+
+    async def generate_completion(
+        self,
+        prompt: str,
+        system_msg: str = ...,
+        temperature: float = ...,
+        task: str = ...,
+        max_tokens: Optional[int] = ...,
+    ) -> str: ...
+
+
+class LocalLLMClient(TextLLMClient, Protocol):
+    def fits(self, prompt: str, system_msg: str = ..., max_tokens: Optional[int] = ...) -> bool: ...
+
+
+class LLMDispatcher:
+    def __init__(self, cloud: TextLLMClient, local: LocalLLMClient) -> None:
+        self.cloud = cloud
+        self.local = local
+        self._cloud_paused_until = 0.0
+
+    @property
+    def cloud_paused(self) -> bool:
+        return time.monotonic() < self._cloud_paused_until
+
+    def pause_cloud(self, exc: Optional[RateLimitError] = None) -> None:
+        delay = float(settings.GROQ_QUOTA_COOLDOWN_SECONDS)
+        retry_after = exc.response.headers.get("retry-after") if exc is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                pass
+        self._cloud_paused_until = time.monotonic() + delay
+        logger.warning("⏸️ Quota Groq atteint, bascule sur le LLM local pendant %.0fs", delay)
+
+    def backend_for(self, task: str, fits_local: bool = True) -> TextLLMClient:
+        if not settings.LOCAL_LLM_ENABLED:
+            return self.cloud
+        if TASK_TIERS.get(task, TIER_SMART) <= settings.LOCAL_LLM_MAX_TIER:
+            return self.local
+        if self.cloud_paused and fits_local:
+            return self.local
+        return self.cloud
+
+    async def _call(self, task: str, method: str, /, *args: Any, fits_local: bool = True, **kwargs: Any) -> str:
+        backend = self.backend_for(task, fits_local)
+        try:
+            return await getattr(backend, method)(*args, **kwargs)
+        except RateLimitError as exc:
+            # Sans backend local, on laisse remonter : la tâche Celery fera son retry
+            if backend is not self.cloud or not settings.LOCAL_LLM_ENABLED:
+                raise
+            self.pause_cloud(exc)
+            if not fits_local:
+                logger.warning("⏳ Prompt '%s' trop long pour le LLM local : retry plutôt que débordement", task)
+                raise
+            return await getattr(self.local, method)(*args, **kwargs)
+
+    async def refine_text(self, raw_text: str) -> str:
+        return await self._call("refine", "refine_text", raw_text)
+
+    async def generate_completion(
+        self,
+        prompt: str,
+        system_msg: str = "Tu es un assistant utile.",
+        temperature: float = 0.2,
+        task: str = "notes",
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        return await self._call(
+            task,
+            "generate_completion",
+            prompt,
+            system_msg=system_msg,
+            temperature=temperature,
+            task=task,
+            max_tokens=max_tokens,
+            fits_local=self.local.fits(prompt, system_msg, max_tokens),
+        )
+
+
+llm_client = LLMDispatcher(groq_client, ollama_client)
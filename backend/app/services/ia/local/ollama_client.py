@@ -1,32 +1,179 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import aiohttp
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.ia.groq_client import REFINE_SYSTEM_PROMPT
+from app.services.ia.router import REFINE_OUTPUT_MARGIN, REFINE_OUTPUT_RATIO
+from app.services.ia.tokens import (
+    estimate_chat_tokens, estimate_tokens, split_text_to_budget, split_text_with_separators,
+)
 
 logger = get_logger("ia.local.ollama_client")
 
 
 class OllamaClient:
-    """Client minimal pour Ollama (LLM local)."""
+    """
+    Client Ollama (LLM local), même interface que `GroqAIClient` pour le texte.
 
-    def __init__(self) -> None:
-        self.base_url = settings.OLLAMA_BASE_URL.rstrip("/")
+    - Une seule `ClientSession` par process (pool de connexions keep-alive)
+    - Réponses en streaming NDJSON : pas de gros JSON bufferisé côté serveur
+    """
+
+    def __init__(self, base_url: Optional[str] = None) -> None:
+        self.base_url = (base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+        self.model_llm = settings.LOCAL_LLM_MODEL
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Session partagée, recréée si fermée ou si l'event loop a changé (worker Celery)."""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._session_loop is not loop:
+            # Ancienne session liée à un autre loop : fermée avant d'être remplacée
+            await self._discard_session(self._session, self._session_loop)
+            self._session = None
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.OLLAMA_POOL_SIZE,
+                keepalive_timeout=settings.OLLAMA_KEEPALIVE_SECONDS,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.OLLAMA_TIMEOUT_SECONDS, sock_connect=10),
+            )
+            self._session_loop = loop
+        return self._session
+
+    @staticmethod
+    async def _discard_session(session: aiohttp.ClientSession, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Ferme une session créée sur un autre event loop (sockets et connecteur compris)."""
+        if session.closed:
+            return
+        try:
+            if loop is not None and loop.is_running():
+                # Loop d'un autre thread : ses transports doivent être fermés depuis ce loop
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+            else:
+                await session.close()
+        except Exception as exc:
+            logger.warning("Fermeture de l'ancienne session Ollama impossible: %s", exc)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    async def _stream(self, endpoint: str, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Envoie une requête en streaming et itère sur les objets NDJSON reçus."""
+        session = await self._get_session()
+        async with session.post(f"{self.base_url}{endpoint}", json={**payload, "stream": True}) as resp:
+            resp.raise_for_status()
+            async for raw_line in resp.content:
+                line = raw_line.strip()
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(f"Ollama: {data['error']}")
+                yield data
+                if data.get("done"):
+                    break
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """Itère sur les morceaux de texte générés au fil de l'eau."""
+        options: Dict[str, Any] = {"temperature": temperature, "num_ctx": settings.OLLAMA_NUM_CTX}
+        if max_tokens:
+            options["num_predict"] = max_tokens
+        payload = {"model": model or self.model_llm, "messages": messages, "options": options}
+
+        async for data in self._stream("/api/chat", payload):
+            piece = (data.get("message") or {}).get("content")
+            if piece:
+                yield piece
 
     async def generate(self, prompt: str, model: Optional[str] = None) -> str:
-        model = model or settings.LOCAL_LLM_MODEL
-        url = f"{self.base_url}/api/generate"
-        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": False}
+        payload: Dict[str, Any] = {"model": model or self.model_llm, "prompt": prompt}
+        parts = [data.get("response") or "" async for data in self._stream("/api/generate", payload)]
+        return "".join(parts).strip()
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=300)) as resp:
-                resp.raise_for_status()
-                data = await resp.json()
-                return (data.get("response") or "").strip()
+    def fits(self, prompt: str, system_msg: str = "", max_tokens: Optional[int] = None) -> bool:
+        """Le prompt, les consignes et la sortie demandée tiennent-ils dans `num_ctx` ?"""
+        return estimate_chat_tokens(system_msg, prompt) + (max_tokens or 0) <= settings.OLLAMA_NUM_CTX
 
+    def _fit_prompt(self, prompt: str, system_msg: str, max_tokens: Optional[int], task: str) -> Tuple[str, int]:
+        """
+        Ramène prompt + sortie à `num_ctx`.
 
-ollama_client = OllamaClient()
+        Au-delà, Ollama tronque silencieusement le début de la conversation, donc les
+        consignes système : on plafonne plutôt la sortie (moitié du contexte au plus)
+        puis on coupe la fin du prompt utilisateur.
+        """
+        num_ctx = settings.OLLAMA_NUM_CTX
+        output = min(max_tokens or num_ctx // 2, num_ctx // 2)
+        budget = max(1, num_ctx - estimate_chat_tokens(system_msg, "") - output)
+        if estimate_tokens(prompt) > budget:
+            logger.warning(
+                "⚠️ Prompt '%s' trop long pour num_ctx=%d (%d tokens estimés), tronqué à %d",
+                task, num_ctx, estimate_tokens(prompt), budget,
+            )
+            chunks = split_text_to_budget(prompt, budget)
+            prompt = chunks[0] if chunks else ""
+        return prompt, output
+
+    async def generate_completion(
+        self,
+        prompt: str,
+        system_msg: str = "Tu es un assistant utile.",
+        temperature: float = 0.2,
+        task: str = "notes",
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        prompt, max_tokens = self._fit_prompt(prompt, system_msg, max_tokens, task)
+        messages = [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": prompt},
+        ]
+        parts = [p async for p in self.stream_chat(messages, temperature=temperature, max_tokens=max_tokens)]
+        return "".join(parts).strip()
+
+    async def refine_text(self, raw_text: str) -> str:
+        """Correction locale, découpée comme côté Groq pour tenir dans `num_ctx`."""
+        if not raw_text or not raw_text.strip():
+            return raw_text
+
+        # Entrée + sortie (~ même taille) + consignes doivent tenir dans num_ctx
+        chunk_budget = min(settings.LLM_REFINE_CHUNK_TOKENS, settings.OLLAMA_NUM_CTX // 3)
+        refined_parts = []
+        for separator, chunk in split_text_with_separators(raw_text, chunk_budget):
+            max_tokens = int(estimate_tokens(chunk) * REFINE_OUTPUT_RATIO) + REFINE_OUTPUT_MARGIN
+            out = await self.generate_completion(
+                chunk, system_msg=REFINE_SYSTEM_PROMPT, temperature=0.1, task="refine", max_tokens=max_tokens
+            )
+            # Morceau coupé en plein paragraphe : recollé par une espace, pas par un saut
+            refined_parts.append(separator + (out or chunk).strip())
+        return "".join(refined_parts)
 
+    async def is_available(self) -> bool:
+        """Ping léger (liste des modèles installés)."""
+        try:
+            session = await self._get_session()
+            async with session.get(f"{self.base_url}/api/tags", timeout=aiohttp.ClientTimeout(total=3)) as resp:
+                return resp.status == 200
+        except Exception:
+            return False
+
+
+ollama_client = OllamaClient()
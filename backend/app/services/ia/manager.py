@@ -1,11 +1,17 @@
 from __future__ import annotations
+from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.ia.groq_client import groq_client
+from app.services.ia.llm_dispatcher import llm_client
+from app.services.ia.router import TIER_SMART, model_router
+from app.services.ia.tokens import estimate_tokens
 from app.services.ia.prompts.manager import prompt_manager
 from app.core.constants import ContentType
 
 logger = get_logger("ia.manager")
 
+# Marge pour les consignes du gabarit de prompt (templates.py)
+_PROMPT_TEMPLATE_RESERVE = 1024
+
 class IAManager:
     async def detect_content_type(self, transcription: str) -> str:
         """Détecte la catégorie globale du contenu pour orienter le prompt."""
@@ -15,9 +21,11 @@ class IAManager:
         )
 
         try:
-            out = await groq_client.generate_completion(
+            out = await llm_client.generate_completion(
                 prompt=prompt, 
-                system_msg="Tu es un classificateur de documents rapide et précis. Réponds uniquement par le nom de la catégorie."
+                system_msg="Tu es un classificateur de documents rapide et précis. Réponds uniquement par le nom de la catégorie.",
+                task="classify",  # 🚀 Une catégorie en un mot : le modèle 8b suffit
+                max_tokens=16,
             )
             out = out.strip().lower()
             
@@ -33,12 +41,6 @@ class IAManager:
     async def generate_notes(self, transcription: str, content_type: str, visual_context: str = "") -> str:
         """Génère des notes expertes, illustrées et adaptées au domaine et au format."""
         
-        # 🛡️ Protection contre les textes trop massifs
-        max_chars = 60000 
-        if len(transcription) > max_chars:
-            logger.warning("⚠️ Transcription trop longue, tronquée")
-            transcription = transcription[:max_chars] + "... [Tronqué pour optimisation]"
-
         # 🎯 DÉFINITION DU FORMAT SELON LE TYPE (Stratégie de rédaction)
         format_logic = {
             "course": "Format PÉDAGOGIQUE : Objectifs, définitions théoriques, schémas conceptuels et résumé.",
@@ -79,6 +81,19 @@ class IAManager:
             "8. PLACEMENT DE L'ILLUSTRATION : Tu DOIS insérer au moins 3 à 5 fois la balise ` изображение ` dans le document, dès qu'une pièce technique ou une méthode est décrite.\n"
         )
 
+        # 🛡️ Protection contre les textes trop massifs : budget calculé en tokens
+        # (contexte du modèle - system prompt - contexte visuel - réserve de sortie)
+        max_output = settings.LLM_NOTES_MAX_OUTPUT_TOKENS
+        model = model_router.largest(TIER_SMART)
+        budget = (
+            model_router.input_budget(model, system_msg, max_output)
+            - 2 * estimate_tokens(visual_context or "")  # Présent dans l'enrichissement ET le template
+            - _PROMPT_TEMPLATE_RESERVE
+        )
+        if estimate_tokens(transcription) > budget:
+            logger.warning("⚠️ Transcription trop longue (%s tokens estimés), tronquée à %s", estimate_tokens(transcription), budget)
+            transcription = model_router.fit_to_budget(transcription, max(budget, 1)) + "... [Tronqué pour optimisation]"
+
         # On fusionne la transcription et le contexte visuel pour le prompt final
         enriched_transcription = f"CONTEXTE VISUEL DISPONIBLE :\n{visual_context}\n\nTRANSCRIPTION BRUTE :\n{transcription}"
 
@@ -88,10 +103,12 @@ class IAManager:
             visual_context=visual_context,
         )
 
-        return await groq_client.generate_completion(
+        return await llm_client.generate_completion(
             prompt=prompt, 
             system_msg=system_msg, 
-            temperature=0.15 
+            temperature=0.15,
+            task="notes",
+            max_tokens=max_output,
         )
 
 ia_manager = IAManager()
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Routage des appels LLM selon la taille du prompt et la difficulté de la tâche.
+
+Le routeur choisit le plus petit modèle dont le niveau de qualité (tier) et la
+fenêtre de contexte conviennent, et découpe les entrées trop longues.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.ia.tokens import (
+    estimate_chat_tokens, estimate_tokens, split_text_to_budget, split_text_with_separators,
+)
+
+logger = get_logger("ia.router")
+
+# Niveaux de qualité (plus grand = plus capable, plus lent, plus cher)
+TIER_FAST = 1
+TIER_SMART = 2
+
+# Tâches connues -> niveau minimal requis
+TASK_TIERS: Dict[str, int] = {
+    "classify": TIER_FAST,
+    "refine": TIER_FAST,
+    "notes": TIER_SMART,
+}
+
+# Ratio sortie/entrée pour une correction (le texte corrigé fait ~ la même taille)
+REFINE_OUTPUT_RATIO = 1.15
+REFINE_OUTPUT_MARGIN = 64
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    name: str
+    context_window: int
+    max_output_tokens: int
+    tier: int
+
+
+@dataclass(frozen=True)
+class RoutedChunk:
+    """Un morceau de texte prêt à être envoyé, avec son modèle et son plafond de sortie."""
+
+    text: str
+    model: ModelSpec
+    max_tokens: int
+    separator: str = ""  # Avant ce morceau au recollage (" " si coupé en plein paragraphe)
+
+
+# Catalogue Groq (limites publiées par Groq)
+GROQ_MODELS: List[ModelSpec] = [
+    ModelSpec("llama-3.1-8b-instant", context_window=131072, max_output_tokens=131072, tier=TIER_FAST),
+    ModelSpec("llama-3.3-70b-versatile", context_window=131072, max_output_tokens=32768, tier=TIER_SMART),
+]
+
+
+class ModelRouter:
+    def __init__(self, models: Sequence[ModelSpec]) -> None:
+        if not models:
+            raise ValueError("Le routeur a besoin d'au moins un modèle")
+        # Tri "du plus petit au plus gros" : tier puis taille de contexte
+        self.models = sorted(models, key=lambda m: (m.tier, m.context_window))
+
+    def get(self, name: str) -> Optional[ModelSpec]:
+        return next((m for m in self.models if m.name == name), None)
+
+    def smallest(self, tier: int = TIER_FAST) -> ModelSpec:
+        return next((m for m in self.models if m.tier >= tier), self.models[-1])
+
+    def largest(self, tier: int = TIER_FAST) -> ModelSpec:
+        eligible = [m for m in self.models if m.tier >= tier] or self.models
+        return max(eligible, key=lambda m: m.context_window)
+
+    def pick(self, task: str, prompt_tokens: int, output_tokens: int = 0) -> ModelSpec:
+        """
+        Renvoie le plus petit modèle adapté à la tâche et à la taille du prompt.
+
+        Si aucun modèle ne peut tout contenir, on renvoie celui qui a le plus grand
+        contexte : c'est à l'appelant de découper (voir `plan_refine`, `fit_to_budget`).
+        """
+        min_tier = TASK_TIERS.get(task, TIER_SMART)
+        for model in self.models:
+            if model.tier < min_tier:
+                continue
+            if output_tokens > model.max_output_tokens:
+                continue
+            if prompt_tokens + output_tokens <= model.context_window:
+                return model
+
+        fallback = self.largest(min_tier)
+        logger.warning(
+            "⚠️ Aucun modèle ne contient %s tokens (+%s en sortie) pour '%s', repli sur %s",
+            prompt_tokens, output_tokens, task, fallback.name,
+        )
+        return fallback
+
+    def input_budget(self, model: ModelSpec, system_msg: str = "", output_tokens: int = 0) -> int:
+        """Nombre de tokens disponibles pour le message utilisateur."""
+        return max(0, model.context_window - estimate_chat_tokens(system_msg, "") - output_tokens)
+
+    def fit_to_budget(self, text: str, max_tokens: int) -> str:
+        """Tronque un texte (au paragraphe/phrase près) pour tenir dans `max_tokens`."""
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        chunks = split_text_to_budget(text, max_tokens)
+        return chunks[0] if chunks else ""
+
+    def plan_refine(self, text: str, system_msg: str) -> List[RoutedChunk]:
+        """
+        Prépare la correction d'un texte : découpe en morceaux qui tiennent dans
+        le modèle choisi avec une sortie complète (plus de corrections tronquées).
+        """
+        chunk_budget = settings.LLM_REFINE_CHUNK_TOKENS
+        plan: List[RoutedChunk] = []
+
+        for separator, chunk in split_text_with_separators(text, chunk_budget):
+            input_tokens = estimate_tokens(chunk)
+            max_tokens = int(input_tokens * REFINE_OUTPUT_RATIO) + REFINE_OUTPUT_MARGIN
+            prompt_tokens = estimate_chat_tokens(system_msg, chunk)
+            model = self.pick("refine", prompt_tokens, max_tokens)
+            plan.append(RoutedChunk(
+                text=chunk, model=model, max_tokens=min(max_tokens, model.max_output_tokens), separator=separator
+            ))
+
+        return plan
+
+
+model_router = ModelRouter(GROQ_MODELS)
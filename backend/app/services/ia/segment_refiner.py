@@ -0,0 +1,173 @@
+"""
+Raffinage des transcriptions guidé par la confiance de Whisper.
+
+Whisper (verbose_json) fournit pour chaque segment `avg_logprob`,
+`no_speech_prob` et `compression_ratio`. On s'en sert pour :
+1. supprimer les hallucinations probables (silence transcrit, boucles)
+2. corriger localement les segments fiables (répétitions, ponctuation)
+3. n'envoyer au LLM que les passages douteux, regroupés en un minimum d'appels
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.ia.llm_dispatcher import llm_client
+from app.services.ia.router import REFINE_OUTPUT_MARGIN, REFINE_OUTPUT_RATIO
+from app.services.ia.tokens import estimate_tokens
+from app.services.nlp.text_cleaner import text_cleaner
+
+logger = get_logger("ia.segment_refiner")
+
+BATCH_SYSTEM_PROMPT = (
+    "Tu es un expert en transcription académique. "
+    "Chaque passage est précédé d'un repère [[n]]. Corrige les erreurs phonétiques, "
+    "la ponctuation et les répétitions de chaque passage SANS fusionner les passages. "
+    "Réponds uniquement par les passages corrigés, chacun précédé de son repère [[n]]."
+)
+
+_MARKER = re.compile(r"\[\[(\d+)\]\]")
+
+
+@dataclass
+class RefineResult:
+    text: str
+    segments: List[Dict[str, Any]]
+    dropped: int = 0
+    sent_to_llm: int = 0
+    total: int = 0
+
+
+def _field(segment: Any, name: str, default: Any = None) -> Any:
+    """Les segments Groq peuvent être des dict ou des objets."""
+    if isinstance(segment, dict):
+        return segment.get(name, default)
+    return getattr(segment, name, default)
+
+
+class SegmentRefiner:
+    def is_hallucination(self, segment: Any) -> bool:
+        """Mêmes heuristiques que Whisper : silence "transcrit" ou texte en boucle."""
+        no_speech = _field(segment, "no_speech_prob", 0.0) or 0.0
+        logprob = _field(segment, "avg_logprob", 0.0) or 0.0
+        compression = _field(segment, "compression_ratio", 0.0) or 0.0
+
+        if no_speech > settings.REFINE_NO_SPEECH_THRESHOLD and logprob < settings.REFINE_HALLUCINATION_LOGPROB:
+            return True
+        return compression > settings.REFINE_COMPRESSION_RATIO_MAX
+
+    def needs_llm(self, segment: Any) -> bool:
+        logprob = _field(segment, "avg_logprob", 0.0) or 0.0
+        return logprob < settings.REFINE_LOGPROB_THRESHOLD
+
+    async def refine(self, segments: Sequence[Any], raw_text: str = "") -> RefineResult:
+        if not segments:
+            # Pas de métadonnées de confiance : raffinage complet (ancien comportement)
+            refined = await llm_client.refine_text(raw_text) if raw_text.strip() else raw_text
+            return RefineResult(text=refined, segments=[], total=0)
+
+        kept: List[Dict[str, Any]] = []
+        texts: List[str] = []
+        doubtful: List[int] = []
+        dropped = 0
+
+        for seg in segments:
+            text = (_field(seg, "text", "") or "").strip()
+            if not text:
+                continue
+            if self.is_hallucination(seg):
+                dropped += 1
+                logger.debug("🗑️ Segment halluciné ignoré: %r", text[:80])
+                continue
+
+            seg_dict = dict(seg) if isinstance(seg, dict) else dict(vars(seg))
+            kept.append(seg_dict)
+            texts.append(text_cleaner.collapse_repetitions(text))
+            if self.needs_llm(seg):
+                doubtful.append(len(texts) - 1)
+
+        spans = self._group_spans(doubtful)
+        if spans:
+            corrected = await self._refine_spans([" ".join(texts[i] for i in span) for span in spans])
+            for span, new_text in zip(spans, corrected):
+                if new_text:
+                    # Le passage corrigé remplace le premier segment du span, les autres sont vidés
+                    texts[span[0]] = new_text
+                    for i in span[1:]:
+                        texts[i] = ""
+
+        refined = text_cleaner.fix_punctuation(" ".join(t for t in texts if t))
+        result = RefineResult(
+            text=refined,
+            segments=kept,
+            dropped=dropped,
+            sent_to_llm=len(doubtful),
+            total=len(segments),
+        )
+        logger.info(
+            "🎯 Raffinage ciblé: %d segments, %d hallucinations supprimées, %d envoyés au LLM",
+            result.total, dropped, len(doubtful),
+        )
+        return result
+
+    def _group_spans(self, indices: List[int]) -> List[List[int]]:
+        """Regroupe les segments douteux consécutifs (le LLM a besoin de contexte)."""
+        spans: List[List[int]] = []
+        for idx in indices:
+            if spans and idx == spans[-1][-1] + 1:
+                spans[-1].append(idx)
+            else:
+                spans.append([idx])
+        return spans
+
+    async def _refine_spans(self, spans: List[str]) -> List[Optional[str]]:
+        """Envoie les passages par lots numérotés ; un lot mal formé garde le texte local."""
+        results: List[Optional[str]] = [None] * len(spans)
+        budget = settings.LLM_REFINE_CHUNK_TOKENS
+
+        batch: List[int] = []
+        batch_tokens = 0
+        batches: List[List[int]] = []
+        for i, span in enumerate(spans):
+            tokens = estimate_tokens(span) + 4
+            if batch and batch_tokens + tokens > budget:
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+
+        for batch in batches:
+            prompt = "\n".join(f"[[{n}]] {spans[i]}" for n, i in enumerate(batch, start=1))
+            max_tokens = int(estimate_tokens(prompt) * REFINE_OUTPUT_RATIO) + REFINE_OUTPUT_MARGIN
+            try:
+                out = await llm_client.generate_completion(
+                    prompt,
+                    system_msg=BATCH_SYSTEM_PROMPT,
+                    temperature=0.1,
+                    task="refine",
+                    max_tokens=max_tokens,
+                )
+            except Exception as exc:
+                logger.warning("Raffinage LLM du lot ignoré (%s), correction locale conservée", exc)
+                continue
+
+            parsed = self._parse_markers(out)
+            for n, i in enumerate(batch, start=1):
+                results[i] = parsed.get(n)
+
+        return results
+
+    @staticmethod
+    def _parse_markers(output: str) -> Dict[int, str]:
+        parts = _MARKER.split(output or "")
+        # parts = [avant, n1, texte1, n2, texte2, ...]
+        return {int(parts[k]): parts[k + 1].strip() for k in range(1, len(parts) - 1, 2) if parts[k + 1].strip()}
+
+
+segment_refiner = SegmentRefiner()
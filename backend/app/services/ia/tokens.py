@@ -0,0 +1,132 @@
+"""
+Estimation locale du nombre de tokens (sans appel réseau ni tokenizer externe).
+
+L'estimation est volontairement pessimiste : mieux vaut surestimer un prompt
+de quelques pourcents que dépasser la fenêtre de contexte d'un modèle.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Final, List, Tuple
+
+# Mot (lettres/chiffres, accents inclus) ou signe de ponctuation isolé
+_TOKEN_PIECES: Final[re.Pattern[str]] = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_PARAGRAPHS: Final[re.Pattern[str]] = re.compile(r"\n\s*\n")
+_SENTENCES: Final[re.Pattern[str]] = re.compile(r"(?<=[.!?…])\s+")
+
+# Les tokenizers BPE (Llama 3) découpent en moyenne un mot français en
+# morceaux de ~4 caractères : "transcription" -> 3 tokens, "le" -> 1 token.
+_CHARS_PER_TOKEN: Final[int] = 4
+
+# Surcoût par message dans un chat (rôle, séparateurs)
+MESSAGE_OVERHEAD_TOKENS: Final[int] = 8
+
+
+def estimate_tokens(text: str) -> int:
+    """Estime le nombre de tokens d'un texte."""
+    if not text:
+        return 0
+
+    total = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isalnum() or piece[0] == "_":
+            total += math.ceil(len(piece) / _CHARS_PER_TOKEN)
+        else:
+            total += 1
+    # Les retours à la ligne sont des tokens à part entière
+    return total + text.count("\n")
+
+
+def estimate_chat_tokens(*messages: str) -> int:
+    """Estime le coût d'une liste de messages (system + user...)."""
+    return sum(estimate_tokens(m) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def split_text_to_budget(text: str, max_tokens: int) -> List[str]:
+    """
+    Découpe un texte en morceaux de `max_tokens` maximum.
+
+    On emballe d'abord des paragraphes entiers, puis des phrases, et en dernier
+    recours des mots : les coupures restent naturelles pour le LLM.
+    """
+    return [chunk for _, chunk in split_text_with_separators(text, max_tokens)]
+
+
+def split_text_with_separators(text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """
+    Comme `split_text_to_budget`, avec pour chaque morceau le séparateur qui le
+    précède : "" pour le premier, "\n\n" entre deux paragraphes, " " quand la
+    coupure tombe au milieu d'un paragraphe trop long. Recoller les sorties du
+    LLM avec ces séparateurs ne crée pas de faux saut de paragraphe.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens doit être strictement positif")
+    if not text or not text.strip():
+        return []
+    if estimate_tokens(text) <= max_tokens:
+        return [("", text)]
+
+    units: List[str] = []
+    origins: List[int] = []  # Paragraphe d'origine de chaque unité
+    for index, paragraph in enumerate(_PARAGRAPHS.split(text)):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+            origins.append(index)
+            continue
+        # Paragraphe trop long : ses phrases (ou mots) sont regroupées avec des
+        # espaces, pour ne pas créer de faux sauts de paragraphe
+        pieces: List[str] = []
+        for sentence in _SENTENCES.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+            else:
+                pieces.extend(_split_words(sentence, max_tokens))
+        packed = _pack(pieces, max_tokens, sep=" ")
+        units.extend(packed)
+        origins.extend([index] * len(packed))
+
+    chunks: List[Tuple[str, str]] = []
+    for group in _group(units, max_tokens, "\n\n"):
+        first = group[0]
+        if not chunks:
+            separator = ""
+        else:
+            separator = " " if origins[first] == origins[first - 1] else "\n\n"
+        chunks.append((separator, "\n\n".join(units[i] for i in group)))
+    return chunks
+
+
+def _split_words(text: str, max_tokens: int) -> List[str]:
+    """Découpage au mot près pour les phrases démesurées (transcriptions sans ponctuation)."""
+    return _pack(text.split(), max_tokens, sep=" ")
+
+
+def _pack(units: List[str], max_tokens: int, sep: str = "\n\n") -> List[str]:
+    return [sep.join(units[i] for i in group) for group in _group(units, max_tokens, sep)]
+
+
+def _group(units: List[str], max_tokens: int, sep: str) -> List[List[int]]:
+    """Indices des unités consécutives qui tiennent ensemble dans `max_tokens`."""
+    groups: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    sep_tokens = estimate_tokens(sep)
+
+    for index, unit in enumerate(units):
+        unit_tokens = estimate_tokens(unit)
+        extra = unit_tokens + (sep_tokens if current else 0)
+        if current and current_tokens + extra > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+            extra = unit_tokens
+        current.append(index)
+        current_tokens += extra
+
+    if current:
+        groups.append(current)
+    return groups
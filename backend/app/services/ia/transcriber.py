@@ -5,6 +5,7 @@ from typing import Any, Dict, Union
 
 from app.core.logger import get_logger
 from app.services.ia.groq_client import groq_client
+from app.services.ia.segment_refiner import segment_refiner
 
 logger = get_logger("ia.transcriber")
 
@@ -33,13 +34,18 @@ class Transcriber:
         if not raw_data.get("text"):
             return self._empty_response()
 
-        # 2. Raffinage
-        refined_text = await groq_client.refine_text(raw_data["text"])
+        # 2. Raffinage ciblé : seuls les segments peu fiables passent par le LLM
+        refined = await segment_refiner.refine(raw_data.get("segments") or [], raw_data["text"])
 
         return {
             "raw_text": raw_data["text"],
-            "refined_text": refined_text,
-            "segments": raw_data.get("segments", []),
+            "refined_text": refined.text,
+            "segments": refined.segments or raw_data.get("segments", []),
+            "refine_stats": {
+                "segments": refined.total,
+                "dropped": refined.dropped,
+                "sent_to_llm": refined.sent_to_llm,
+            },
             "language": raw_data.get("language", "fr"),
         }
 
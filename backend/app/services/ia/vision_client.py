@@ -1,15 +1,31 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import List
+from typing import List, Optional, Sequence, Union
 
+import cv2
+import numpy as np
+
+from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.media.ocr_engine import ocr_engine
+from app.services.media.ocr_engine import ImageInput, get_ocr_engine
+from app.services.media.text_detector import text_detector
+from app.services.nlp.text_condenser import text_condenser
 import asyncio
 
 
 logger = get_logger("ia.vision_client")
 
+# Chemin, frame décodée (BGR) ou JPEG encodé (keyframes gardées en mémoire)
+VisionInput = Union[ImageInput, bytes]
+
+
+def _decode(image: VisionInput) -> Optional[np.ndarray]:
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, bytes):
+        return cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return cv2.imread(str(image))
+
 
 
 class VisionClient:
@@ -19,22 +35,44 @@ class VisionClient:
     Dans cette V1, on s'appuie sur l'OCR local (Tesseract/PaddleOCR) via `services.media.ocr_engine`.
     Ce module sert de point d'extension pour brancher plus tard un modèle vision cloud (GPT-4o, LLaVA, etc.).
     """
-    async def get_visual_context(self, image_paths: List[Path]) -> str:
-        if not image_paths:
+    async def get_visual_context(self, images: Sequence[VisionInput], engine: Optional[str] = None) -> str:
+        """
+        Args:
+            images: Chemins d'images, frames déjà décodées (BGR) ou JPEG encodés, par ex.
+                les keyframes gardées en mémoire par `video_analyzer.iter_scene_keyframes`
+            engine: Moteur OCR de ce job ("tesseract" / "paddleocr", défaut: settings.OCR_ENGINE)
+        """
+        if not images:
             return ""
 
         # ✅ On délègue à un thread pour ne pas bloquer l'Event Loop
-        extracted = await asyncio.to_thread(
-            ocr_engine.extract_text_from_keyframes, 
-            image_paths
-        )
+        extracted = await asyncio.to_thread(self._extract_texts, images, engine)
         
-        lines = [t.strip() for t in extracted.values() if t and t.strip()]
-        unique_lines = list(dict.fromkeys(lines))
+        lines = [line for text in extracted if text for line in text.splitlines()]
         
-        # Sécurité : On limite à 5000 caractères de contexte visuel pour Groq
-        full_context = "\n".join(unique_lines)
-        return full_context[:5000] if len(full_context) > 5000 else full_context
+        # Doublons flous (même slide, bruit OCR) regroupés, puis lignes les plus
+        # informatives retenues dans le budget de contexte visuel pour Groq
+        return text_condenser.condense(lines, settings.VISUAL_CONTEXT_MAX_CHARS)
+
+    def _extract_texts(self, images: Sequence[VisionInput], engine: Optional[str] = None) -> List[str]:
+        ocr_engine = get_ocr_engine(engine)
+        if not settings.OCR_TEXT_DETECTION:
+            return ocr_engine.ocr_batch([_decode(image) if isinstance(image, bytes) else image for image in images])
+
+        # Pré-filtre : seules les frames contenant du texte partent à l'OCR, recadrées et binarisées.
+        # Les frames sont décodées une à une : seuls les recadrages restent en mémoire.
+        crops = []
+        for source in images:
+            image = _decode(source)
+            if image is None:
+                logger.warning(f"Image illisible ignorée: {'JPEG en mémoire' if isinstance(source, bytes) else source}")
+                continue
+            crop = text_detector.prepare(image)
+            if crop is not None:
+                crops.append(crop)
+
+        logger.info(f"🔎 Zones de texte: {len(crops)}/{len(images)} keyframes envoyées à l'OCR")
+        return ocr_engine.ocr_batch(crops)
 
 
 vision_client = VisionClient()
@@ -0,0 +1,99 @@
+"""
+Stockage adressé par contenu des images insérées dans les notes.
+
+Chaque capture est ré-encodée (largeur et poids plafonnés) puis rangée sous
+`assets/<sha256[:2]>/<sha256>.jpg` : une même image (slide répétée, vidéo
+ré-uploadée) n'est écrite qu'une fois sur disque. Le dossier d'une note
+(`notes_assets/{media_id}`) ne contient que des liens physiques vers ce stock.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, List
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.utils.file_manager import file_manager
+
+logger = get_logger("asset_store")
+
+# Paliers de qualité JPEG essayés tant que l'image dépasse le poids maximal
+_QUALITY_STEP = 10
+_MIN_QUALITY = 40
+
+
+class AssetStore:
+    def __init__(self, root: Path, max_width: int = 1280, max_bytes: int = 250_000, jpeg_quality: int = 85):
+        """
+        Args:
+            root: Dossier du stock adressé par contenu
+            max_width: Largeur maximale des images persistées (réduction sinon)
+            max_bytes: Poids cible d'une image ; la qualité JPEG baisse par paliers jusqu'à le respecter
+            jpeg_quality: Qualité JPEG de départ
+        """
+        self.root = Path(root)
+        self.max_width = max_width
+        self.max_bytes = max_bytes
+        self.jpeg_quality = jpeg_quality
+
+    def encode(self, image: np.ndarray) -> bytes:
+        """JPEG plafonné en largeur et en poids (déterministe : même image -> mêmes octets)."""
+        height, width = image.shape[:2]
+        if self.max_width and width > self.max_width:
+            scale = self.max_width / width
+            image = cv2.resize(image, (self.max_width, max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+
+        quality = self.jpeg_quality
+        while True:
+            ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+            if not ok:
+                raise ValueError("Encodage JPEG impossible")
+            if buffer.nbytes <= self.max_bytes or quality <= _MIN_QUALITY:
+                return buffer.tobytes()
+            quality = max(_MIN_QUALITY, quality - _QUALITY_STEP)
+
+    def put(self, image: np.ndarray) -> Path:
+        """Ajoute une image au stock (si absente) et renvoie son chemin."""
+        data = self.encode(image)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.root / digest[:2] / f"{digest}.jpg"
+        if path.exists():
+            return path
+
+        file_manager.write_atomic(path, data)
+        return path
+
+    @staticmethod
+    def link(asset: Path, target_dir: Path) -> Path:
+        """Lien physique de l'asset dans `target_dir` (copie si le lien est impossible, ex. autre volume)."""
+        target = Path(target_dir) / asset.name
+        if target.exists():
+            return target
+        try:
+            os.link(asset, target)
+        except OSError:
+            shutil.copyfile(asset, target)
+        return target
+
+    def persist(self, images: Iterable[np.ndarray], target_dir: Path) -> List[Path]:
+        """Persiste les images d'une note ; renvoie un chemin par image (doublons inclus)."""
+        target_dir = Path(target_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        paths = [self.link(self.put(image), target_dir) for image in images]
+        logger.info(f"🖼️ {len(paths)} captures persistées ({len(set(paths))} distinctes) dans {target_dir}")
+        return paths
+
+
+# Instance globale
+asset_store = AssetStore(
+    root=settings.ASSETS_DIR,
+    max_width=settings.ASSET_MAX_WIDTH,
+    max_bytes=settings.ASSET_MAX_BYTES,
+    jpeg_quality=settings.KEYFRAME_JPEG_QUALITY,
+)
@@ -0,0 +1,89 @@
+"""
+Dérivés d'images dimensionnés pour l'export (PDF, DOCX).
+
+Les exporteurs n'affichent une capture que sur une largeur de page fixe : y
+intégrer l'original pleine résolution alourdit le fichier sans gain visible.
+Chaque image est ramenée à la largeur affichée à la résolution cible
+(`EXPORT_IMAGE_DPI`), puis mise en cache sur disque : les exports suivants
+de la même note (ou d'une autre note partageant la capture) la réutilisent.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from pathlib import Path
+
+import cv2
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.utils.file_manager import file_manager
+
+logger = get_logger("image_derivatives")
+
+_POINTS_PER_INCH = 72
+
+
+class ImageDerivatives:
+    def __init__(self, cache_dir: Path, dpi: int = 150, jpeg_quality: int = 80):
+        """
+        Args:
+            cache_dir: Dossier des dérivés
+            dpi: Résolution visée à la taille affichée
+            jpeg_quality: Qualité JPEG des dérivés
+        """
+        self.cache_dir = Path(cache_dir)
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+
+    def target_pixels(self, width_pt: float) -> int:
+        """Largeur en pixels d'une image affichée sur `width_pt` points."""
+        return max(1, math.ceil(width_pt / _POINTS_PER_INCH * self.dpi))
+
+    def _cache_path(self, source: Path, target_px: int) -> Path:
+        stat = source.stat()
+        key = f"{source.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{target_px}|{self.jpeg_quality}"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.jpg"
+
+    def for_width(self, source: Path, width_pt: float) -> Path:
+        """
+        Image à intégrer pour un affichage sur `width_pt` points.
+
+        Renvoie l'original s'il n'est pas plus large que nécessaire, ou si le
+        dérivé ne peut pas être produit (l'export n'échoue pas pour autant).
+        """
+        source = Path(source)
+        target_px = self.target_pixels(width_pt)
+        try:
+            path = self._cache_path(source, target_px)
+            if path.exists():
+                return path
+
+            image = cv2.imread(str(source), cv2.IMREAD_COLOR)
+            if image is None:
+                return source
+            height, width = image.shape[:2]
+            if width <= target_px:
+                return source
+
+            scaled = cv2.resize(image, (target_px, max(1, round(height * target_px / width))), interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode(".jpg", scaled, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+            if not ok:
+                return source
+
+            # Plusieurs exports peuvent produire le même dérivé en parallèle
+            file_manager.write_atomic(path, buffer.tobytes())
+            logger.debug(f"🖼️ Dérivé {width}px -> {target_px}px : {source.name}")
+            return path
+        except OSError as e:
+            logger.warning(f"Dérivé d'image impossible pour {source} : {e}")
+            return source
+
+
+# Instance globale
+image_derivatives = ImageDerivatives(
+    cache_dir=settings.CACHE_DIR / "image_derivatives",
+    dpi=settings.EXPORT_IMAGE_DPI,
+    jpeg_quality=settings.EXPORT_IMAGE_QUALITY,
+)
@@ -0,0 +1,62 @@
+"""
+Hachage perceptuel d'images (dHash) pour détecter les images quasi identiques.
+
+Deux images visuellement proches ont des hash à faible distance de Hamming,
+même après recompression JPEG, léger bruit ou petit élément animé.
+"""
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+HASH_BITS = 64
+
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def dhash(image: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Difference hash : on réduit l'image à (hash_size+1) x hash_size en niveaux de gris
+    et chaque bit indique si un pixel est plus clair que son voisin de droite.
+    """
+    small = cv2.resize(to_gray(image), (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def thumbnail(image: np.ndarray, size: tuple[int, int] = (64, 36)) -> np.ndarray:
+    """Vignette en niveaux de gris pour un différentiel de frames peu coûteux."""
+    return cv2.resize(to_gray(image), size, interpolation=cv2.INTER_AREA)
+
+
+def mean_abs_diff(a: np.ndarray, b: np.ndarray) -> float:
+    """Écart moyen (0-255) entre deux vignettes de même taille."""
+    return float(cv2.absdiff(a, b).mean())
+
+
+def ink_hash(image: np.ndarray, size: tuple[int, int] = (64, 32)) -> int:
+    """
+    Hash du "masque d'encre" d'une image de texte (largeur x hauteur bits).
+
+    L'image est binarisée (Otsu), recadrée sur l'encre puis réduite : chaque bit
+    indique si la cellule est majoritairement encrée. Contrairement au dHash, les
+    grands aplats de fond ne portent aucune information ni aucun bruit.
+    """
+    gray = to_gray(image)
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    if cv2.countNonZero(ink) > ink.size / 2:  # texte clair sur fond sombre
+        ink = cv2.bitwise_not(ink)
+    points = cv2.findNonZero(ink)
+    if points is None:
+        return 0
+    x, y, w, h = cv2.boundingRect(points)
+    small = cv2.resize(ink[y:y + h, x:x + w], size, interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small.flatten() > 127).tobytes(), "big")
@@ -0,0 +1,210 @@
+"""
+Cache des résultats OCR indexé par hash perceptuel.
+
+Deux slides quasi identiques (même slide re-capturée, carton de titre répété,
+même support de cours ré-uploadé) ont des hash perceptuels proches : on réutilise
+le texte au lieu de relancer l'OCR.
+
+- Clé : `ink_hash` 64x32 (2048 bits) de l'image envoyée à l'OCR + langue + version du moteur
+- Correspondance : distance de Hamming <= `max_distance` (défaut 0 : hash identique).
+  Mesuré sur des slides 720p : bruit de capture 0-6 bits, JPEG q60 ~8 bits,
+  mot ou ligne modifiés > 100 bits. Mais un seul chiffre modifié ne change que 1-7 bits :
+  aucun hash perceptuel ne le distingue du bruit, et un texte périmé serait réutilisé
+  (slide d'exercice 1 → 7). Une tolérance (ex. 8) n'est à activer que si des textes
+  légèrement faux sont acceptables.
+- Niveau 1 : LRU en mémoire (recherche exhaustive, quelques milliers d'entrées)
+- Niveau 2 : SQLite sur disque, partagé entre process et entre uploads ; les lignes
+  sont indexées par nombre de bits à 1 : deux hash à distance d ont des popcounts
+  à au plus d d'écart, seule cette plage est comparée. Chaque ligne garde sa date
+  de dernière utilisation : au-delà de `max_disk_entries`, les plus anciennes sont
+  supprimées. Les dates des hits sont écrites par paquets (`flush`, appelé en fin de
+  lot OCR) et l'éviction n'a lieu que toutes les `evict_every` insertions : un hit ne
+  coûte pas de commit, une insertion pas de tri de la table.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.media.image_hash import hamming, ink_hash
+
+logger = get_logger("ocr_cache")
+
+# Dates de hits en attente au-delà desquelles elles sont écrites sans attendre `flush`
+TOUCH_FLUSH_SIZE = 256
+
+
+def ocr_hash(image: np.ndarray) -> int:
+    return ink_hash(image)
+
+
+class OCRCache:
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        max_entries: int = 2048,
+        max_distance: int = 0,
+        max_disk_entries: int = 100_000,
+        evict_every: int = 256,
+    ):
+        """
+        Args:
+            db_path: Fichier SQLite du niveau disque (None = mémoire seule)
+            max_entries: Taille du LRU en mémoire
+            max_distance: Distance de Hamming maximale (sur 2048 bits) pour un "hit"
+            max_disk_entries: Nombre maximal de lignes du niveau disque (dépassé
+                d'au plus `evict_every` lignes entre deux évictions)
+            evict_every: Nombre d'insertions entre deux évictions LRU du niveau disque
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_distance = max_distance
+        self.evict_every = max(1, evict_every)
+        self._memory: "OrderedDict[Tuple[str, str, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid = 0
+        self._touched: Dict[Tuple[str, str, str], float] = {}
+        self._inserts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, image_hash: int, lang: str, engine: str) -> Optional[str]:
+        with self._lock:
+            found = self._get_memory(image_hash, lang, engine)
+            if found is None:
+                found = self._get_disk(image_hash, lang, engine)
+                if found is not None:
+                    self._put_memory((lang, engine, image_hash), found[1])
+            if found is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[(lang, engine, format(found[0], "x"))] = time.time()
+            if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                self._flush()
+            return found[1]
+
+    def put(self, image_hash: int, lang: str, engine: str, text: str) -> None:
+        with self._lock:
+            self._put_memory((lang, engine, image_hash), text)
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (lang, engine, format(image_hash, "x"), image_hash.bit_count(), text, time.time()),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Cache OCR disque indisponible: {e}")
+                return
+            self._inserts += 1
+            self._flush()
+
+    def flush(self) -> None:
+        """Écrit les dates de hits en attente (fin d'un lot OCR)."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Dates de hits, éviction LRU si due, puis un seul commit."""
+        touched, self._touched = self._touched, {}
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            if touched:
+                conn.executemany(
+                    "UPDATE ocr_cache SET used = ? WHERE lang = ? AND engine = ? AND hash = ?",
+                    [(used, *key) for key, used in touched.items()],
+                )
+            # Éviction LRU : seules les `max_disk_entries` lignes les plus récemment utilisées restent
+            if self._inserts >= self.evict_every:
+                self._inserts = 0
+                conn.execute(
+                    "DELETE FROM ocr_cache WHERE rowid IN "
+                    "(SELECT rowid FROM ocr_cache ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Cache OCR disque indisponible: {e}")
+
+    def _get_memory(self, image_hash: int, lang: str, engine: str) -> Optional[Tuple[int, str]]:
+        key = (lang, engine, image_hash)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return image_hash, self._memory[key]
+        if self.max_distance == 0:
+            return None
+        for (k_lang, k_engine, k_hash), text in reversed(self._memory.items()):
+            if k_lang == lang and k_engine == engine and hamming(k_hash, image_hash) <= self.max_distance:
+                self._memory.move_to_end((k_lang, k_engine, k_hash))
+                return k_hash, text
+        return None
+
+    def _put_memory(self, key: Tuple[str, str, int], text: str) -> None:
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_disk(self, image_hash: int, lang: str, engine: str) -> Optional[Tuple[int, str]]:
+        conn = self._connection()
+        if conn is None:
+            return None
+        ink = image_hash.bit_count()
+        try:
+            rows = conn.execute(
+                "SELECT hash, text FROM ocr_cache WHERE lang = ? AND engine = ? AND ink BETWEEN ? AND ?",
+                (lang, engine, ink - self.max_distance, ink + self.max_distance),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Cache OCR disque indisponible: {e}")
+            return None
+        best = min(((hamming(int(h, 16), image_hash), int(h, 16), text) for h, text in rows), default=None)
+        if best is not None and best[0] <= self.max_distance:
+            return best[1], best[2]
+        return None
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self.db_path is None:
+            return None
+        # Une connexion SQLite ne survit pas à un fork : on la recrée par process
+        if self._conn is None or self._conn_pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache (lang TEXT, engine TEXT, hash TEXT, ink INTEGER, text TEXT, "
+                "used REAL NOT NULL DEFAULT 0, PRIMARY KEY (lang, engine, hash))"
+            )
+            # Cache créé avant l'éviction LRU : ses lignes seront les premières évincées
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(ocr_cache)")}
+            if "used" not in columns:
+                conn.execute("ALTER TABLE ocr_cache ADD COLUMN used REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS ocr_cache_ink ON ocr_cache (lang, engine, ink)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ocr_cache_used ON ocr_cache (used)")
+            conn.commit()
+            self._conn, self._conn_pid = conn, os.getpid()
+        return self._conn
+
+
+# Instance globale (niveau disque partagé par tous les workers)
+ocr_cache = OCRCache(
+    db_path=settings.CACHE_DIR / "ocr.sqlite3",
+    max_entries=settings.OCR_CACHE_SIZE,
+    max_distance=settings.OCR_CACHE_MAX_DISTANCE,
+    max_disk_entries=settings.OCR_CACHE_DISK_SIZE,
+)
@@ -3,22 +3,188 @@ Service OCR - Extraction de texte depuis les images
 """
 from __future__ import annotations
 
+import importlib.metadata
+import importlib.util
+import math
+import os
+import threading
+import time
+from concurrent.futures import wait
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import cv2
+import numpy as np
 import pytesseract
 from PIL import Image
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.media.image_hash import hamming
+from app.services.media.ocr_cache import ocr_cache, ocr_hash
+from app.utils.process_pool import LazyProcessPool
 
 # Logger module
 logger = get_logger("ocr_engine")
 
 # Optionnel: Support pour PaddleOCR si disponible
+# (import de paddle très lourd : seulement détecté ici, importé au premier usage)
+PADDLEOCR_AVAILABLE = importlib.util.find_spec("paddleocr") is not None
+if not PADDLEOCR_AVAILABLE:
+    logger.warning("PaddleOCR non disponible, utilisation de Tesseract uniquement")
+
+OCR_ENGINES = ("tesseract", "paddleocr")
+
+# Optionnel: API Tesseract en mémoire (évite un process + chargement du modèle par image)
 try:
-    from paddleocr import PaddleOCR
-    PADDLEOCR_AVAILABLE = True
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
 except ImportError:
-    PADDLEOCR_AVAILABLE = False
-    logger.warning("PaddleOCR non disponible, utilisation de Tesseract uniquement")
+    TESSEROCR_AVAILABLE = False
+    logger.info("tesserocr non disponible, Tesseract lancé via pytesseract (un process par image)")
+
+# Une image peut être un chemin ou une frame déjà décodée (BGR ou niveaux de gris)
+ImageInput = Union[str, Path, np.ndarray]
+
+# APIs Tesseract chargées dans ce process, par langue ; une API n'est pas thread-safe,
+# chaque appel en emprunte une libre (ou en crée une) puis la rend.
+_tess_apis: Dict[str, List["tesserocr.PyTessBaseAPI"]] = {}
+_tess_lock = threading.Lock()
+
+
+@contextmanager
+def _tess_api(lang: str) -> Iterator["tesserocr.PyTessBaseAPI"]:
+    with _tess_lock:
+        free = _tess_apis.setdefault(lang, [])
+        api = free.pop() if free else None
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang=lang)
+    try:
+        yield api
+    finally:
+        api.Clear()
+        with _tess_lock:
+            _tess_apis[lang].append(api)
+
+
+# Modèle PaddleOCR unique par process (plusieurs centaines de Mo, plusieurs secondes à charger)
+_paddle_model = None
+_paddle_pid = 0
+_paddle_lock = threading.Lock()
+
+
+def _get_paddle_model():
+    global _paddle_model, _paddle_pid
+    with _paddle_lock:
+        # Un modèle hérité par fork n'est pas réutilisable : on le recharge dans ce process
+        if _paddle_model is None or _paddle_pid != os.getpid():
+            from paddleocr import PaddleOCR
+
+            started = time.perf_counter()
+            # Les lots sont empilés verticalement (planches hautes) : on borne le petit côté
+            # de l'image et non le grand, sinon la détection réduirait le texte.
+            _paddle_model = PaddleOCR(
+                use_angle_cls=True, lang="fr", show_log=False, det_limit_type="min", det_limit_side_len=736
+            )
+            _paddle_pid = os.getpid()
+            logger.info(f"🔥 PaddleOCR chargé en {time.perf_counter() - started:.2f}s")
+        return _paddle_model
+
+
+def warm_up_ocr(lang: str = "fra+eng", engine: Optional[str] = None) -> None:
+    """
+    Charge le modèle OCR dans ce process (init worker Celery / pool OCR) pour
+    qu'aucune tâche ne paie ce chargement en cours de traitement.
+    """
+    engine = engine or settings.OCR_ENGINE
+    if engine == "paddleocr" and PADDLEOCR_AVAILABLE:
+        _get_paddle_model()
+        return
+    if not TESSEROCR_AVAILABLE:
+        return
+    started = time.perf_counter()
+    with _tess_api(lang):
+        pass
+    logger.info(f"🔥 Tesseract ({lang}) chargé en {time.perf_counter() - started:.2f}s")
+
+
+def _init_pool_process(lang: str) -> None:
+    # Les APIs héritées du parent par fork ne doivent pas être partagées
+    _tess_apis.clear()
+    warm_up_ocr(lang, engine="tesseract")
+
+
+def _to_pil(image: ImageInput) -> Image.Image:
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return Image.fromarray(image)
+    with Image.open(image) as opened:
+        opened.load()
+        return opened
+
+
+def _describe(image: ImageInput) -> str:
+    if isinstance(image, np.ndarray):
+        return f"frame {image.shape[1]}x{image.shape[0]}"
+    return str(image)
+
+
+def _join_confident_words(words: Iterator[Tuple[Tuple[int, ...], str, float]], min_confidence: float) -> str:
+    """Reconstruit le texte ligne par ligne à partir de (clé de ligne, mot, confiance 0-100)."""
+    lines: Dict[Tuple[int, ...], List[str]] = {}
+    for line_key, word, confidence in words:
+        word = word.strip()
+        if word and confidence >= min_confidence:
+            lines.setdefault(line_key, []).append(word)
+    return "\n".join(" ".join(line) for line in lines.values()).strip()
+
+
+def _tesserocr_words(api) -> Iterator[Tuple[Tuple[int, ...], str, float]]:
+    level = tesserocr.RIL.WORD
+    line = 0
+    for word in tesserocr.iterate_level(api.GetIterator(), level):
+        if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+            line += 1
+        yield (line,), word.GetUTF8Text(level) or "", word.Confidence(level)
+
+
+def _pytesseract_words(data: dict) -> Iterator[Tuple[Tuple[int, ...], str, float]]:
+    for i, word in enumerate(data["text"]):
+        key = (data["page_num"][i], data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        yield key, word, float(data["conf"][i])
+
+
+def _tesseract_worker(image: ImageInput, lang: str, timeout: float, min_confidence: float = 0) -> str:
+    """
+    OCR d'une image dans un process du pool (fonction module : picklable).
+    
+    Avec `min_confidence` > 0, les mots dont la confiance Tesseract (0-100) est
+    inférieure sont écartés : bruit de fond, logos, texte flou.
+    """
+    try:
+        pil_image = _to_pil(image)
+        if TESSEROCR_AVAILABLE:
+            with _tess_api(lang) as api:
+                api.SetImage(pil_image)
+                if not api.Recognize(timeout=int(timeout * 1000)):
+                    raise RuntimeError("Tesseract timeout")
+                if min_confidence > 0:
+                    return _join_confident_words(_tesserocr_words(api), min_confidence)
+                return api.GetUTF8Text().strip()
+        if min_confidence > 0:
+            data = pytesseract.image_to_data(
+                pil_image, lang=lang, timeout=timeout, output_type=pytesseract.Output.DICT
+            )
+            return _join_confident_words(_pytesseract_words(data), min_confidence)
+        return pytesseract.image_to_string(pil_image, lang=lang, timeout=timeout).strip()
+    except RuntimeError as e:
+        # pytesseract tue le process tesseract et lève RuntimeError au timeout
+        logger.warning(f"⏱️ OCR abandonné ({_describe(image)}): {e}")
+        return ""
+    except Exception as e:
+        logger.error(f"❌ Erreur Tesseract ({_describe(image)}): {e}")
+        return ""
+
 
 class OCREngine:
     """Moteur OCR pour extraire le texte des images"""
@@ -30,67 +196,240 @@ class OCREngine:
         """
         self.engine = engine
         self.logger = logger
+        self._pool = LazyProcessPool("OCR", initializer=_init_pool_process)
+        self._engine_version: Optional[str] = None
         
         if engine == "paddleocr" and not PADDLEOCR_AVAILABLE:
             self.logger.warning("PaddleOCR non disponible, basculement vers Tesseract")
             self.engine = "tesseract"
-        
-        if engine == "paddleocr" and PADDLEOCR_AVAILABLE:
-            self.paddle_ocr = PaddleOCR(use_angle_cls=True, lang='fr')
     
-    def extract_text(self, image_path: str | Path, lang: str = "fra+eng") -> str:
+    @property
+    def paddle_ocr(self):
+        """Modèle PaddleOCR partagé du process (chargé au premier accès, ou par warm_up_ocr)."""
+        return _get_paddle_model()
+    
+    def extract_text(self, image_path: ImageInput, lang: str = "fra+eng") -> str:
         """
         Extrait le texte d'une image
         
         Args:
-            image_path: Chemin vers l'image
+            image_path: Chemin vers l'image, ou frame NumPy déjà décodée (BGR)
             lang: Langue(s) pour Tesseract (ex: "fra+eng")
         
         Returns:
             Texte extrait
         """
-        image_path_obj = Path(image_path)
-        if not image_path_obj.exists():
-            raise FileNotFoundError(f"Image non trouvée: {image_path}")
+        if not isinstance(image_path, np.ndarray):
+            image_path_obj = Path(image_path)
+            if not image_path_obj.exists():
+                raise FileNotFoundError(f"Image non trouvée: {image_path}")
+            image_path = str(image_path_obj)
         
         if self.engine == "tesseract":
-            return self._extract_with_tesseract(str(image_path_obj), lang)
+            return self._extract_with_tesseract(image_path, lang)
         elif self.engine == "paddleocr":
-            return self._extract_with_paddleocr(str(image_path_obj))
+            return self._extract_with_paddleocr(image_path)
         else:
             raise ValueError(f"Engine OCR inconnu: {self.engine}")
     
-    def _extract_with_tesseract(self, image_path: str, lang: str) -> str:
-        """Extraction avec Tesseract"""
-        try:
-            image = Image.open(image_path)
-            text = pytesseract.image_to_string(image, lang=lang)
-            self.logger.info(f"📝 Texte extrait avec Tesseract: {len(text)} caractères")
-            return text.strip()
-        except Exception as e:
-            self.logger.error(f"❌ Erreur Tesseract: {e}")
-            return ""
+    def _extract_with_tesseract(self, image: ImageInput, lang: str) -> str:
+        """Extraction avec Tesseract (API en mémoire si tesserocr est installé)"""
+        text = _tesseract_worker(image, lang, settings.OCR_TIMEOUT_SECONDS, settings.OCR_MIN_CONFIDENCE)
+        self.logger.info(f"📝 Texte extrait avec Tesseract: {len(text)} caractères")
+        return text
     
-    def _extract_with_paddleocr(self, image_path: str) -> str:
+    def _extract_with_paddleocr(self, image: ImageInput) -> str:
         """Extraction avec PaddleOCR"""
         if not PADDLEOCR_AVAILABLE:
             return ""
         
+        text = self._paddle_batch([image])[0]
+        self.logger.info(f"📝 Texte extrait avec PaddleOCR: {len(text)} caractères")
+        return text
+    
+    def _paddle_batch(self, images: Sequence[ImageInput], gap: int = 32) -> List[str]:
+        """
+        Un seul appel PaddleOCR pour plusieurs images : elles sont empilées sur une
+        planche blanche, puis chaque ligne détectée est rendue à l'image qui contient
+        son centre.
+        """
+        frames = []
+        for image in images:
+            frame = image if isinstance(image, np.ndarray) else cv2.imread(str(image))
+            if frame is not None and frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            frames.append(frame)
+        
+        valid = [f for f in frames if f is not None]
+        if not valid:
+            return [""] * len(images)
+        
+        width = max(f.shape[1] for f in valid)
+        height = sum(f.shape[0] for f in valid) + gap * (len(valid) - 1)
+        board = np.full((height, width, 3), 255, dtype=np.uint8)
+        spans: List[Tuple[int, int, int]] = []  # (y début, y fin, index de l'image)
+        y = 0
+        for index, frame in enumerate(frames):
+            if frame is None:
+                continue
+            h, w = frame.shape[:2]
+            board[y:y + h, :w] = frame
+            spans.append((y, y + h, index))
+            y += h + gap
+        
+        lines: List[List[str]] = [[] for _ in images]
         try:
-            result = self.paddle_ocr.ocr(image_path, cls=True)
-            text_lines = []
-            
-            if result and result[0]:
-                for line in result[0]:
-                    if line and len(line) > 1:
-                        text_lines.append(line[1][0])
-            
-            text = "\n".join(text_lines)
-            self.logger.info(f"📝 Texte extrait avec PaddleOCR: {len(text)} caractères")
-            return text.strip()
+            result = self.paddle_ocr.ocr(board, cls=True)
         except Exception as e:
             self.logger.error(f"❌ Erreur PaddleOCR: {e}")
-            return ""
+            return [""] * len(images)
+        
+        min_score = settings.OCR_MIN_CONFIDENCE / 100
+        for line in (result[0] if result and result[0] else []):
+            if not line or len(line) < 2 or line[1][1] < min_score:
+                continue
+            center_y = sum(point[1] for point in line[0]) / len(line[0])
+            for y0, y1, index in spans:
+                if y0 <= center_y < y1:
+                    lines[index].append(line[1][0])
+                    break
+        return ["\n".join(text).strip() for text in lines]
+    
+    def ocr_batch(
+        self,
+        image_paths: Sequence[ImageInput],
+        lang: str = "fra+eng",
+        timeout: Optional[float] = None,
+    ) -> List[str]:
+        """
+        OCR parallèle d'un lot d'images sur un pool de process borné au nombre de cœurs
+        
+        L'ordre des résultats suit celui des entrées ; une image illisible, absente
+        ou qui dépasse `timeout` secondes donne une chaîne vide.
+        
+        Args:
+            image_paths: Liste des chemins d'images ou de frames NumPy
+            lang: Langue(s) pour Tesseract
+            timeout: Timeout par image (défaut: settings.OCR_TIMEOUT_SECONDS)
+        
+        Returns:
+            Liste des textes extraits, dans l'ordre des images
+        """
+        if not image_paths:
+            return []
+        
+        timeout = timeout or settings.OCR_TIMEOUT_SECONDS
+        results = [""] * len(image_paths)
+        started = time.perf_counter()
+        
+        cache = ocr_cache if settings.OCR_CACHE_ENABLED else None
+        # Le seuil de confiance change le texte produit : il fait partie de la clé
+        engine_key = f"{self.engine_version()}/conf{settings.OCR_MIN_CONFIDENCE:g}" if cache else ""
+        hashes: Dict[int, int] = {}
+        duplicates: Dict[int, int] = {}  # index -> index déjà envoyé à l'OCR dans ce lot
+        to_run: List[int] = []
+        
+        for index, image in enumerate(image_paths):
+            if not isinstance(image, np.ndarray) and not Path(image).exists():
+                self.logger.error(f"❌ Image non trouvée: {image}")
+                continue
+            if cache is not None:
+                image_hash = self._hash(image)
+                if image_hash is not None:
+                    cached = cache.get(image_hash, lang, engine_key)
+                    if cached is not None:
+                        results[index] = cached
+                        continue
+                    # Même règle que le cache : hash identique, sauf tolérance explicite
+                    twin = next(
+                        (j for j in to_run if j in hashes and hamming(hashes[j], image_hash) <= cache.max_distance),
+                        None,
+                    )
+                    hashes[index] = image_hash
+                    if twin is not None:
+                        duplicates[index] = twin
+                        continue
+            to_run.append(index)
+        
+        for index, text in self._run_batch(image_paths, to_run, lang, timeout).items():
+            results[index] = text
+            # Pas de mise en cache des échecs/timeouts (texte vide)
+            if cache is not None and text and index in hashes:
+                cache.put(hashes[index], lang, engine_key, text)
+        for index, twin in duplicates.items():
+            results[index] = results[twin]
+        if cache is not None:
+            cache.flush()
+        
+        elapsed = time.perf_counter() - started
+        reused = len(image_paths) - len(to_run)
+        self.logger.info(
+            f"📝 OCR lot: {len(image_paths)} images en {elapsed:.2f}s "
+            f"({len(image_paths) / elapsed:.1f} img/s, {len(to_run)} OCR, {reused} depuis le cache/doublons)"
+        )
+        return results
+    
+    def _run_batch(
+        self, images: Sequence[ImageInput], indices: List[int], lang: str, timeout: float
+    ) -> Dict[int, str]:
+        """OCR effectif des images `indices` ; renvoie {index: texte}."""
+        if not indices:
+            return {}
+        
+        if self.engine != "tesseract":
+            # PaddleOCR garde son modèle en mémoire dans ce process : pas de pool,
+            # mais plusieurs images par appel (PADDLE_OCR_BATCH_SIZE)
+            batch_size = max(1, settings.PADDLE_OCR_BATCH_SIZE)
+            texts = {}
+            for start in range(0, len(indices), batch_size):
+                chunk = indices[start:start + batch_size]
+                texts.update(zip(chunk, self._paddle_batch([images[i] for i in chunk])))
+            return texts
+        
+        # Chaque process charge son modèle Tesseract une fois, au démarrage
+        pool = self._pool.get(settings.OCR_WORKERS, initargs=(lang,))
+        futures = {}
+        for index in indices:
+            image = images[index]
+            if not isinstance(image, np.ndarray):
+                image = str(image)
+            futures[pool.submit(_tesseract_worker, image, lang, timeout, settings.OCR_MIN_CONFIDENCE)] = index
+        
+        texts: Dict[int, str] = {}
+        # Filet de sécurité si un process reste bloqué malgré le timeout tesseract
+        waves = math.ceil(len(futures) / self._pool.size)
+        done, not_done = wait(futures, timeout=waves * timeout + 5)
+        for future in done:
+            try:
+                texts[futures[future]] = future.result()
+            except Exception as e:
+                self.logger.error(f"❌ Erreur OCR sur {_describe(images[futures[future]])}: {e}")
+        for future in not_done:
+            future.cancel()
+            self.logger.warning(f"⏱️ OCR non terminé à temps: {_describe(images[futures[future]])}")
+        return texts
+    
+    @staticmethod
+    def _hash(image: ImageInput) -> Optional[int]:
+        if not isinstance(image, np.ndarray):
+            image = cv2.imread(str(image), cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                return None
+        return ocr_hash(image)
+    
+    def engine_version(self) -> str:
+        """Moteur + version (clé du cache : une mise à jour de Tesseract invalide les résultats)."""
+        if self._engine_version is None:
+            try:
+                if self.engine == "paddleocr":
+                    self._engine_version = f"paddleocr-{importlib.metadata.version('paddleocr')}"
+                elif TESSEROCR_AVAILABLE:
+                    self._engine_version = f"tesseract-{tesserocr.tesseract_version().split()[1]}"
+                else:
+                    self._engine_version = f"tesseract-{pytesseract.get_tesseract_version()}"
+            except Exception:
+                self._engine_version = self.engine
+        return self._engine_version
     
     def extract_text_batch(self, image_paths: List[str], lang: str = "fra+eng") -> List[str]:
         """
@@ -103,16 +442,10 @@ class OCREngine:
         Returns:
             Liste des textes extraits
         """
-        results = []
-        for image_path in image_paths:
-            try:
-                text = self.extract_text(image_path, lang)
-                results.append(text)
-            except Exception as e:
-                self.logger.error(f"❌ Erreur lors de l'extraction de {image_path}: {e}")
-                results.append("")
-        
-        return results
+        return self.ocr_batch(image_paths, lang)
+    
+    def close(self) -> None:
+        self._pool.close()
     
     def extract_text_from_keyframes(
         self,
@@ -129,13 +462,26 @@ class OCREngine:
         Returns:
             Dictionnaire {chemin_image: texte_extrait}
         """
-        results = {}
-        for keyframe_path in keyframe_paths:
-            text = self.extract_text(keyframe_path, lang)
-            if text:
-                results[str(keyframe_path)] = text
-        
-        return results
+        texts = self.ocr_batch(keyframe_paths, lang)
+        return {str(path): text for path, text in zip(keyframe_paths, texts) if text}
+
+# Moteurs par process, créés à la première demande (aucun modèle chargé à l'import)
+_engines: Dict[str, OCREngine] = {}
+
+
+def get_ocr_engine(name: Optional[str] = None) -> OCREngine:
+    """
+    Args:
+        name: "tesseract" ou "paddleocr" (défaut: settings.OCR_ENGINE)
+    """
+    name = (name or settings.OCR_ENGINE).lower()
+    if name not in OCR_ENGINES:
+        raise ValueError(f"Engine OCR inconnu: {name}")
+    if name not in _engines:
+        _engines[name] = OCREngine(engine=name)
+    return _engines[name]
+
 
-# Instance globale (par défaut Tesseract)
-ocr_engine = OCREngine(engine="tesseract")
+def close_ocr_engines() -> None:
+    for engine in _engines.values():
+        engine.close()
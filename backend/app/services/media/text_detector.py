@@ -0,0 +1,115 @@
+"""
+Pré-filtre OCR : détection rapide des zones de texte (morphologie OpenCV).
+
+Une keyframe sans texte (visage de l'orateur, tableau filmé de loin) est écartée
+avant Tesseract ; les autres sont recadrées sur leurs zones de texte et binarisées.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.logger import get_logger
+
+logger = get_logger("text_detector")
+
+Box = Tuple[int, int, int, int]  # x, y, largeur, hauteur
+
+
+@dataclass(frozen=True)
+class TextDetection:
+    boxes: List[Box]
+    text_ratio: float  # Part de l'image couverte par des zones de texte
+
+    @property
+    def has_text(self) -> bool:
+        return bool(self.boxes)
+
+
+class TextDetector:
+    """
+    Le texte imprimé produit des gradients forts et serrés, alignés horizontalement :
+    gradient morphologique -> seuil d'Otsu -> fermeture horizontale qui soude les
+    lettres en lignes -> contours filtrés par taille, forme et densité.
+    """
+
+    def __init__(
+        self,
+        work_width: int = 960,
+        min_fill_ratio: float = 0.45,
+        min_text_ratio: float = 0.002,
+        padding: int = 8,
+    ):
+        """
+        Args:
+            work_width: Largeur de travail de la détection (l'image est réduite)
+            min_fill_ratio: Densité minimale de la ligne soudée dans sa boîte (texte = bloc plein)
+            min_text_ratio: Surface de texte minimale (part de l'image) pour garder la frame
+            padding: Marge (pixels, image d'origine) autour du recadrage
+        """
+        self.work_width = work_width
+        self.min_fill_ratio = min_fill_ratio
+        self.min_text_ratio = min_text_ratio
+        self.padding = padding
+        self._gradient_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1))
+
+    def detect(self, image: np.ndarray) -> TextDetection:
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        scale = min(1.0, self.work_width / gray.shape[1])
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, self._gradient_kernel)
+        _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        joined = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self._line_kernel)
+        contours, _ = cv2.findContours(joined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        height, width = gray.shape
+        boxes: List[Box] = []
+        text_area = 0
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            # Une ligne de texte : plus large que haute, ni un point ni un bloc entier
+            if h < 6 or w < 12 or w < 1.2 * h or h > height * 0.25:
+                continue
+            fill = cv2.countNonZero(joined[y:y + h, x:x + w]) / float(w * h)
+            if fill < self.min_fill_ratio:
+                continue
+            text_area += w * h
+            boxes.append((int(x / scale), int(y / scale), int(w / scale), int(h / scale)))
+
+        text_ratio = text_area / float(width * height)
+        if text_ratio < self.min_text_ratio:
+            boxes = []
+        return TextDetection(boxes=boxes, text_ratio=text_ratio)
+
+    def prepare(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Renvoie l'image prête pour l'OCR (recadrée sur le texte, binarisée),
+        ou None si aucune zone de texte n'est détectée.
+        """
+        detection = self.detect(image)
+        if not detection.has_text:
+            return None
+
+        x0 = min(x for x, _, _, _ in detection.boxes)
+        y0 = min(y for _, y, _, _ in detection.boxes)
+        x1 = max(x + w for x, _, w, _ in detection.boxes)
+        y1 = max(y + h for _, y, _, h in detection.boxes)
+        p = self.padding
+        crop = image[max(0, y0 - p):y1 + p, max(0, x0 - p):x1 + p]
+
+        gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        # Tesseract attend du texte sombre sur fond clair (slides en mode sombre)
+        if cv2.countNonZero(binary) < binary.size / 2:
+            binary = cv2.bitwise_not(binary)
+        return binary
+
+
+# Instance globale
+text_detector = TextDetector()
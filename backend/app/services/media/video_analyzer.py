@@ -3,10 +3,40 @@ Service d'analyse vidéo - Extraction de keyframes (images clés)
 """
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 import cv2
+import numpy as np
 from app.core.logger import get_logger
+from app.services.media.image_hash import dhash, hamming, mean_abs_diff, thumbnail
+
+# Au-delà de cet écart (en frames), un seek coûte moins cher que des grab() successifs
+SEEK_MIN_FRAME_INTERVAL = 300
+
+
+@dataclass(frozen=True)
+class Keyframe:
+    """
+    Frame retenue, gardée en mémoire jusqu'à ce qu'on sache si elle est utilisée.
+    
+    Stockée en JPEG (~100 Ko) plutôt qu'en BGR brut (~2,7 Mo en 1280x720) : une
+    longue vidéo à slides donne des centaines de keyframes.
+    """
+    index: int
+    frame_number: int
+    timestamp: float
+    jpeg: bytes
+
+    @property
+    def image(self) -> np.ndarray:
+        """Frame BGR décodée à la demande (non conservée)."""
+        return cv2.imdecode(np.frombuffer(self.jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    @property
+    def name(self) -> str:
+        return f"keyframe_{self.index:04d}_{self.frame_number}.jpg"
+
 
 class VideoAnalyzer:
     """Analyse les vidéos et extrait des images clés (keyframes)"""
@@ -19,7 +49,8 @@ class VideoAnalyzer:
         video_path: str | Path,
         output_dir: Optional[str | Path] = None,
         interval_seconds: int = 30,
-        max_frames: Optional[int] = None
+        max_frames: Optional[int] = None,
+        max_width: Optional[int] = None,
     ) -> List[Path]:
         """
         Extrait des images clés d'une vidéo
@@ -29,6 +60,7 @@ class VideoAnalyzer:
             output_dir: Répertoire de sortie (optionnel)
             interval_seconds: Intervalle en secondes entre chaque keyframe
             max_frames: Nombre maximum de frames à extraire
+            max_width: Largeur max des images écrites (réduction à l'extraction)
         
         Returns:
             Liste des chemins des images extraites
@@ -50,34 +82,25 @@ class VideoAnalyzer:
         if not cap.isOpened():
             raise ValueError(f"Impossible d'ouvrir la vidéo: {video_path}")
         
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_interval = int(fps * interval_seconds)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_interval = max(1, int(round(fps * interval_seconds)))
         
         extracted_frames: List[Path] = []
-        frame_count = 0
         saved_count = 0
         
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
+            for frame_count, frame in self._iter_sampled_frames(cap, frame_interval):
+                if max_frames and saved_count >= max_frames:
                     break
                 
-                # Extraire une frame tous les X frames
-                if frame_count % frame_interval == 0:
-                    if max_frames and saved_count >= max_frames:
-                        break
-                    
-                    frame_filename = f"keyframe_{saved_count:04d}_{frame_count}.jpg"
-                    frame_path = output_path / frame_filename
-                    
-                    cv2.imwrite(str(frame_path), frame)
-                    extracted_frames.append(frame_path)
-                    saved_count += 1
-                    
-                    self.logger.info(f"📸 Keyframe extraite: {frame_filename}")
+                frame_filename = f"keyframe_{saved_count:04d}_{frame_count}.jpg"
+                frame_path = output_path / frame_filename
                 
-                frame_count += 1
+                cv2.imwrite(str(frame_path), self._downscale(frame, max_width))
+                extracted_frames.append(frame_path)
+                saved_count += 1
+                
+                self.logger.debug(f"📸 Keyframe extraite: {frame_filename}")
             
             self.logger.info(f"✅ {saved_count} keyframes extraites de {video_path}")
             
@@ -85,20 +108,217 @@ class VideoAnalyzer:
             cap.release()
         
         return extracted_frames
+
+    def extract_scene_keyframes(
+        self,
+        video_path: str | Path,
+        output_dir: Optional[str | Path] = None,
+        sample_seconds: float = 1.0,
+        min_gap_seconds: float = 2.0,
+        max_gap_seconds: float = 120.0,
+        hash_threshold: int = 10,
+        diff_threshold: float = 8.0,
+        max_frames: Optional[int] = None,
+        max_width: Optional[int] = None,
+        jpeg_quality: int = 85,
+    ) -> List[Path]:
+        """
+        Extrait une keyframe uniquement quand le contenu visuel change et l'écrit sur disque
+        
+        Voir `iter_scene_keyframes` pour les paramètres de sélection.
+        
+        Returns:
+            Liste des chemins des images extraites
+        """
+        video_path_obj = Path(video_path)
+        output_path = Path(output_dir) if output_dir else video_path_obj.parent / "keyframes"
+        output_path.mkdir(parents=True, exist_ok=True)
+        
+        return [
+            self.save_keyframe(keyframe, output_path)
+            for keyframe in self.iter_scene_keyframes(
+                video_path,
+                sample_seconds=sample_seconds,
+                min_gap_seconds=min_gap_seconds,
+                max_gap_seconds=max_gap_seconds,
+                hash_threshold=hash_threshold,
+                diff_threshold=diff_threshold,
+                max_frames=max_frames,
+                max_width=max_width,
+                jpeg_quality=jpeg_quality,
+            )
+        ]
+    
+    def iter_scene_keyframes(
+        self,
+        video_path: str | Path,
+        sample_seconds: float = 1.0,
+        min_gap_seconds: float = 2.0,
+        max_gap_seconds: float = 120.0,
+        hash_threshold: int = 10,
+        diff_threshold: float = 8.0,
+        max_frames: Optional[int] = None,
+        max_width: Optional[int] = None,
+        jpeg_quality: int = 85,
+    ) -> Iterator[Keyframe]:
+        """
+        Produit en mémoire une keyframe à chaque changement de contenu visuel (slides, plans)
+        
+        Chaque frame échantillonnée est comparée à la dernière frame émise via une
+        vignette 64x36 (différentiel moyen) et un dHash 64 bits (distance de Hamming).
+        Rien n'est écrit sur disque : l'appelant décide quelles images persister.
+        
+        Args:
+            video_path: Chemin vers la vidéo
+            sample_seconds: Pas d'échantillonnage des frames analysées
+            min_gap_seconds: Écart minimal entre deux keyframes (anti-rafale sur transitions)
+            max_gap_seconds: Au-delà, tout changement même faible est émis (tableau qui se remplit)
+            hash_threshold: Distance de Hamming (sur 64 bits) à partir de laquelle le contenu a changé
+            diff_threshold: Écart moyen de vignette (0-255) à partir duquel le contenu a changé
+            max_frames: Nombre maximum de frames à extraire
+            max_width: Largeur max des images produites
+            jpeg_quality: Qualité JPEG des keyframes gardées en mémoire
+        
+        Yields:
+            Keyframe (image réduite à `max_width`, encodée en JPEG)
+        """
+        video_path_obj = Path(video_path)
+        if not video_path_obj.exists():
+            raise FileNotFoundError(f"Vidéo non trouvée: {video_path}")
+        
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            raise ValueError(f"Impossible d'ouvrir la vidéo: {video_path}")
+        
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_interval = max(1, int(round(fps * sample_seconds)))
+        
+        emitted = 0
+        last_thumb: Optional[np.ndarray] = None
+        last_hash = 0
+        last_time = 0.0
+        analysed = 0
+        
+        try:
+            for frame_count, frame in self._iter_sampled_frames(cap, frame_interval):
+                if max_frames and emitted >= max_frames:
+                    break
+                analysed += 1
+                timestamp = frame_count / fps
+                thumb = thumbnail(frame)
+                frame_hash = dhash(thumb)
+                
+                if last_thumb is not None:
+                    gap = timestamp - last_time
+                    if gap < min_gap_seconds:
+                        continue
+                    distance = hamming(frame_hash, last_hash)
+                    diff = mean_abs_diff(thumb, last_thumb)
+                    changed = distance > hash_threshold or diff > diff_threshold
+                    # Évolution lente (tableau, schéma construit au fil du cours)
+                    drifted = gap >= max_gap_seconds and (distance > 0 or diff > diff_threshold / 4)
+                    if not (changed or drifted):
+                        continue
+                
+                yield Keyframe(
+                    index=emitted,
+                    frame_number=frame_count,
+                    timestamp=timestamp,
+                    jpeg=self._encode(self._downscale(frame, max_width), jpeg_quality),
+                )
+                emitted += 1
+                last_thumb, last_hash, last_time = thumb, frame_hash, timestamp
+            
+            self.logger.info(
+                f"✅ {emitted} keyframes retenues sur {analysed} frames analysées ({video_path_obj.name})"
+            )
+        finally:
+            cap.release()
+    
+    @staticmethod
+    def save_keyframe(keyframe: Keyframe, output_dir: str | Path) -> Path:
+        """Écrit une keyframe (déjà en JPEG) et renvoie son chemin."""
+        path = Path(output_dir) / keyframe.name
+        path.write_bytes(keyframe.jpeg)
+        return path
+    
+    @staticmethod
+    def _encode(frame: np.ndarray, jpeg_quality: int) -> bytes:
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+        if not ok:
+            raise ValueError("Encodage JPEG de la keyframe impossible")
+        return buffer.tobytes()
+
+    def _iter_sampled_frames(
+        self, cap: "cv2.VideoCapture", frame_interval: int, reuse_buffer: bool = False
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Itère sur une frame toutes les `frame_interval` sans décoder les autres.
+
+        - Petits intervalles : `grab()` avance sans conversion BGR, seul `retrieve()`
+          paie le décodage complet de la frame conservée.
+        - Grands intervalles : on saute directement (seek) à la frame suivante ;
+          le démuxeur repart de l'image clé la plus proche au lieu de tout lire.
+
+        Avec `reuse_buffer`, la même image est réécrite à chaque itération :
+        l'appelant ne doit pas conserver la frame d'une itération à l'autre.
+        """
+        use_seek = frame_interval >= SEEK_MIN_FRAME_INTERVAL
+        frame_count = 0
+        buffer: Optional[np.ndarray] = None
+
+        while True:
+            if use_seek and frame_count:
+                if not cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count):
+                    break
+            ok, frame = cap.read(buffer)
+            if not ok:
+                break
+            if reuse_buffer:
+                buffer = frame
+            yield frame_count, frame
+
+            if use_seek:
+                frame_count += frame_interval
+                continue
+
+            # Frames intermédiaires : démuxage/décodage minimal, pas de conversion
+            for _ in range(frame_interval - 1):
+                if not cap.grab():
+                    return
+            frame_count += frame_interval
+
+    @staticmethod
+    def _downscale(frame: np.ndarray, max_width: Optional[int]) -> np.ndarray:
+        if not max_width or frame.shape[1] <= max_width:
+            return frame
+        height = int(frame.shape[0] * max_width / frame.shape[1])
+        return cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
     
     def extract_slides(
         self,
         video_path: str | Path,
         output_dir: Optional[str | Path] = None,
-        similarity_threshold: float = 0.95
+        similarity_threshold: float = 0.98,
+        sample_seconds: float = 0.5,
+        thumb_size: Tuple[int, int] = (160, 90),
+        max_width: Optional[int] = None,
     ) -> List[Path]:
         """
         Extrait les slides/diapositives d'une vidéo en détectant les changements significatifs
         
+        Seule une frame toutes les `sample_seconds` est décodée ; elle est réduite en vignette
+        grise puis comparée à la précédente par SSIM. Tous les tableaux de travail sont
+        alloués une fois pour toute la vidéo.
+        
         Args:
             video_path: Chemin vers la vidéo
             output_dir: Répertoire de sortie
-            similarity_threshold: Seuil de similarité pour détecter un changement de slide
+            similarity_threshold: Seuil SSIM sous lequel on considère une nouvelle slide
+                (un pointeur ou une main qui bouge reste au-dessus de 0.99)
+            sample_seconds: Pas d'échantillonnage
+            thumb_size: Taille (largeur, hauteur) des vignettes comparées
+            max_width: Largeur max des slides écrites
         
         Returns:
             Liste des chemins des slides extraites
@@ -115,30 +335,25 @@ class VideoAnalyzer:
         if not cap.isOpened():
             raise ValueError(f"Impossible d'ouvrir la vidéo: {video_path}")
         
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_interval = max(1, int(round(fps * sample_seconds)))
+        comparator = _SlideComparator(thumb_size)
+        
         extracted_slides: List[Path] = []
-        prev_frame = None
         slide_count = 0
         
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+            for frame_count, frame in self._iter_sampled_frames(cap, frame_interval, reuse_buffer=True):
+                similarity = comparator.push(frame)
                 
-                if prev_frame is not None:
-                    # Calculer la similarité entre les frames
-                    similarity = self._calculate_similarity(prev_frame, frame)
-                    
-                    if similarity < similarity_threshold:
-                        # Changement significatif détecté - probablement une nouvelle slide
-                        slide_filename = f"slide_{slide_count:04d}.jpg"
-                        slide_path = output_path / slide_filename
-                        cv2.imwrite(str(slide_path), frame)
-                        extracted_slides.append(slide_path)
-                        slide_count += 1
-                        self.logger.info(f"📊 Slide détectée: {slide_filename}")
-                
-                prev_frame = frame.copy()
+                if similarity is None or similarity < similarity_threshold:
+                    # Première frame ou changement significatif : nouvelle slide
+                    slide_filename = f"slide_{slide_count:04d}.jpg"
+                    slide_path = output_path / slide_filename
+                    cv2.imwrite(str(slide_path), self._downscale(frame, max_width))
+                    extracted_slides.append(slide_path)
+                    slide_count += 1
+                    self.logger.debug(f"📊 Slide détectée: {slide_filename} (frame {frame_count}, SSIM={similarity})")
             
             self.logger.info(f"✅ {slide_count} slides extraites")
             
@@ -146,18 +361,83 @@ class VideoAnalyzer:
             cap.release()
         
         return extracted_slides
+
+
+class _SlideComparator:
+    """
+    SSIM entre vignettes successives, sur des buffers préalloués.
+    
+    Les statistiques locales (moyenne, variance) de la vignette courante sont
+    conservées et échangées avec celles de la précédente : chaque frame n'est
+    filtrée qu'une fois.
+    """
+    
+    _C1 = (0.01 * 255) ** 2
+    _C2 = (0.03 * 255) ** 2
+    _KERNEL = (7, 7)
+    _SIGMA = 1.5
     
-    def _calculate_similarity(self, frame1, frame2) -> float:
-        """Calcule la similarité entre deux frames"""
-        # Convertir en niveaux de gris
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+    def __init__(self, size: Tuple[int, int]):
+        self.size = size
+        width, height = size
+        self._small = np.empty((height, width, 3), dtype=np.uint8)
+        self._gray = np.empty((height, width), dtype=np.uint8)
+        shape = (height, width)
+        # (image, moyenne locale, variance locale) de la frame courante et de la précédente
+        self._cur = [np.empty(shape, np.float32) for _ in range(3)]
+        self._prev = [np.empty(shape, np.float32) for _ in range(3)]
+        self._cov = np.empty(shape, np.float32)
+        self._num = np.empty(shape, np.float32)
+        self._den = np.empty(shape, np.float32)
+        self._tmp = np.empty(shape, np.float32)
+        self._has_prev = False
+    
+    def push(self, frame: np.ndarray) -> Optional[float]:
+        """Ajoute une frame ; renvoie sa SSIM avec la précédente (None pour la première)."""
+        img, mu, var = self._cur
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        np.copyto(img, self._gray)
+        cv2.GaussianBlur(img, self._KERNEL, self._SIGMA, dst=mu)
+        cv2.multiply(img, img, dst=self._tmp)
+        cv2.GaussianBlur(self._tmp, self._KERNEL, self._SIGMA, dst=var)
+        cv2.multiply(mu, mu, dst=self._tmp)
+        cv2.subtract(var, self._tmp, dst=var)
         
-        # Calculer la corrélation
-        result = cv2.matchTemplate(gray1, gray2, cv2.TM_CCOEFF_NORMED)
-        similarity = result[0][0]
+        score = self._ssim() if self._has_prev else None
+        self._cur, self._prev = self._prev, self._cur
+        self._has_prev = True
+        return score
+    
+    def _ssim(self) -> float:
+        img1, mu1, var1 = self._prev
+        img2, mu2, var2 = self._cur
+        cov, num, den, tmp = self._cov, self._num, self._den, self._tmp
         
-        return similarity
+        cv2.multiply(img1, img2, dst=tmp)
+        cv2.GaussianBlur(tmp, self._KERNEL, self._SIGMA, dst=cov)
+        cv2.multiply(mu1, mu2, dst=tmp)
+        cv2.subtract(cov, tmp, dst=cov)
+        
+        # num = (2·mu1·mu2 + C1) · (2·cov + C2)
+        np.multiply(tmp, 2.0, out=num)
+        num += self._C1
+        np.multiply(cov, 2.0, out=tmp)
+        tmp += self._C2
+        num *= tmp
+        
+        # den = (mu1² + mu2² + C1) · (var1 + var2 + C2)
+        cv2.multiply(mu1, mu1, dst=den)
+        cv2.multiply(mu2, mu2, dst=tmp)
+        den += tmp
+        den += self._C1
+        np.add(var1, var2, out=tmp)
+        tmp += self._C2
+        den *= tmp
+        
+        num /= den
+        return float(num.mean())
+
 
 # Instance globale
 video_analyzer = VideoAnalyzer()
@@ -1,10 +1,16 @@
 """
 Service de structuration de documents avant export
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 from app.core.logger import get_logger
+from app.services.nlp.markdown_ast import HEADING, Block, parse_markdown
 import re
 
+# Sections de synthèse ajoutées par le LLM en fin de fenêtre (titre H2 normalisé)
+_SUMMARY_SECTION_RE = re.compile(
+    r"^(?:en )?(?:résumé|synthèse|conclusion|récapitulatif|points? clés?|à retenir|ce qu il faut retenir)\b"
+)
+
 class DocumentStructurer:
     """Structure les documents avant l'export"""
     
@@ -23,49 +29,50 @@ class DocumentStructurer:
         if metadata is None:
             metadata = {}
         
+        # Analyse unique du Markdown, partagée avec les exporters
+        blocks = parse_markdown(content)
+
         # 1. Tenter d'extraire le titre du contenu si non présent dans metadata
-        extracted_title = self._extract_main_title(content)
+        extracted_title = self._extract_main_title(blocks)
         final_title = metadata.get("title") or extracted_title or "Notes de cours"
         
         structured = {
             "title": final_title,
             "content_type": content_type,
-            "sections": self._extract_sections(content),
+            "sections": self._extract_sections(blocks),
             "metadata": metadata,
-            "raw_content": content # Vital pour les exporters qui gèrent le Markdown
+            "raw_content": content, # Vital pour les exporters qui gèrent le Markdown
+            "blocks": blocks,
         }
         
         return structured
 
-    def _extract_main_title(self, content: str) -> Optional[str]:
-        """Cherche la première ligne commençant par # pour définir le titre."""
-        match = re.search(r'^#\s+(.*)', content, re.MULTILINE)
-        if match:
-            return match.group(1).strip()
+    def _extract_main_title(self, blocks: Sequence[Block]) -> Optional[str]:
+        """Premier titre H1 du contenu (# Titre)."""
+        for block in blocks:
+            if block.kind == HEADING and block.level == 1:
+                return block.text
         return None
     
-    def _extract_sections(self, content: str) -> List[Dict]:
+    def _extract_sections(self, blocks: Sequence[Block]) -> List[Dict]:
         """Découpe le texte en blocs basés sur les titres H1."""
         sections = []
-        lines = content.split('\n')
-        
         current_section = {"title": "Introduction", "content": []}
         
-        for line in lines:
+        for block in blocks:
             # Détection des titres H1 (# Titre)
-            h1_match = re.match(r'^#\s+(.*)', line)
-            if h1_match:
+            if block.kind == HEADING and block.level == 1:
                 # Si on a déjà du contenu accumulé, on ferme la section précédente
                 if current_section["content"]:
                     current_section["content"] = '\n'.join(current_section["content"]).strip()
                     sections.append(current_section)
                 
                 current_section = {
-                    "title": h1_match.group(1).strip(),
+                    "title": block.text,
                     "content": []
                 }
             else:
-                current_section["content"].append(line)
+                current_section["content"].append(block.raw)
 
         # Ajout de la dernière section
         if current_section["content"] or len(sections) == 0:
@@ -74,6 +81,50 @@ class DocumentStructurer:
         
         return sections
 
+    def merge_notes(self, parts: List[str]) -> str:
+        """
+        Fusionne les notes générées fenêtre par fenêtre en un seul document.
+
+        Le premier titre H1 devient le titre du document (les suivants sont
+        retirés) ; les sections H2 de même titre ("Résumé", "Définitions"...)
+        sont regroupées à la place de leur première apparition. Le texte placé
+        avant le premier H2 d'une fenêtre prolonge la dernière section de contenu
+        des fenêtres précédentes (la fenêtre a été coupée au milieu de cette
+        section) : jamais un "Résumé" ou une "Conclusion" que le LLM ajoute en fin
+        de fenêtre. Sans section de contenu, il rejoint l'introduction.
+        """
+        title = None
+        preamble: List[str] = []
+        sections: Dict[str, Dict] = {}
+        last_body: Optional[Dict] = None
+
+        for part in parts:
+            # Texte d'avant le premier H2 de la fenêtre : suite de la dernière section de contenu
+            current = last_body
+            for block in parse_markdown(part):
+                if block.kind == HEADING and block.level == 1:
+                    title = title or block.text
+                    continue
+                if block.kind == HEADING and block.level == 2:
+                    key = re.sub(r'[^\w]+', ' ', block.text.lower()).strip() or block.text
+                    current = sections.setdefault(key, {"title": block.text, "content": []})
+                    current["content"].append("")
+                    if not _SUMMARY_SECTION_RE.match(key):
+                        last_body = current
+                    continue
+                if current is None:
+                    preamble.append(block.raw)
+                else:
+                    current["content"].append(block.raw)
+
+        lines = [f"# {title}", ""] if title else []
+        lines.extend(preamble)
+        for section in sections.values():
+            lines.extend(["", f"## {section['title']}"])
+            lines.extend(section["content"])
+        merged = '\n'.join(lines)
+        return re.sub(r'\n{3,}', '\n\n', merged).strip()
+
     def format_for_pdf(self, structured_doc: Dict) -> Dict:
         return {
             "title": structured_doc["title"],
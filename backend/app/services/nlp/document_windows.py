@@ -0,0 +1,51 @@
+"""
+Découpage d'un document en fenêtres de la taille d'une section.
+
+Les blocs arrivent au fil de l'extraction (pages PDF, paragraphes DOCX/TXT) ;
+chaque fenêtre est rendue dès qu'elle est complète, pour lancer la génération
+de notes sans attendre la fin du document.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List
+
+from app.services.ia.tokens import estimate_tokens, split_text_to_budget
+
+_SEPARATOR = "\n\n"
+_SEP_TOKENS = estimate_tokens(_SEPARATOR)
+
+
+def _is_heading(block: str) -> bool:
+    return block.lstrip().startswith("#")
+
+
+def iter_windows(blocks: Iterable[str], max_tokens: int, min_tokens: int = 0) -> Iterator[str]:
+    """
+    Regroupe les blocs en fenêtres de `max_tokens` maximum.
+
+    Une fenêtre est fermée avant un titre Markdown dès qu'elle atteint
+    `min_tokens` (les sections restent entières), et toujours avant de
+    dépasser `max_tokens`. Un bloc plus long qu'une fenêtre est redécoupé
+    par paragraphes puis par phrases.
+    """
+    current: List[str] = []
+    current_tokens = 0
+
+    for block in blocks:
+        block = block.strip()
+        if not block:
+            continue
+        pieces = [block] if estimate_tokens(block) <= max_tokens else split_text_to_budget(block, max_tokens)
+        for piece in pieces:
+            tokens = estimate_tokens(piece) + (_SEP_TOKENS if current else 0)
+            at_section = _is_heading(piece) and current_tokens >= min_tokens
+            if current and (at_section or current_tokens + tokens > max_tokens):
+                yield _SEPARATOR.join(current)
+                current, current_tokens = [], 0
+                tokens -= _SEP_TOKENS
+            current.append(piece)
+            current_tokens += tokens
+
+    if current:
+        yield _SEPARATOR.join(current)
@@ -0,0 +1,81 @@
+"""
+Analyse unique du Markdown des notes (titres, listes, citations, images, paragraphes).
+
+Le contenu d'une note est découpé une seule fois en blocs ; le structureur et
+tous les exporteurs (PDF, DOCX, TXT) consomment la même liste au lieu de
+ré-analyser le texte ligne par ligne chacun de leur côté.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Final, Optional, Tuple
+
+HEADING: Final[str] = "heading"
+BULLET: Final[str] = "bullet"
+NUMBERED: Final[str] = "numbered"
+QUOTE: Final[str] = "quote"
+IMAGE: Final[str] = "image"
+PARAGRAPH: Final[str] = "paragraph"
+BLANK: Final[str] = "blank"
+
+# Image Markdown, n'importe où dans une ligne
+IMAGE_RE: Final[re.Pattern[str]] = re.compile(r"!\[(?P<alt>.*?)\]\((?P<src>.*?)\)")
+# Une seule expression par ligne : le nom du groupe trouvé donne le type de bloc
+_LINE_RE: Final[re.Pattern[str]] = re.compile(
+    r"(?P<hashes>#{1,6})\s+(?P<heading>.*)"
+    r"|>\s?(?P<quote>.*)"
+    r"|[-*]\s+(?P<bullet>.*)"
+    r"|(?P<number>\d+)\.\s+(?P<numbered>.*)"
+)
+
+
+@dataclass(frozen=True)
+class Block:
+    kind: str
+    text: str = ""
+    level: int = 0              # Niveau de titre, ou numéro d'un élément de liste numérotée
+    src: Optional[str] = None   # Chemin d'une image
+    raw: str = ""               # Ligne d'origine (export TXT, sections du structureur)
+    images: Tuple["Block", ...] = ()  # Images au fil du texte (retirées de `text`)
+
+
+def _parse_line(raw: str) -> Block:
+    line = raw.strip()
+    if not line:
+        return Block(BLANK, raw=raw)
+    # Une ligne qui n'est qu'une image donne un bloc IMAGE ; ailleurs, les images sont
+    # des éléments du texte : le texte qui les entoure est conservé
+    images = tuple(
+        Block(IMAGE, m.group("alt"), src=m.group("src"), raw=m.group(0)) for m in IMAGE_RE.finditer(line)
+    )
+    if images:
+        line = " ".join(IMAGE_RE.sub(" ", line).split())
+        if not line and len(images) == 1:
+            return replace(images[0], raw=raw)
+    match = _LINE_RE.match(line)
+    if match is None:
+        return Block(PARAGRAPH, line, raw=raw, images=images)
+    kind = match.lastgroup
+    if kind == "heading":
+        return Block(HEADING, match.group("heading").strip(), level=len(match.group("hashes")), raw=raw, images=images)
+    if kind == "quote":
+        return Block(QUOTE, match.group("quote").strip(), raw=raw, images=images)
+    if kind == "bullet":
+        return Block(BULLET, match.group("bullet").strip(), raw=raw, images=images)
+    return Block(
+        NUMBERED, match.group("numbered").strip(), level=int(match.group("number")), raw=raw, images=images
+    )
+
+
+@lru_cache(maxsize=32)
+def parse_markdown(content: str) -> Tuple[Block, ...]:
+    """
+    Blocs du contenu, dans l'ordre (une ligne = un bloc).
+
+    Le résultat est immuable et mis en cache : exporter une note en plusieurs
+    formats ne l'analyse qu'une fois.
+    """
+    return tuple(_parse_line(raw) for raw in (content or "").split("\n"))
@@ -10,6 +10,41 @@ from typing import Final
 
 _MULTI_SPACE: Final[re.Pattern[str]] = re.compile(r"[ \t]{2,}")
 _MULTI_NEWLINES: Final[re.Pattern[str]] = re.compile(r"\n{3,}")
+# "le le le", "on va on va" : n-gramme (1 à 4 mots) répété à la suite.
+# Mots alphabétiques uniquement : "10 10" ou "2 x 2 x" sont des valeurs, pas des bégaiements
+_WORD: Final[str] = r"[^\W\d_](?:[^\W\d]|['’-])*"
+_REPEATED_NGRAM: Final[re.Pattern[str]] = re.compile(
+    rf"\b({_WORD}(?:\s+{_WORD}){{0,3}})(?:[\s,]+\1\b)+",
+    re.IGNORECASE | re.UNICODE,
+)
+# Répétitions grammaticales légitimes ("nous nous sommes", "vous vous trompez")
+_LEGIT_REPEATS: Final[frozenset[str]] = frozenset({"nous", "vous"})
+_SPACE_BEFORE_COMMA: Final[re.Pattern[str]] = re.compile(r"\s+([,.])")
+# Un point entre deux lettres fait partie du mot ("www.site.com", "e.g") : pas d'espace ajouté
+_MISSING_SPACE_AFTER: Final[re.Pattern[str]] = re.compile(
+    r"([,;:!?]|(?<![^\W\d_])\.|\.(?![^\W\d_]))(?=[^\s\d.,;:!?»)\]])"
+)
+_LOWER: Final[str] = "a-zàâäéèêëîïôöùûüç"
+_TEXT_START: Final[re.Pattern[str]] = re.compile(rf"^[{_LOWER}]")
+# Fin de phrase suivie d'une minuscule ; `token` est le mot qui porte la ponctuation
+_SENTENCE_END: Final[re.Pattern[str]] = re.compile(rf"(?<!\S)(?P<token>\S*?)[.!?…]+\s+(?=[{_LOWER}])")
+# Mot qui se termine par un point sans finir la phrase ("e.g.", "i.e.", "cf.")
+_ABBREVIATION: Final[re.Pattern[str]] = re.compile(r"(?:[^\W\d_]\.)+[^\W\d_]|cf|ex|vs|fig|env", re.IGNORECASE)
+
+
+def _capitalize_sentences(text: str) -> str:
+    chars = list(text)
+    for match in _SENTENCE_END.finditer(text):
+        if not _ABBREVIATION.fullmatch(match.group("token")):
+            chars[match.end()] = chars[match.end()].upper()
+    return "".join(chars)
+
+
+def _collapse_match(match: re.Match[str]) -> str:
+    ngram = match.group(1)
+    if ngram.lower() in _LEGIT_REPEATS:
+        return match.group(0)
+    return ngram
 
 
 class TextCleaner:
@@ -31,5 +66,29 @@ class TextCleaner:
         
         return text.strip()
 
+    def collapse_repetitions(self, text: str) -> str:
+        """Supprime les bégaiements de transcription ("le le", "on va on va")."""
+        if not text:
+            return ""
+        previous = None
+        # Plusieurs passes : "a b a b a b" -> "a b"
+        while previous != text:
+            previous = text
+            text = _REPEATED_NGRAM.sub(_collapse_match, text)
+        return text
+
+    def fix_punctuation(self, text: str) -> str:
+        """Corrections typographiques déterministes (espaces, majuscules, point final)."""
+        if not text:
+            return ""
+        text = _MULTI_SPACE.sub(" ", text.strip())
+        text = _SPACE_BEFORE_COMMA.sub(r"\1", text)
+        text = _MISSING_SPACE_AFTER.sub(r"\1 ", text)
+        text = _TEXT_START.sub(lambda m: m.group(0).upper(), text)
+        text = _capitalize_sentences(text)
+        if text and text[-1] not in ".!?…:;»)\"":
+            text += "."
+        return text
+
 text_cleaner = TextCleaner()
 
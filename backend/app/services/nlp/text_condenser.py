@@ -0,0 +1,145 @@
+"""
+Condensation du texte OCR avant envoi au LLM (contexte visuel).
+
+Une même slide OCRisée plusieurs fois donne des lignes presque identiques
+("Loi d'Ohm : U = R.I" / "Loi d'0hm : U = RI"). On les regroupe par MinHash
+sur des shingles de caractères, puis on classe les lignes restantes par
+densité d'information pour remplir le budget avec le contenu le plus utile.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+import zlib
+from typing import Dict, Final, FrozenSet, List, Sequence
+
+import numpy as np
+
+from app.core.logger import get_logger
+from app.services.ia.tokens import estimate_tokens
+
+logger = get_logger("nlp.text_condenser")
+
+_MERSENNE_PRIME: Final[int] = (1 << 61) - 1
+_NON_WORD_RE: Final[re.Pattern[str]] = re.compile(r"[^\w]+")
+_WORD_RE: Final[re.Pattern[str]] = re.compile(r"\w+")
+_NUMBER_RE: Final[re.Pattern[str]] = re.compile(r"\b\d+(?:[.,]\d+)?\b")
+_STOPWORDS: Final[FrozenSet[str]] = frozenset(
+    "les des une est dans par pour sur avec qui que son ses aux ces cette sont pas plus "
+    "the and for are with this that from was were has have not but you all its".split()
+)
+
+
+def _normalize(line: str) -> str:
+    text = unicodedata.normalize("NFKD", line.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+class TextCondenser:
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.7, shingle_size: int = 3):
+        """
+        Args:
+            num_perm: Nombre de permutations MinHash (signature)
+            bands: Bandes LSH (num_perm / bands lignes par bande) pour trouver les candidats
+            threshold: Similarité de Jaccard estimée à partir de laquelle deux lignes sont des doublons
+                (0.7 : une coquille OCR sur une ligne moyenne passe, "Chapitre 3 ... électriques" /
+                "Chapitre 3 ... magnétiques" non)
+            shingle_size: Taille des shingles de caractères (robustes aux erreurs OCR isolées)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(42)
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, line: str) -> np.ndarray:
+        text = _normalize(line)
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+        values = np.array([zlib.crc32(s.encode()) for s in shingles], dtype=np.uint64)
+        # h(x) = (a·x + b) mod p, pour chaque permutation ; on garde le minimum par permutation.
+        # x < 2^32 et a < 2^61 : le produit déborde sur uint64, ce qui reste une bonne famille de hachage.
+        hashed = (values[:, None] * self._a[None, :] + self._b[None, :]) % np.uint64(_MERSENNE_PRIME)
+        return hashed.min(axis=0)
+
+    def collapse(self, lines: Sequence[str]) -> List[str]:
+        """
+        Regroupe les lignes quasi identiques ; chaque groupe est représenté par sa
+        version la plus informative, à la position de sa première occurrence.
+        """
+        if not lines:
+            return []
+        signatures = [self.signature(line) for line in lines]
+        numbers = [sorted(_NUMBER_RE.findall(line)) for line in lines]
+        rows = self.num_perm // self.bands
+        parent = list(range(len(lines)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band in range(self.bands):
+            buckets: Dict[bytes, int] = {}
+            for i, sig in enumerate(signatures):
+                key = sig[band * rows:(band + 1) * rows].tobytes()
+                j = buckets.setdefault(key, i)
+                if j == i or find(i) == find(j):
+                    continue
+                # Des nombres différents ("Chapitre 3" / "Chapitre 4") : jamais des doublons
+                if numbers[i] != numbers[j]:
+                    continue
+                if float(np.mean(sig == signatures[j])) >= self.threshold:
+                    parent[find(i)] = find(j)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(lines)):
+            groups.setdefault(find(i), []).append(i)
+        best = {min(members): max(members, key=lambda i: (self.informative_words(lines[i]), len(lines[i])))
+                for members in groups.values()}
+        return [lines[best[first]] for first in sorted(best)]
+
+    @staticmethod
+    def informative_words(line: str) -> int:
+        """Mots distincts porteurs de sens : chiffres, ou 3 lettres et plus hors mots-outils."""
+        words = {w for w in _WORD_RE.findall(line.lower())}
+        return sum(1 for w in words if any(c.isdigit() for c in w) or (len(w) >= 3 and w not in _STOPWORDS))
+
+    def density(self, line: str) -> float:
+        """Information par token envoyé au LLM."""
+        return self.informative_words(line) / max(1, estimate_tokens(line))
+
+    def condense(self, lines: Sequence[str], max_chars: int) -> str:
+        """
+        Doublons flous regroupés, lignes sans contenu (bruit OCR) retirées, puis
+        les lignes les plus denses sont retenues jusqu'au budget ; l'ordre de
+        lecture d'origine est conservé dans le résultat.
+        """
+        candidates = [line.strip() for line in lines if line and line.strip()]
+        unique = self.collapse(list(dict.fromkeys(candidates)))
+        useful = [line for line in unique if self.informative_words(line) > 0]
+
+        ranked = sorted(range(len(useful)), key=lambda i: self.density(useful[i]), reverse=True)
+        kept, used = set(), 0
+        for i in ranked:
+            cost = len(useful[i]) + 1
+            if used + cost > max_chars:
+                continue
+            kept.add(i)
+            used += cost
+
+        logger.info(
+            "🧹 Contexte visuel: %d lignes -> %d uniques -> %d retenues (%d caractères)",
+            len(candidates), len(useful), len(kept), used,
+        )
+        return "\n".join(useful[i] for i in sorted(kept))
+
+
+text_condenser = TextCondenser()
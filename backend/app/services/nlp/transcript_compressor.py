@@ -0,0 +1,113 @@
+"""
+Compression d'une transcription orale avant génération de notes.
+
+Supprime les tics de langage, faux départs et répétitions pour réduire la
+taille du prompt envoyé au 70B, sans jamais perdre un chiffre.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Final, List
+
+from app.core.logger import get_logger
+from app.services.ia.tokens import estimate_tokens
+from app.services.nlp.text_cleaner import text_cleaner
+
+logger = get_logger("nlp.transcript_compressor")
+
+# Hésitations sans ambiguïté : supprimées partout (avec la virgule qui suit)
+_DISFLUENCIES: Final[List[str]] = [r"euh+", r"heu+", r"hum+", r"hm+", r"bah"]
+_DISFLUENCY_RE: Final[re.Pattern[str]] = re.compile(
+    r"(?:(?<=^)|(?<=[\s,.;:!?]))(?:" + "|".join(_DISFLUENCIES) + r")(?=[\s,.;:!?]|$)[,]?",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Tics qui sont aussi des mots ordinaires ("ce module en fait partie", "le genre humain",
+# "vous savez résoudre") : supprimés seulement en incise, en début de proposition
+# et suivis d'une virgule ("En fait, ...", "..., genre, ...")
+_INTERJECTIONS: Final[List[str]] = [
+    r"bon ben", r"ben", r"hein", r"du coup", r"en fait", r"en gros", r"genre",
+    r"tu vois", r"vous voyez", r"tu sais", r"vous savez", r"on va dire", r"disons",
+]
+_INTERJECTION_RE: Final[re.Pattern[str]] = re.compile(
+    r"(^\s*|[,.;:!?]\s*)(?:" + "|".join(_INTERJECTIONS) + r")\s*,\s*",
+    re.IGNORECASE | re.MULTILINE,
+)
+# "voilà" / "quoi" ne sont des tics qu'en incise finale : après une virgule et avant
+# ".", ";" ou la fin de ligne ("c'est simple, voilà."). Jamais avant "?" ("tu fais
+# quoi ?") ni sans virgule, donc jamais après une préposition ("la dérivée de quoi")
+_TRAILING_FILLER_RE: Final[re.Pattern[str]] = re.compile(
+    r",\s*\b(?:voilà|quoi)\b[ \t]*(?=[.;]|$)", re.IGNORECASE | re.MULTILINE
+)
+# Faux départ : mot tronqué suivi d'un tiret puis d'un espace ("le moteu- le moteur")
+_FALSE_START_RE: Final[re.Pattern[str]] = re.compile(r"\b\w+-\s+(?=\w)")
+# Espaces insécables/fines dans les nombres : "700\u00a0000" -> "700 000"
+_NUMBER_SPACE_RE: Final[re.Pattern[str]] = re.compile(r"(?<=\d)[\u00a0\u202f\u2009](?=\d{3}\b)")
+_PERCENT_RE: Final[re.Pattern[str]] = re.compile(r"(\d)\s*(?:pour\s*cent|pourcent)\b", re.IGNORECASE)
+_ORPHAN_PUNCT_RE: Final[re.Pattern[str]] = re.compile(r"(^|[.!?]\s+)[,;]\s*", re.MULTILINE)
+_DOUBLE_COMMA_RE: Final[re.Pattern[str]] = re.compile(r",\s*(?=[,.!?])")
+_DOUBLE_STOP_RE: Final[re.Pattern[str]] = re.compile(r"([.!?])(?:\s*[.,;])+")
+_DIGITS_RE: Final[re.Pattern[str]] = re.compile(r"\d+")
+
+
+@dataclass(frozen=True)
+class CompressionResult:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+
+class TranscriptCompressor:
+    def compress(self, transcript: str) -> CompressionResult:
+        before = estimate_tokens(transcript)
+        if not transcript or not transcript.strip():
+            return CompressionResult(text=transcript or "", tokens_before=before, tokens_after=before)
+
+        normalized = self.normalize_numbers(transcript)
+        text = _FALSE_START_RE.sub("", normalized)
+        text = _DISFLUENCY_RE.sub("", text)
+        # Plusieurs passes : "Bon ben, du coup, on y va"
+        previous = None
+        while previous != text:
+            previous = text
+            text = _INTERJECTION_RE.sub(self._drop_interjection, text)
+        text = _TRAILING_FILLER_RE.sub("", text)
+        text = text_cleaner.collapse_repetitions(text)
+        text = _DOUBLE_COMMA_RE.sub("", text)
+        text = _DOUBLE_STOP_RE.sub(r"\1", text)
+        text = _ORPHAN_PUNCT_RE.sub(r"\1", text)
+        text = text_cleaner.clean(text_cleaner.fix_punctuation(text))
+
+        # 🛡️ Garde-fou : tous les chiffres doivent survivre (prix, mesures, dates)
+        if self._figures(text) != self._figures(normalized):
+            logger.warning("⚠️ Compression annulée : elle aurait modifié des chiffres")
+            text = text_cleaner.clean(normalized)
+
+        result = CompressionResult(text=text, tokens_before=before, tokens_after=estimate_tokens(text))
+        logger.info(
+            "🗜️ Transcription compressée: %d -> %d tokens (-%d)",
+            result.tokens_before, result.tokens_after, result.tokens_saved,
+        )
+        return result
+
+    @staticmethod
+    def _drop_interjection(match: re.Match) -> str:
+        # Incise en milieu de phrase (", genre, ") : les deux virgules partent avec elle
+        return " " if match.group(1).startswith(",") else match.group(1)
+
+    def normalize_numbers(self, text: str) -> str:
+        text = _NUMBER_SPACE_RE.sub(" ", text)
+        return _PERCENT_RE.sub(r"\1 %", text)
+
+    @staticmethod
+    def _figures(text: str) -> Counter:
+        return Counter(_DIGITS_RE.findall(text))
+
+
+transcript_compressor = TranscriptCompressor()
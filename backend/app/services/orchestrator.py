@@ -6,16 +6,21 @@ import re
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.media.asset_store import asset_store
 from app.services.media.audio_processor import audio_processor
 from app.services.media.noise_cleaner import NoiseCleaner
-from app.services.media.video_analyzer import video_analyzer
+from app.services.media.video_analyzer import Keyframe, video_analyzer
 
 from app.services.ia.transcriber import transcriber
 from app.services.ia.vision_client import vision_client
 from app.services.ia.manager import ia_manager
 
 from app.services.nlp.text_cleaner import text_cleaner
+from app.services.nlp.transcript_compressor import transcript_compressor
 from app.services.nlp.document_structurer import document_structurer
+from app.services.nlp.document_windows import iter_windows
+from app.services.nlp.markdown_ast import Block
+from app.services.document.text_extractor import iter_document_blocks
 from app.db.repositories.transcription_repo import TranscriptionRepository
 from app.db.repositories.note_repo import NoteRepository
 from app.db.repositories.export_repo import ExportRepository
@@ -26,10 +31,14 @@ from app.models.note import Note
 from app.services.export.pdf import generate_pdf
 from app.services.export.docx import generate_docx
 from app.services.export.txt import generate_txt
+from app.services.export.cache_key import export_content_hash
 
 # 🔧 CORRECTION FACULTATIVE : Validation des formats d'export
 VALID_EXPORT_FORMATS = {"pdf", "docx", "txt"}
 
+# Balise insérée par le LLM à l'endroit où une capture de la vidéo doit apparaître
+CAPTURE_TAG_PATTERN = r"\s? изображение \s?"
+
 class Orchestrator:
     def __init__(self):
         self._repo = None       # Pour les transcriptions
@@ -68,21 +77,14 @@ class Orchestrator:
         user_id: Optional[str] = None,
         content_type: Optional[str] = None,
         export_formats: Optional[Sequence[str]] = None,
+        ocr_engine: Optional[str] = None,
     ) -> bool:
         """
         Pipeline complet:
         Upload → Traitement média → Transcription → OCR/Vision → Structuration NLP → Export → Sauvegarde DB
         """
         # 🔧 CORRECTION FACULTATIVE : Validation et normalisation des formats d'export
-        if not export_formats:
-            export_formats = ["pdf", "docx", "txt"]
-            self._logger.warning("⚠️ Aucun format d'export reçu. Forçage par défaut : PDF, DOCX, TXT")
-        else:
-            # Valider et filtrer les formats invalides
-            export_formats = [fmt.lower() for fmt in export_formats if fmt.lower() in VALID_EXPORT_FORMATS]
-            if not export_formats:
-                self._logger.warning("⚠️ Aucun format valide fourni. Utilisation des formats par défaut.")
-                export_formats = ["pdf", "docx", "txt"]
+        export_formats = self._normalize_export_formats(export_formats)
 
         temp_files: list[Path] = []
         temp_dirs: list[Path] = []
@@ -100,21 +102,33 @@ class Orchestrator:
             cleaned_audio_path = Path(cleaned_audio_str)
             temp_files.append(cleaned_audio_path)
 
-            # 3) Vision (si vidéo): keyframes → OCR
-            keyframes: list[Path] = []
-            keyframes_dir = None  # 🔧 CORRECTION BLOQUANTE : Initialisation pour éviter UnboundLocalError
+            # 3) Vision (si vidéo): keyframes (en mémoire) → OCR
+            keyframes: list[Keyframe] = []
             if file_path.suffix.lower() in {".mp4", ".mov", ".avi", ".mkv", ".webm"}:
-                keyframes_dir = settings.FRAMES_DIR / media_id
-                temp_dirs.append(keyframes_dir)
+                # Une image par changement de contenu (et non toutes les 2 s) : OCR et stockage allégés.
+                # Rien n'est écrit sur disque ici : seules les captures citées dans les notes le seront.
                 keyframes = await asyncio.to_thread(
-                    video_analyzer.extract_keyframes,
+                    self._collect_keyframes,
                     file_path,
-                    keyframes_dir,
-                    2,  # interval_seconds
-                    None,
+                    sample_seconds=settings.KEYFRAME_SAMPLE_SECONDS,
+                    min_gap_seconds=settings.KEYFRAME_MIN_GAP_SECONDS,
+                    max_gap_seconds=settings.KEYFRAME_MAX_GAP_SECONDS,
+                    hash_threshold=settings.KEYFRAME_HASH_THRESHOLD,
+                    diff_threshold=settings.KEYFRAME_DIFF_THRESHOLD,
+                    max_frames=settings.KEYFRAME_MAX_FRAMES,
+                    max_width=settings.KEYFRAME_MAX_WIDTH,
+                    jpeg_quality=settings.KEYFRAME_JPEG_QUALITY,
                 )
+                if len(keyframes) >= settings.KEYFRAME_MAX_FRAMES:
+                    self._logger.warning(
+                        "⚠️ Plafond de %d keyframes atteint : la fin de la vidéo n'est pas analysée",
+                        settings.KEYFRAME_MAX_FRAMES,
+                    )
 
-            visual_context = await vision_client.get_visual_context(keyframes)
+            # Keyframes passées en JPEG : décodées une à une par la Vision
+            visual_context = await vision_client.get_visual_context(
+                [kf.jpeg for kf in keyframes], engine=ocr_engine
+            )
 
             # 4) STT → Transcription par morceaux (Chunking)
             await self.repo.update_status(media_id, "transcribing")
@@ -155,17 +169,20 @@ class Orchestrator:
 
             if not refined_transcript:
                 raise ValueError("La transcription a échoué : aucun texte généré.")
+
+            # 🗜️ Prompt allégé : tics de langage et répétitions retirés localement
+            compressed = transcript_compressor.compress(refined_transcript)
             
             # 5) Type contenu (si auto)
             effective_content_type = content_type or "auto"
             if effective_content_type == "auto":
-                effective_content_type = await ia_manager.detect_content_type(refined_transcript)
+                effective_content_type = await ia_manager.detect_content_type(compressed.text)
 
             await self.repo.update_status(media_id, "generating_notes")
 
             # 6) Génération notes (Markdown)
             generated_notes = await ia_manager.generate_notes(
-                transcription=refined_transcript,
+                transcription=compressed.text,
                 content_type=effective_content_type,
                 visual_context=visual_context,
             )
@@ -175,21 +192,17 @@ class Orchestrator:
             if keyframes:
                 # On définit un dossier permanent pour les images de cette note
                 permanent_img_dir = Path(settings.STORAGE_DIR) / "notes_assets" / media_id
-                permanent_img_dir.mkdir(parents=True, exist_ok=True)
                 
-                saved_paths = []
-                for img in keyframes:
-                    dest = permanent_img_dir / img.name
-                    shutil.copy(img, dest) # On copie l'image vers le stockage permanent
-                    saved_paths.append(dest)
+                # Seules les captures réellement citées dans les notes sont persistées :
+                # stock adressé par contenu + liens physiques dans le dossier de la note
+                referenced = keyframes[:self._count_capture_tags(generated_notes)]
+                saved_paths = await asyncio.to_thread(
+                    asset_store.persist, (kf.image for kf in referenced), permanent_img_dir
+                )
+                keyframes.clear()  # Libère les frames en mémoire
                 
                 # 🔧 CORRECTION IMPORTANTE : Utiliser les chemins permanents pour l'intégration
                 generated_notes = self._integrate_real_captures(generated_notes, saved_paths)
-                
-                # 🔧 CORRECTION BLOQUANTE : Retirer keyframes_dir de temp_dirs pour éviter 
-                # la suppression prématurée des images sources avant la copie complète
-                if keyframes_dir and keyframes_dir in temp_dirs:
-                    temp_dirs.remove(keyframes_dir)
 
             # 7) Structuration NLP (pré-export)
             structured = document_structurer.structure_for_export(
@@ -220,7 +233,10 @@ class Orchestrator:
                 title=structured.get("title", "Notes de cours"),
                 content=structured.get("raw_content", generated_notes),
                 content_type=effective_content_type,
-                generation_params={"visual": bool(visual_context)},
+                generation_params={
+                    "visual": bool(visual_context),
+                    "prompt_tokens_saved": compressed.tokens_saved,
+                },
                 model_used="groq:llama-3.3-70b",
                 status="completed"
             )
@@ -230,60 +246,15 @@ class Orchestrator:
             note_id = saved_note.id # Récupération de l'ID pour les exports
 
             # --- 🔧 CORRECTION IMPORTANTE : Gestion d'erreurs robuste pour les exports ---
-            if export_formats:
-                final_content = structured.get("raw_content") or generated_notes
-                final_title = structured.get("title") or "Notes de cours"
-                
-                note_data = {
-                    "title": final_title, 
-                    "content": final_content
-                }
-                
-                export_results = []
-                for fmt in export_formats:
-                    fmt = fmt.lower()
-                    try:
-                        self._logger.info(f"⏳ Génération de l'export {fmt}...")
-                        
-                        # Génération du fichier selon le format
-                        if fmt == "pdf":
-                            export_path, file_size = await generate_pdf(note_data)
-                        elif fmt == "docx":
-                            export_path, file_size = await generate_docx(note_data)
-                        elif fmt == "txt":
-                            export_path, file_size = await generate_txt(note_data)
-                        else:
-                            self._logger.warning(f"Format {fmt} non supporté, ignoré")
-                            continue
-                        
-                        # 🔧 CORRECTION IMPORTANTE : Vérifier que le fichier existe réellement
-                        if not Path(export_path).exists():
-                            raise FileNotFoundError(f"Le fichier {export_path} n'a pas été créé")
-                        
-                        # Sauvegarde en base de données
-                        export_id = await self.export_repo.create({
-                            "user_id": user_id,
-                            "note_id": str(note_id),
-                            "format": fmt,
-                            "file_path": str(export_path),
-                            "file_size": file_size,
-                        })
-                        
-                        export_results.append({"format": fmt, "id": export_id})
-                        self._logger.info(f"✅ Export {fmt} créé : {export_path}")
-                        
-                    except Exception as e:
-                        # 🔧 CORRECTION IMPORTANTE : Logger l'erreur complète sans bloquer le pipeline
-                        self._logger.error(f"❌ Erreur lors de l'export {fmt} : {str(e)}", exc_info=True)
-                        # Ne pas bloquer le pipeline pour un export raté
-                        continue
-                
-                # 🔧 CORRECTION IMPORTANTE : Log du résultat global
-                if export_results:
-                    self._logger.info(f"✅ {len(export_results)} export(s) créé(s) avec succès")
-                else:
-                    self._logger.warning("⚠️ Aucun export n'a pu être créé")
-                    
+            await self._export_note(
+                note_id=str(note_id),
+                user_id=user_id,
+                title=structured.get("title") or "Notes de cours",
+                content=structured.get("raw_content") or generated_notes,
+                export_formats=export_formats,
+                blocks=structured.get("blocks"),
+            )
+
             self._logger.info("✅ Pipeline terminé avec succès: media_id=%s", media_id)
             return True
 
@@ -309,68 +280,64 @@ class Orchestrator:
     ) -> bool:  
         """  
         🆕 Pipeline pour documents textuels (PDF, DOCX, TXT):  
-        Upload → Extraction texte → Génération notes → Structuration NLP → Export → Sauvegarde DB  
+        Upload → Extraction texte (en flux) → Notes par fenêtre (en parallèle) → Fusion par titre  
+        → Structuration NLP → Export → Sauvegarde DB  
+  
+        Les fenêtres partent en génération dès qu'elles sont extraites : un gros  
+        document prend le temps de sa plus longue fenêtre, pas de leur somme.  
         """  
-        # Validation des formats d'export  
-        if not export_formats:  
-            export_formats = ["pdf", "docx", "txt"]  
-            self._logger.warning("⚠️ Aucun format d'export reçu. Forçage par défaut : PDF, DOCX, TXT")  
-        else:  
-            export_formats = [fmt.lower() for fmt in export_formats if fmt.lower() in VALID_EXPORT_FORMATS]  
-            if not export_formats:  
-                self._logger.warning("⚠️ Aucun format valide fourni. Utilisation des formats par défaut.")  
-                export_formats = ["pdf", "docx", "txt"]  
+        export_formats = self._normalize_export_formats(export_formats)  
+        window_tasks: list[asyncio.Task] = []  
   
         try:  
             self._logger.info("🚀 Pipeline document démarré: media_id=%s", media_id)  
   
-            # 1) Extraction du texte selon le format  
+            # 1) Extraction du texte en flux, découpée en fenêtres de la taille d'une section  
             await self.repo.update_status(media_id, "extracting_text")  
-              
-            file_ext = file_path.suffix.lower()  
-            if file_ext == ".pdf":  
-                from app.services.document.text_extractor import extract_text_from_pdf  
-                text_content = await extract_text_from_pdf(file_path)  
-            elif file_ext in [".docx", ".doc"]:  
-                from app.services.document.text_extractor import extract_text_from_docx  
-                text_content = await extract_text_from_docx(file_path)  
-            elif file_ext == ".txt":  
-                from app.services.document.text_extractor import extract_text_from_txt  
-                text_content = await extract_text_from_txt(file_path)  
-            else:  
-                raise ValueError(f"Format de document non supporté: {file_ext}")  
-              
-            if not text_content or len(text_content.strip()) < 50:  
+            windows = iter_windows(  
+                iter_document_blocks(file_path),  
+                max_tokens=settings.DOCUMENT_WINDOW_TOKENS,  
+                min_tokens=settings.DOCUMENT_WINDOW_MIN_TOKENS,  
+            )  
+            semaphore = asyncio.Semaphore(settings.DOCUMENT_WINDOW_CONCURRENCY)  
+            source_parts: list[str] = []  
+            effective_content_type = content_type or "auto"  
+  
+            while True:  
+                window = await asyncio.to_thread(next, windows, None)  
+                if window is None:  
+                    break  
+                if not source_parts:  
+                    # 2) Détection du type de contenu sur la première fenêtre  
+                    if effective_content_type == "auto":  
+                        effective_content_type = await ia_manager.detect_content_type(window)  
+                        self._logger.info("🔍 Type détecté: %s", effective_content_type)  
+                    await self.repo.update_status(media_id, "generating_notes")  
+                source_parts.append(window)  
+                # 3) Génération de notes de la fenêtre, pendant que l'extraction continue  
+                window_tasks.append(asyncio.create_task(  
+                    self._generate_window_notes(window, effective_content_type, semaphore)  
+                ))  
+  
+            text_content = "\n\n".join(source_parts)  
+            if len(text_content.strip()) < 50:  
                 raise ValueError("Le document ne contient pas assez de texte exploitable")  
-              
-            self._logger.info(f"📄 Texte extrait: {len(text_content)} caractères")  
   
-            # 2) Détection du type de contenu  
-            effective_content_type = content_type or "auto"  
-            if effective_content_type == "auto":  
-                effective_content_type = await ia_manager.detect_content_type(text_content)  
-                self._logger.info("🔍 Type détecté: %s", effective_content_type)  
-              
-            # 3) Génération de notes via IA  
-            await self.repo.update_status(media_id, "generating_notes")  
-            generated_notes = await ia_manager.generate_notes(  
-                transcript=text_content,  
-                content_type=effective_content_type,  
-                visual_context=None  # Pas de contexte visuel pour les documents  
-            )  
-              
-            # 4) Nettoyage du texte  
-            cleaned_notes = text_cleaner.clean(generated_notes)  
-              
+            self._logger.info(f"📄 Texte extrait: {len(text_content)} caractères, {len(window_tasks)} fenêtre(s)")  
+            window_notes = await asyncio.gather(*window_tasks)  
+  
+            # 4) Fusion par titre + nettoyage (pas de captures pour un document : balises retirées)  
+            generated_notes = document_structurer.merge_notes(list(window_notes))  
+            cleaned_notes = text_cleaner.clean(self._integrate_real_captures(generated_notes, []))  
+  
             # 5) Structuration pour export  
             structured = document_structurer.structure_for_export(  
                 cleaned_notes,  
                 content_type=effective_content_type,  
                 metadata={"media_id": media_id, "user_id": user_id},  
             )  
-              
+  
             # 6) Sauvegarde en base de données  
-            from app.models.transcription import Transcription  
             transcription_obj = Transcription(  
                 media_id=media_id,  
                 user_id=user_id,  
@@ -379,13 +346,12 @@ class Orchestrator:
                 visual_context=None,  
                 segments=[],  
                 language="fr",  
-                model_name="Document Extraction",  
+                model="Document Extraction",  
             )  
-              
+  
             saved_transcription = await self.repo.create(transcription_obj)  
-              
+  
             # 7) Création de la note  
-            from app.models.note import Note  
             new_note = Note(  
                 user_id=user_id,  
                 transcription_id=str(saved_transcription.id),  
@@ -393,75 +359,125 @@ class Orchestrator:
                 title=structured.get("title", "Notes de document"),  
                 content=structured.get("raw_content", cleaned_notes),  
                 content_type=effective_content_type,  
-                generation_params={"source": "document"},  
+                generation_params={"source": "document", "windows": len(window_tasks)},  
                 model_used="groq:llama-3.3-70b",  
                 status="completed"  
             )  
-              
+  
             saved_note = await self.note_repo.create(new_note)  
-            note_id = saved_note.id  
-              
+  
             # 8) Exports  
-            if export_formats:  
-                final_content = structured.get("raw_content") or cleaned_notes  
-                final_title = structured.get("title") or "Notes de document"  
-                  
-                note_data = {  
-                    "title": final_title,  
-                    "content": final_content  
-                }  
-                  
-                export_results = []  
-                for fmt in export_formats:  
-                    fmt = fmt.lower()  
-                    try:  
-                        self._logger.info(f"⏳ Génération de l'export {fmt} pour document...")  
-                          
-                        if fmt == "pdf":  
-                            export_path, file_size = await generate_pdf(note_data)  
-                        elif fmt == "docx":  
-                            export_path, file_size = await generate_docx(note_data)  
-                        elif fmt == "txt":  
-                            export_path, file_size = await generate_txt(note_data)  
-                        else:  
-                            self._logger.warning(f"⚠️ Format {fmt} non supporté, ignoré")  
-                            continue  
-                          
-                        # Vérification que le fichier a bien été créé  
-                        if not Path(export_path).exists():  
-                            self._logger.error(f"❌ Le fichier d'export {fmt} n'a pas été créé")  
-                            continue  
-                          
-                        # Sauvegarde en base de données  
-                        export_id = await self.export_repo.create({  
-                            "user_id": user_id,  
-                            "note_id": str(note_id),  
-                            "format": fmt,  
-                            "file_path": str(export_path),  
-                            "file_size": file_size,  
-                        })  
-                          
-                        export_results.append({"format": fmt, "id": export_id})  
-                        self._logger.info(f"✅ Export {fmt} créé : {export_path}")  
-                          
-                    except Exception as e:  
-                        self._logger.error(f"❌ Erreur lors de l'export {fmt} : {str(e)}", exc_info=True)  
-                        continue  
-                  
-                if export_results:  
-                    self._logger.info(f"✅ {len(export_results)} export(s) créé(s) avec succès")  
-                else:  
-                    self._logger.warning("⚠️ Aucun export n'a pu être créé")  
-              
+            await self._export_note(  
+                note_id=str(saved_note.id),  
+                user_id=user_id,  
+                title=structured.get("title") or "Notes de document",  
+                content=structured.get("raw_content") or cleaned_notes,  
+                export_formats=export_formats,  
+                blocks=structured.get("blocks"),  
+            )  
+  
             self._logger.info("✅ Pipeline document terminé avec succès: media_id=%s", media_id)  
             return True  
-              
+  
         except Exception as e:  
             self._logger.error("❌ ÉCHEC CRITIQUE du pipeline document media_id=%s: %s", media_id, str(e))  
             import traceback  
             self._logger.error(traceback.format_exc())  
             return False  
   
+        finally:  
+            for task in window_tasks:  
+                task.cancel()  
+  
+    async def _generate_window_notes(  
+        self, window: str, content_type: str, semaphore: asyncio.Semaphore  
+    ) -> str:  
+        """Notes d'une fenêtre ; le sémaphore borne les appels LLM simultanés."""  
+        async with semaphore:  
+            return await ia_manager.generate_notes(  
+                transcription=window,  
+                content_type=content_type,  
+                visual_context="",  # Pas de contexte visuel pour les documents  
+            )  
+  
+    def _normalize_export_formats(self, export_formats: Optional[Sequence[str]]) -> list[str]:  
+        """Formats valides demandés, ou PDF/DOCX/TXT par défaut."""  
+        if not export_formats:  
+            self._logger.warning("⚠️ Aucun format d'export reçu. Forçage par défaut : PDF, DOCX, TXT")  
+            return ["pdf", "docx", "txt"]  
+        # Valider et filtrer les formats invalides  
+        formats = [fmt.lower() for fmt in export_formats if fmt.lower() in VALID_EXPORT_FORMATS]  
+        if not formats:  
+            self._logger.warning("⚠️ Aucun format valide fourni. Utilisation des formats par défaut.")  
+            return ["pdf", "docx", "txt"]  
+        return formats  
+  
+    async def _export_note(  
+        self,  
+        note_id: str,  
+        user_id: Optional[str],  
+        title: str,  
+        content: str,  
+        export_formats: Sequence[str],  
+        blocks: Optional[Sequence[Block]] = None,  
+    ) -> list[dict]:  
+        """  
+        Génère et enregistre les exports d'une note (médias et documents).  
+        Un export raté est journalisé sans bloquer le pipeline.  
+        Les blocs Markdown déjà analysés par le structureur sont partagés par tous les formats.  
+        """  
+        note_data = {  
+            "title": title,  
+            "content": content,  
+            "blocks": blocks,  
+        }  
+  
+        export_results = []  
+        for fmt in export_formats:  
+            fmt = fmt.lower()  
+            try:  
+                self._logger.info(f"⏳ Génération de l'export {fmt}...")  
+  
+                # Génération du fichier selon le format  
+                if fmt == "pdf":  
+                    export_path, file_size = await generate_pdf(note_data)  
+                elif fmt == "docx":  
+                    export_path, file_size = await generate_docx(note_data)  
+                elif fmt == "txt":  
+                    export_path, file_size = await generate_txt(note_data)  
+                else:  
+                    self._logger.warning(f"Format {fmt} non supporté, ignoré")  
+                    continue  
+  
+                # 🔧 CORRECTION IMPORTANTE : Vérifier que le fichier existe réellement  
+                if not Path(export_path).exists():  
+                    raise FileNotFoundError(f"Le fichier {export_path} n'a pas été créé")  
+  
+                # Sauvegarde en base de données  
+                export_id = await self.export_repo.create({  
+                    "user_id": user_id,  
+                    "note_id": note_id,  
+                    "format": fmt,  
+                    "file_path": str(export_path),  
+                    "file_size": file_size,  
+                    "content_hash": export_content_hash(title, content, fmt),  
+                })  
+  
+                export_results.append({"format": fmt, "id": export_id})  
+                self._logger.info(f"✅ Export {fmt} créé : {export_path}")  
+  
+            except Exception as e:  
+                # 🔧 CORRECTION IMPORTANTE : Logger l'erreur complète sans bloquer le pipeline  
+                self._logger.error(f"❌ Erreur lors de l'export {fmt} : {str(e)}", exc_info=True)  
+                continue  
+  
+        # 🔧 CORRECTION IMPORTANTE : Log du résultat global  
+        if export_results:  
+            self._logger.info(f"✅ {len(export_results)} export(s) créé(s) avec succès")  
+        else:  
+            self._logger.warning("⚠️ Aucun export n'a pu être créé")  
+        return export_results  
+  
     def _cleanup(self, files: list[Path], dirs: list[Path]) -> None:  
         """Nettoyage rigoureux des fichiers et dossiers temporaires."""  
         for f in files:  
@@ -478,6 +494,14 @@ class Orchestrator:
                 except Exception:   
                     pass  
   
+    def _collect_keyframes(self, file_path: Path, **options) -> list[Keyframe]:  
+        return list(video_analyzer.iter_scene_keyframes(file_path, **options))  
+  
+    @staticmethod  
+    def _count_capture_tags(content: str) -> int:  
+        """Nombre de balises ' изображение ' (= captures à persister)."""  
+        return len(re.findall(CAPTURE_TAG_PATTERN, content))  
+  
     def _integrate_real_captures(self, content: str, keyframes: list[Path]) -> str:  
         """  
         🔧 CORRECTION IMPORTANTE : Gestion des chemins d'images pour exports PDF/DOCX  
@@ -488,11 +512,8 @@ class Orchestrator:
         Note : Utilise le chemin absolu pour que les générateurs PDF/DOCX   
         puissent localiser et embarquer les images correctement.  
         """  
-        # Pattern flexible pour capturer la balise avec espaces possibles  
-        tag_pattern = r"\s? изображение \s?"  
-          
         # On sépare le contenu pour traiter chaque occurrence  
-        parts = re.split(tag_pattern, content)  
+        parts = re.split(CAPTURE_TAG_PATTERN, content)  
           
         if len(parts) == 1:  
             return content  # Pas de balise trouvée  
@@ -0,0 +1,63 @@
+"""
+Tâche Celery pour les exports groupés volumineux (archive ZIP écrite dans DOCS_DIR)
+"""
+import asyncio
+import uuid
+from pathlib import Path
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.mongo import get_database
+from app.db.repositories.export_repo import ExportRepository
+from app.db.repositories.note_repo import NoteRepository
+from app.schemas.export import BulkExportRequest
+from app.services.export.bulk import note_payloads, write_zip
+
+logger = get_logger("tasks.bulk_export")
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Récupère ou crée un event loop pour les appels async."""
+    try:
+        return asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        return loop
+
+
+async def _bulk_export(user_id: str, request: BulkExportRequest) -> str:
+    db = get_database()
+    notes = NoteRepository(db).iter_for_export(
+        user_id, limit=settings.EXPORT_BULK_MAX_NOTES, **request.filters()
+    )
+    file_path = Path(settings.DOCS_DIR) / f"export_{uuid.uuid4().hex}.zip"
+    try:
+        file_size = await write_zip(
+            note_payloads(notes), request.format, file_path, settings.EXPORT_BULK_CONCURRENCY
+        )
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+
+    # Même cycle de vie qu'un export unitaire : téléchargeable puis nettoyé par cleanup_exports_task
+    return await ExportRepository(db).create({
+        "user_id": user_id,
+        "note_id": None,
+        "format": "zip",
+        "file_path": str(file_path),
+        "file_size": file_size,
+    })
+
+
+@celery_app.task(name="bulk_export_task")
+def bulk_export_task(user_id: str, request: dict) -> str:
+    """
+    Export groupé trop long pour une réponse HTTP : l'archive est écrite dans
+    DOCS_DIR et enregistrée comme export "zip" (GET /export/{id}/download).
+    """
+    loop = _get_loop()
+    export_id = loop.run_until_complete(_bulk_export(user_id, BulkExportRequest(**request)))
+    logger.info(f"📦 Export groupé terminé pour l'utilisateur {user_id} : export {export_id}")
+    return export_id
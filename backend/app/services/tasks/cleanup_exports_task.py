@@ -1,4 +1,5 @@
 from pathlib import Path
+import shutil
 import time
 from app.core.celery_app import celery_app
 from app.core.config import settings
@@ -25,5 +26,13 @@ def cleanup_exports_task(max_age_hours: int = 24):
                 file.unlink()
                 count += 1
                 
+    # Pages PDF rastérisées laissées par une extraction interrompue (jamais reprise)
+    raster_root = Path(settings.CACHE_DIR) / "pdf_pages"
+    if raster_root.exists():
+        for raster_dir in raster_root.iterdir():
+            if raster_dir.is_dir() and now - raster_dir.stat().st_mtime > max_age_hours * 3600:
+                shutil.rmtree(raster_dir, ignore_errors=True)
+                count += 1
+
     logger.info(f"🧹 Nettoyage terminé : {count} fichiers supprimés.")
     return f"Deleted {count} files"
\ No newline at end of file
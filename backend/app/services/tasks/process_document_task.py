@@ -10,7 +10,6 @@ from app.core.celery_app import celery_app
 from app.core.logger import get_logger  
 from app.db.repositories.media_repo import MediaRepository  
 from app.db.mongo import get_database  
-from app.services.document.text_extractor import extract_text_from_document  
 from app.services.orchestrator import orchestrator  
   
 logger = get_logger("process_document_task")  
@@ -40,66 +39,50 @@ def process_document_task(
 ) -> bool:  
     """  
     Pipeline de traitement pour documents :  
-    1. Extraction du texte (PDF/DOCX/TXT)  
-    2. Génération de notes via IA  
+    1. Extraction du texte en flux (PDF/DOCX/TXT)  
+    2. Génération de notes par fenêtre (en parallèle) puis fusion  
     3. Structuration et export  
     """  
     loop = _get_loop()  
-      
+  
     try:  
         logger.info("📄 Début traitement document: media_id=%s, path=%s", media_id, file_path)  
-          
+        db = get_database()  
+        media_repo = MediaRepository(db)  
+  
         # Vérification de l'existence du fichier  
         doc_path = Path(file_path)  
         if not doc_path.exists():  
             logger.error("❌ Fichier introuvable: %s", file_path)  
-            loop.run_until_complete(  
-                MediaRepository.update(media_id, {"status": "failed"})  
-            )  
-            return False  
-          
-        # Extraction du texte du document  
-        extracted_text = extract_text_from_document(doc_path)  
-          
-        if not extracted_text or len(extracted_text.strip()) < 50:  
-            logger.error("❌ Texte extrait insuffisant ou vide")  
-            loop.run_until_complete(  
-                MediaRepository.update(media_id, {"status": "failed"})  
-            )  
+            loop.run_until_complete(media_repo.update(media_id, {"status": "failed"}))  
             return False  
-          
-        logger.info("✅ Texte extrait: %d caractères", len(extracted_text))  
-          
-        # Traitement via l'orchestrateur (génération de notes)  
+  
+        # Extraction, génération et export : même orchestrateur que les médias  
         success = loop.run_until_complete(  
-            orchestrator.process_document_text(  
+            orchestrator.process_document(  
                 media_id=media_id,  
-                text_content=extracted_text,  
+                file_path=doc_path,  
                 user_id=user_id,  
                 export_formats=["pdf", "docx", "txt"]  
             )  
         )  
-          
+  
         if success:  
             logger.info("✅ Document traité avec succès: media_id=%s", media_id)  
-            db = get_database()  
-            media_repo = MediaRepository(db)  
             loop.run_until_complete(media_repo.update(media_id, {"status": "ready"}))  
             return True  
         else:  
             logger.error("❌ Échec du traitement document: media_id=%s", media_id)  
-            db = get_database()  
-            media_repo = MediaRepository(db)  
             loop.run_until_complete(media_repo.update(media_id, {"status": "failed"}))  
             return False  
-              
+  
     except (InternalServerError, RateLimitError, APIConnectionError) as exc:  
         logger.warning("⚠️ Erreur API récupérable, retry: %s", exc)  
         raise self.retry(exc=exc, countdown=60 * (self.request.retries + 1))  
-          
+  
     except Exception as exc:  
         logger.error("❌ ERREUR FATALE traitement document %s: %s", media_id, exc)  
         db = get_database()  
         media_repo = MediaRepository(db)  
         loop.run_until_complete(media_repo.update(media_id, {"status": "error"}))  
-        return False
\ No newline at end of file
+        return False  
@@ -36,7 +36,13 @@ def _get_loop() -> asyncio.AbstractEventLoop:
     max_retries=3,
     default_retry_delay=60,
 )
-def process_full_media_task(self, media_id: str, file_path: str, user_id: Optional[str] = None):
+def process_full_media_task(
+    self,
+    media_id: str,
+    file_path: str,
+    user_id: Optional[str] = None,
+    ocr_engine: Optional[str] = None,
+):
     logger.info("[JOB START] media_id=%s", media_id)
 
     path = Path(file_path)
@@ -50,7 +56,9 @@ def process_full_media_task(self, media_id: str, file_path: str, user_id: Option
 
     try:
         result = loop.run_until_complete(
-            orchestrator.process_full_media(media_id=media_id, file_path=path, user_id=user_id)
+            orchestrator.process_full_media(
+                media_id=media_id, file_path=path, user_id=user_id, ocr_engine=ocr_engine
+            )
         )
 
         if result:
@@ -13,9 +13,15 @@ from celery.signals import worker_process_init, worker_process_shutdown
 from app.core.celery_app import celery_app
 from app.core.logger import get_logger
 from app.db.mongo import close_mongo_connection, connect_to_mongo
+from app.services.document.text_extractor import close_pdf_pool
+from app.services.export.render_pool import close_render_pool
+from app.services.ia.local.ollama_client import ollama_client
+from app.services.media.ocr_engine import close_ocr_engines, warm_up_ocr
 
 # Enregistrement des tâches (important: import side-effect)
 from app.services.tasks.process_full_media_task import process_full_media_task  # noqa: F401
+from app.services.tasks.process_document_task import process_document_task  # noqa: F401
+from app.services.tasks.bulk_export_task import bulk_export_task  # noqa: F401
 
 logger = get_logger("celery.worker")
 
@@ -39,15 +45,26 @@ def _run(coro) -> None:
 def init_worker(**_kwargs):
     _run(connect_to_mongo())
     logger.info("[WORKER] Connexion MongoDB établie.")
+    # Modèle OCR (Tesseract ou PaddleOCR) chargé une fois par process, pas à la première image
+    warm_up_ocr()
 
 
 @worker_process_shutdown.connect
 def shutdown_worker(**_kwargs):
-    try:
-        _run(close_mongo_connection())
-        logger.info("[WORKER] Connexion MongoDB fermée.")
-    except Exception as exc:
-        logger.error("Erreur shutdown worker: %s", exc)
+    # Chaque ressource est libérée indépendamment : un échec n'empêche pas les suivantes
+    steps = [
+        ("MongoDB", lambda: _run(close_mongo_connection())),
+        ("Ollama", lambda: _run(ollama_client.close())),
+        ("OCR", close_ocr_engines),
+        ("pool PDF", close_pdf_pool),
+        ("pool d'exports", close_render_pool),
+    ]
+    for name, close in steps:
+        try:
+            close()
+            logger.info("[WORKER] %s fermé.", name)
+        except Exception as exc:
+            logger.error("Erreur shutdown worker (%s): %s", name, exc)
 
 
 @celery_app.task(name="check_health")
@@ -4,6 +4,8 @@ Gestionnaire de fichiers - Utilitaires pour la manipulation de fichiers
 from pathlib import Path
 from typing import Optional
 import mimetypes
+import os
+import tempfile
 from app.core.logger import get_logger
 
 class FileManager:
@@ -49,6 +51,21 @@ class FileManager:
         path.mkdir(parents=True, exist_ok=True)
         return path
     
+    def write_atomic(self, path: Path, data: bytes) -> None:
+        """
+        Écrit `data` dans `path` via un fichier temporaire du même dossier puis un renommage :
+        un lecteur ou un écrivain concurrent ne voit jamais de fichier partiel
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+    
     def sanitize_filename(self, filename: str) -> str:
         """Nettoie un nom de fichier pour éviter les caractères problématiques"""
         import re
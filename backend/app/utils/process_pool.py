@@ -0,0 +1,150 @@
+"""
+Pools de process partagés (extraction PDF, OCR, rendu des exports).
+
+Chaque pool est créé à la première utilisation puis réutilisé par le process
+courant. Un process enfant de Celery (prefork) est "daemon" : ProcessPoolExecutor
+y refuse de créer des process, et des threads n'y apporteraient aucun parallélisme
+pour du Python pur (PyPDF2, construction des documents) à cause du GIL. On y
+utilise donc le pool de billiard (le multiprocessing de Celery), qui l'autorise,
+présenté derrière l'interface Executor : les appelants (submit, wait,
+asyncio.wrap_future) ne voient pas la différence.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Set, Tuple
+
+import billiard
+
+from app.core.logger import get_logger
+
+logger = get_logger("process_pool")
+
+
+class _BilliardExecutor(Executor):
+    """billiard.Pool avec l'interface concurrent.futures.Executor."""
+
+    def __init__(self, max_workers: int, initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        self._pool = billiard.Pool(processes=max_workers, initializer=initializer, initargs=initargs)
+        self._futures: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        with self._lock:
+            self._futures.add(future)
+        self._pool.apply_async(
+            fn, args, kwargs,
+            callback=lambda result: self._settle(future, result, None),
+            # billiard transmet un ExceptionInfo : l'exception d'origine est dans `.exception`
+            error_callback=lambda einfo: self._settle(future, None, getattr(einfo, "exception", einfo)),
+        )
+        return future
+
+    def _settle(self, future: Future, result: Any, exc: Optional[BaseException]) -> None:
+        # Appelé par le thread de résultats de billiard
+        with self._lock:
+            if future not in self._futures:
+                return  # Déjà réglé par terminate_workers
+            self._futures.discard(future)
+        if not future.set_running_or_notify_cancel():
+            return  # Annulé entre-temps : le résultat est ignoré
+        if exc is None:
+            future.set_result(result)
+        else:
+            future.set_exception(exc)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            with self._lock:
+                pending, self._futures = self._futures, set()
+            for future in pending:
+                future.cancel()
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        if wait:
+            self._pool.join()
+
+    def terminate_workers(self) -> None:
+        """Tue les process ; les tâches en cours ou en attente échouent (BrokenProcessPool)."""
+        with self._lock:
+            pending, self._futures = self._futures, set()
+        self._pool.terminate()
+        for future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(BrokenProcessPool("Process du pool arrêtés"))
+
+
+def create_process_pool(
+    max_workers: int, initializer: Optional[Callable] = None, initargs: Tuple = ()
+) -> Executor:
+    """Pool de `max_workers` process, y compris depuis un process daemon (worker Celery)."""
+    if multiprocessing.current_process().daemon:
+        return _BilliardExecutor(max_workers, initializer=initializer, initargs=initargs)
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs)
+
+
+class LazyProcessPool:
+    def __init__(self, name: str, initializer: Optional[Callable] = None):
+        """
+        Args:
+            name: Nom du pool dans les logs
+            initializer: Fonction exécutée au démarrage de chaque process
+        """
+        self.name = name
+        self.initializer = initializer
+        self.size = 0
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def get(self, workers: int = 0, initargs: Tuple = ()) -> Executor:
+        """
+        Pool du process courant, créé au premier appel.
+
+        Un pool cassé (process tué en plein travail, OOM sur une grosse page) refuse
+        toute nouvelle tâche (BrokenProcessPool) : il est arrêté et remplacé. Le pool
+        billiard remplace lui-même un process perdu (la tâche en cours échoue).
+        `workers` (0 = un par cœur) et `initargs` ne servent qu'à la création.
+        """
+        with self._lock:
+            if self._executor is not None and getattr(self._executor, "_broken", False):
+                logger.warning("♻️ Pool %s cassé (process perdu) : recréation", self.name)
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._executor is None:
+                self.size = workers or os.cpu_count() or 1
+                self._executor = create_process_pool(self.size, self.initializer, initargs)
+                logger.info("🧵 Pool %s initialisé (%d workers)", self.name, self.size)
+            return self._executor
+
+    def terminate(self) -> None:
+        """
+        Tue les process du pool (tâche bloquée au-delà de son délai).
+
+        Les tâches en cours ou en attente échouent avec BrokenProcessPool ; le
+        prochain `get` crée un nouveau pool.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        logger.warning("♻️ Pool %s arrêté : process tués", self.name)
+        if isinstance(executor, _BilliardExecutor):
+            executor.terminate_workers()
+            return
+        # ProcessPoolExecutor (< 3.14) : la mort d'un process casse le pool, qui fait
+        # échouer toutes ses tâches
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
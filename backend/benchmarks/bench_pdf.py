@@ -0,0 +1,79 @@
+"""
+Benchmark de l'extraction de texte PDF (séquentielle vs plages de pages en parallèle).
+
+Usage:
+    python -m benchmarks.bench_pdf [chemin.pdf] [--pages 600] [--pages-per-task 8]
+
+Sans PDF fourni, un polycopié synthétique (pages de texte dense) est généré.
+Pour le chiffre de référence, utiliser un vrai polycopié de plusieurs centaines de pages.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import PyPDF2
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from app.core.config import settings
+from app.services.document import text_extractor
+
+
+def make_synthetic_reader(path: Path, pages: int = 600) -> Path:
+    """Génère un polycopié : titre + ~45 lignes de texte par page."""
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    for page in range(1, pages + 1):
+        pdf.setFont("Helvetica-Bold", 16)
+        pdf.drawString(60, 790, f"Chapitre {page // 20 + 1} - Section {page}")
+        pdf.setFont("Helvetica", 10)
+        for line in range(45):
+            pdf.drawString(60, 760 - line * 15, f"Ligne {line + 1} : la tension U = R x I vaut {page * line % 230} V dans ce montage.")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def legacy_extract(path: Path) -> int:
+    """Ancienne boucle : PdfReader.pages une par une dans le process appelant."""
+    with open(path, "rb") as file:
+        return sum(1 for page in PyPDF2.PdfReader(file).pages if page.extract_text() is not None)
+
+
+def _timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    first_at = None
+    n = 0
+    for _ in fn():
+        if first_at is None:
+            first_at = time.perf_counter() - start
+        n += 1
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {n:>5} pages  {elapsed:7.2f}s  ({n / elapsed:6.0f} pages/s, 1re page à {first_at or 0:.2f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf", nargs="?", type=Path)
+    parser.add_argument("--pages", type=int, default=600, help="taille du PDF synthétique")
+    parser.add_argument("--pages-per-task", type=int, default=settings.PDF_PAGES_PER_TASK)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_pdf_"))
+    try:
+        pdf = args.pdf or make_synthetic_reader(workdir / "polycopie.pdf", pages=args.pages)
+        print(f"PDF: {pdf} ({pdf.stat().st_size / 1e6:.1f} Mo), {os.cpu_count()} cœurs\n")
+
+        _timed("séquentiel (PdfReader.pages)", lambda: range(legacy_extract(pdf)))
+        _timed("plages parallèles (pool)", lambda: text_extractor.iter_pdf_pages(pdf, args.pages_per_task))
+    finally:
+        text_extractor.close_pdf_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark de l'analyse vidéo (extraction de keyframes et détection de slides).
+
+Usage:
+    python -m benchmarks.bench_video [chemin_video.mp4] [--interval 2]
+
+Sans vidéo fournie, un cours synthétique 1080p (slides + curseur animé) est généré.
+Pour le chiffre de référence, utiliser un vrai cours d'une heure en 1080p.
+"""
+from __future__ import annotations
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.services.media.video_analyzer import video_analyzer
+
+
+def make_synthetic_lecture(path: Path, seconds: int = 120, fps: int = 25, size=(1920, 1080), slide_every: int = 20) -> Path:
+    """Génère une vidéo de type cours : slides fixes + petit élément animé."""
+    width, height = size
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    slide = None
+    for i in range(seconds * fps):
+        if i % (slide_every * fps) == 0:
+            slide = np.full((height, width, 3), 245, dtype=np.uint8)
+            cv2.putText(slide, f"Chapitre {i // (slide_every * fps) + 1}", (120, 200), cv2.FONT_HERSHEY_SIMPLEX, 3, (30, 30, 30), 6)
+            for line in range(6):
+                y = 350 + line * 110
+                cv2.putText(slide, f"Point {line + 1} : texte {rng.integers(1000)}", (160, y), cv2.FONT_HERSHEY_SIMPLEX, 2, (60, 60, 60), 3)
+        frame = slide.copy()
+        x = 200 + (i * 7) % (width - 400)
+        cv2.circle(frame, (x, height - 120), 20, (0, 0, 255), -1)  # "pointeur" de l'orateur
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def legacy_extract_keyframes(video_path: Path, output_dir: Path, interval_seconds: int) -> int:
+    """Ancienne boucle : `cap.read()` (décodage + conversion BGR) sur chaque frame."""
+    cap = cv2.VideoCapture(str(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_interval = int(fps * interval_seconds)
+    count = saved = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if count % frame_interval == 0:
+            cv2.imwrite(str(output_dir / f"legacy_{saved:04d}.jpg"), frame)
+            saved += 1
+        count += 1
+    cap.release()
+    return saved
+
+
+def legacy_extract_slides(video_path: Path, output_dir: Path, similarity_threshold: float = 0.95) -> int:
+    """Ancienne détection : matchTemplate pleine résolution sur chaque paire de frames + copie."""
+    cap = cv2.VideoCapture(str(video_path))
+    prev = None
+    saved = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if prev is not None:
+            gray1 = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
+            gray2 = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if cv2.matchTemplate(gray1, gray2, cv2.TM_CCOEFF_NORMED)[0][0] < similarity_threshold:
+                cv2.imwrite(str(output_dir / f"legacy_slide_{saved:04d}.jpg"), frame)
+                saved += 1
+        prev = frame.copy()
+    cap.release()
+    return saved
+
+
+def _timed(label: str, fn, duration_s: float, fps: float = 25.0) -> None:
+    start = time.perf_counter()
+    n = fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<32} {n:>5} images  {elapsed:7.2f}s  "
+        f"({duration_s / elapsed:6.1f}x temps réel, {duration_s * fps / elapsed:7.0f} fps vidéo)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("video", nargs="?", type=Path)
+    parser.add_argument("--interval", type=int, default=2)
+    parser.add_argument("--seconds", type=int, default=120, help="durée de la vidéo synthétique")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_video_"))
+    try:
+        video = args.video or make_synthetic_lecture(workdir / "lecture.mp4", seconds=args.seconds)
+        cap = cv2.VideoCapture(str(video))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+        cap.release()
+        print(f"Vidéo: {video} ({duration:.0f}s)\n")
+
+        out = workdir / "frames"
+        out.mkdir()
+        _timed("read() sur chaque frame", lambda: legacy_extract_keyframes(video, out, args.interval), duration, fps)
+        _timed("grab()/retrieve() échantillonné", lambda: len(video_analyzer.extract_keyframes(video, out, args.interval)), duration, fps)
+        _timed("idem + réduction 1280px", lambda: len(video_analyzer.extract_keyframes(video, out, args.interval, max_width=1280)), duration, fps)
+        print()
+        _timed("slides: matchTemplate 1080p", lambda: legacy_extract_slides(video, out), duration, fps)
+        _timed("slides: SSIM vignettes 0.5s", lambda: len(video_analyzer.extract_slides(video, out)), duration, fps)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
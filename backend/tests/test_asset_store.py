@@ -0,0 +1,35 @@
+import cv2
+import numpy as np
+
+from app.services.media.asset_store import AssetStore
+
+
+def _slide(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (720, 1920, 3), dtype=np.uint8)
+
+
+def test_identical_frames_are_stored_once_and_hard_linked(tmp_path):
+    store = AssetStore(root=tmp_path / "assets", max_width=1280, max_bytes=10_000_000)
+    slide, other = _slide(1), _slide(2)
+
+    paths = store.persist([slide, other, slide.copy()], tmp_path / "notes_assets" / "m1")
+
+    assert paths[0] == paths[2] != paths[1]
+    assert len(list((tmp_path / "assets").rglob("*.jpg"))) == 2
+    assert paths[0].samefile(store.put(slide))
+
+    # Une autre note qui réutilise la même slide ne réécrit rien dans le stock
+    again = store.persist([slide], tmp_path / "notes_assets" / "m2")
+    assert again[0].samefile(paths[0])
+    assert len(list((tmp_path / "assets").rglob("*.jpg"))) == 2
+
+
+def test_encode_caps_width_and_size(tmp_path):
+    store = AssetStore(root=tmp_path, max_width=640, max_bytes=60_000, jpeg_quality=95)
+
+    data = store.encode(_slide(3))
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    assert decoded.shape[:2] == (240, 640)
+    assert len(data) <= 60_000
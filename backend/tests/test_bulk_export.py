@@ -0,0 +1,68 @@
+import asyncio
+import io
+import zipfile
+
+from app.services.export import bulk
+from app.services.export.bulk import entry_name, iter_zip, write_zip
+
+
+async def _notes(n, title="Cours"):
+    for i in range(n):
+        yield {"title": title if i % 2 else f"{title} {i}", "content": f"# Chapitre {i}\n\nContenu {i}."}
+
+
+def _collect(notes, fmt, concurrency=3):
+    async def run():
+        return [chunk async for chunk in iter_zip(notes, fmt, concurrency)]
+    return asyncio.run(run())
+
+
+def _fail_on_second(note_data):
+    if note_data["title"] == "Cours 2":
+        raise ValueError("rendu impossible")
+    return note_data["content"].encode("utf-8")
+
+
+def test_entry_names_are_safe_and_unique():
+    used = set()
+    assert entry_name("Chap. 1 : a/b?", "pdf", used) == "Chap. 1 a b.pdf"
+    assert entry_name("chap. 1 : A/B?", "pdf", used) == "chap. 1 A B (2).pdf"
+    assert entry_name("", "txt", used) == "note.txt"
+
+
+def test_zip_is_streamed_entry_by_entry():
+    chunks = _collect(_notes(6), "txt")
+
+    # Une sortie par fichier terminé, plus le répertoire central
+    assert len(chunks) == 7
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    names = sorted(archive.namelist())
+    assert names == sorted(["Cours 0.txt", "Cours.txt", "Cours 2.txt", "Cours (2).txt", "Cours 4.txt", "Cours (3).txt"])
+    # Écriture sans seek : taille et CRC après les données (data descriptor)
+    assert all(info.flag_bits & 0x08 for info in archive.infolist())
+    assert "Contenu 2." in archive.read("Cours 2.txt").decode("utf-8")
+
+
+def test_binary_formats_are_stored_without_recompression():
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(_collect(_notes(2), "pdf"))))
+    assert {info.compress_type for info in archive.infolist()} == {zipfile.ZIP_STORED}
+    assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+
+def test_failed_note_is_reported_without_breaking_the_archive(monkeypatch):
+    monkeypatch.setitem(bulk.RENDERERS, "txt", _fail_on_second)
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(_collect(_notes(4), "txt"))))
+
+    assert "Cours 2.txt" not in archive.namelist()
+    assert len(archive.namelist()) == 4  # 3 notes + ERREURS.txt
+    assert "rendu impossible" in archive.read("ERREURS.txt").decode("utf-8")
+
+
+def test_write_zip_to_file(tmp_path):
+    path = tmp_path / "export.zip"
+    size = asyncio.run(write_zip(_notes(3), "docx", path, concurrency=2))
+
+    assert size == path.stat().st_size
+    assert len(zipfile.ZipFile(path).namelist()) == 3
@@ -0,0 +1,80 @@
+from app.services.ia.tokens import estimate_tokens
+from app.services.nlp.document_structurer import DocumentStructurer
+from app.services.nlp.document_windows import iter_windows
+
+
+def _paragraph(i, words=40):
+    return " ".join(f"mot{i}" for _ in range(words)) + "."
+
+
+def test_windows_close_at_headings_and_respect_budget():
+    blocks = ["# Chapitre 1"] + [_paragraph(i) for i in range(6)]
+    blocks += ["# Chapitre 2"] + [_paragraph(i) for i in range(6, 8)]
+    blocks += [_paragraph(99, words=600)]  # Bloc plus long qu'une fenêtre
+
+    windows = list(iter_windows(iter(blocks), max_tokens=250, min_tokens=30))
+
+    assert all(estimate_tokens(w) <= 250 for w in windows)
+    assert any(w.startswith("# Chapitre 2") for w in windows)
+    assert "\n\n".join(windows).count("mot99") == 600
+
+
+def test_small_sections_stay_together():
+    blocks = ["# A", "court.", "# B", "court aussi."]
+
+    assert list(iter_windows(blocks, max_tokens=1000, min_tokens=500)) == ["# A\n\ncourt.\n\n# B\n\ncourt aussi."]
+
+
+def test_merge_notes_groups_sections_by_heading():
+    parts = [
+        "# Électricité\n\nIntro.\n\n## Loi d'Ohm\n\nU = RI\n\n## Résumé\n\n- point 1",
+        "# Électricité (suite)\n\n## Puissance\n\nP = UI\n\n## 📌 Résumé\n\n- point 2",
+    ]
+
+    merged = DocumentStructurer().merge_notes(parts)
+
+    assert merged.startswith("# Électricité\n\nIntro.")
+    assert merged.count("# Électricité") == 1
+    assert merged.index("## Loi d'Ohm") < merged.index("## Résumé") < merged.index("## Puissance")
+    assert "- point 1\n\n- point 2" in merged
+
+
+def test_merge_notes_attaches_window_preamble_to_previous_section():
+    parts = [
+        "# Mécanique\n\nIntro.\n\n## Forces\n\nF = ma",
+        "# Mécanique (suite)\n\nSuite des forces.\n\n## Énergie\n\nE = mc²",
+    ]
+
+    merged = DocumentStructurer().merge_notes(parts)
+
+    assert merged.startswith("# Mécanique\n\nIntro.\n\n## Forces")
+    assert merged.index("F = ma") < merged.index("Suite des forces.") < merged.index("## Énergie")
+
+
+def test_merge_notes_keeps_window_preamble_out_of_the_summary():
+    # Sortie typique du LLM : chaque fenêtre se termine par son résumé
+    parts = [
+        "# ⚙️ Le moteur thermique\n\n"
+        "## 1. Le cycle à quatre temps\n\n"
+        "Le piston descend et **aspire** le mélange air-carburant.\n\n"
+        "> ⚠️ **IMPORTANT** : ne jamais démonter une culasse chaude.\n\n"
+        "## 📌 Résumé\n\n"
+        "- Admission, compression, explosion, échappement.",
+        "# ⚙️ Le moteur thermique (suite)\n\n"
+        "Lors de la compression, les deux soupapes restent fermées.\n\n"
+        "## 2. La distribution\n\n"
+        "La courroie synchronise vilebrequin et arbre à cames.\n\n"
+        "## Points clés à retenir\n\n"
+        "- Remplacer la courroie tous les 100 000 km.",
+        "Le tendeur se règle moteur froid.\n\n"
+        "## 📌 Résumé\n\n"
+        "- La distribution se contrôle régulièrement.",
+    ]
+
+    merged = DocumentStructurer().merge_notes(parts)
+    cycle, summary = merged.index("## 1. Le cycle"), merged.index("## 📌 Résumé")
+    distribution = merged.index("## 2. La distribution")
+
+    assert cycle < merged.index("les deux soupapes restent fermées") < summary
+    assert merged.index("- Admission") < merged.index("- La distribution se contrôle") < distribution
+    assert distribution < merged.index("Le tendeur se règle") < merged.index("## Points clés")
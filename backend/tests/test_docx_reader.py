@@ -0,0 +1,52 @@
+from docx import Document
+
+from app.services.document.docx_reader import iter_docx_blocks
+
+
+def _make_docx(path):
+    doc = Document()
+    doc.add_heading("Électrocinétique", level=0)
+    doc.add_heading("Loi d'Ohm", level=1)
+    doc.add_paragraph("La tension est proportionnelle au courant.")
+    doc.add_paragraph("U = R x I", style="List Bullet")
+    doc.add_paragraph("")
+    table = doc.add_table(rows=3, cols=2)
+    for row, values in zip(table.rows, [("Grandeur", "Unité"), ("Tension", "volt"), ("Courant", "ampère | A")]):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    nested = table.rows[1].cells[1].add_table(rows=1, cols=2)
+    nested.rows[0].cells[0].text = "mV"
+    nested.rows[0].cells[1].text = "kV"
+    doc.add_heading("Puissance", level=2)
+    doc.add_paragraph("P = U x I")
+    doc.save(path)
+    return path
+
+
+def test_blocks_keep_headings_lists_and_tables_in_order(tmp_path):
+    blocks = list(iter_docx_blocks(_make_docx(tmp_path / "cours.docx")))
+
+    assert blocks == [
+        "# Électrocinétique",
+        "# Loi d'Ohm",
+        "La tension est proportionnelle au courant.",
+        "- U = R x I",
+        "| Grandeur | Unité |\n"
+        "| --- | --- |\n"
+        "| Tension | volt mV ; kV |\n"
+        "| Courant | ampère \\| A |",
+        "## Puissance",
+        "P = U x I",
+    ]
+
+
+def test_large_document_is_read_incrementally(tmp_path):
+    doc = Document()
+    for i in range(3000):
+        doc.add_paragraph(f"Paragraphe {i}")
+    doc.save(tmp_path / "gros.docx")
+
+    blocks = iter_docx_blocks(tmp_path / "gros.docx")
+
+    assert next(blocks) == "Paragraphe 0"
+    assert sum(1 for _ in blocks) == 2999
@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from app.api.v1.routes import export as export_routes
+from app.db.repositories import note_repo
+from app.db.repositories.note_repo import NoteRepository
+from app.schemas.note import NoteUpdate
+from app.services.export import cache_key
+from app.services.export.cache_key import export_content_hash
+
+NOTE_ID = str(ObjectId())
+USER = SimpleNamespace(id=str(ObjectId()))
+NOTE = SimpleNamespace(user_id=USER.id, title="Titre", content="# Cours\nTexte")
+
+
+class _FakeNoteRepository:
+    def __init__(self, db):
+        pass
+
+    async def get_by_id(self, note_id):
+        return NOTE if note_id == NOTE_ID else None
+
+
+class _FakeExportRepository:
+    """Collection "exports" en mémoire."""
+
+    exports = {}
+    invalidated = []
+
+    def __init__(self, db):
+        pass
+
+    async def find_cached(self, note_id, user_id, content_hash):
+        return next((e for e in self.exports.values() if e.content_hash == content_hash), None)
+
+    async def create(self, export_data):
+        export_id = str(ObjectId())
+        self.exports[export_id] = SimpleNamespace(id=export_id, **export_data)
+        return export_id
+
+    async def get_by_id(self, export_id):
+        return self.exports[export_id]
+
+    async def invalidate_note(self, note_id):
+        self.invalidated.append(note_id)
+        return 1
+
+
+def _export_route(monkeypatch, tmp_path):
+    """Route POST /export/{note_id} avec des dépôts factices ; renvoie la liste des rendus."""
+    _FakeExportRepository.exports = {}
+    renders = []
+
+    async def fake_generate_pdf(note_data):
+        path = tmp_path / f"export_{len(renders)}.pdf"
+        path.write_bytes(b"%PDF")
+        renders.append(path)
+        return path, 4
+
+    monkeypatch.setattr(export_routes, "NoteRepository", _FakeNoteRepository)
+    monkeypatch.setattr(export_routes, "ExportRepository", _FakeExportRepository)
+    monkeypatch.setattr(export_routes, "generate_pdf", fake_generate_pdf)
+    return renders
+
+
+def _export():
+    return asyncio.run(export_routes.export_note(NOTE_ID, "pdf", current_user=USER, db=None))
+
+
+def test_hash_is_stable_for_same_note():
+    assert export_content_hash("Titre", "# Cours\nTexte", "pdf") == export_content_hash("Titre", "# Cours\nTexte", "pdf")
+
+
+def test_hash_changes_with_content_title_and_format():
+    base = export_content_hash("Titre", "Texte", "pdf")
+    assert export_content_hash("Titre", "Texte modifié", "pdf") != base
+    assert export_content_hash("Autre titre", "Texte", "pdf") != base
+    assert export_content_hash("Titre", "Texte", "docx") != base
+    # Le séparateur empêche deux découpages titre/contenu de collisionner
+    assert export_content_hash("ab", "c", "txt") != export_content_hash("a", "bc", "txt")
+
+
+def test_hash_changes_with_exporter_version(monkeypatch):
+    before = export_content_hash("Titre", "Texte", "pdf")
+    monkeypatch.setitem(cache_key.EXPORTER_VERSIONS, "pdf", cache_key.EXPORTER_VERSIONS["pdf"] + 1)
+    assert export_content_hash("Titre", "Texte", "pdf") != before
+
+
+def test_route_reuses_cached_export(monkeypatch, tmp_path):
+    renders = _export_route(monkeypatch, tmp_path)
+
+    first = _export()
+    second = _export()
+
+    assert len(renders) == 1
+    assert second.id == first.id
+    assert second.content_hash == export_content_hash(NOTE.title, NOTE.content, "pdf")
+
+
+def test_route_renders_again_when_cached_file_is_missing(monkeypatch, tmp_path):
+    renders = _export_route(monkeypatch, tmp_path)
+
+    first = _export()
+    renders[0].unlink()
+    second = _export()
+
+    assert len(renders) == 2
+    assert second.id != first.id
+    assert second.file_path == str(renders[1])
+
+
+class _FakeNotesCollection:
+    async def find_one_and_update(self, query, update, return_document=None):
+        return {
+            "_id": query["_id"], "user_id": ObjectId(USER.id), "transcription_id": ObjectId(),
+            "title": "Titre", "content": "Texte", **update["$set"],
+        }
+
+
+def test_note_update_invalidates_cached_exports(monkeypatch):
+    _FakeExportRepository.invalidated = []
+    monkeypatch.setattr(note_repo, "ExportRepository", _FakeExportRepository)
+    repo = NoteRepository({"notes": _FakeNotesCollection()})
+
+    note = asyncio.run(repo.update(NOTE_ID, NoteUpdate(content="Texte modifié")))
+
+    assert note.content == "Texte modifié"
+    assert _FakeExportRepository.invalidated == [NOTE_ID]
@@ -0,0 +1,70 @@
+import io
+import time
+
+import pytest
+from docx import Document
+
+from app.services.export.docx import render_docx_bytes
+from app.services.export.pdf import render_pdf_bytes
+from app.services.export.streaming import RangeNotSatisfiable, content_etag, iter_bytes, iter_encoded, parse_range
+from app.services.export.txt import txt_exporter
+
+NOTE = {"title": "Cours", "content": "# Cours\n\n\n\nIntro.\n- Point\n![Schéma](/nulle/part.jpg)\n\n\n"}
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=10-", (10, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("bytes=0-1,5-9", None),   # Multi-plages : fichier entier
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5-2", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 1000)
+
+
+def test_iter_bytes_covers_range_exactly():
+    data = bytes(range(256)) * 10
+    assert b"".join(iter_bytes(data, 0, len(data) - 1, 300)) == data
+    assert b"".join(iter_bytes(data, 7, 1000, 64)) == data[7:1001]
+    assert all(len(chunk) <= 64 for chunk in iter_bytes(data, 7, 1000, 64))
+
+
+def test_txt_stream_matches_rendered_file(tmp_path):
+    path = tmp_path / "note.txt"
+    txt_exporter.render(NOTE, path)
+    streamed = b"".join(iter_encoded(txt_exporter.iter_text(NOTE), 8)).decode("utf-8")
+
+    assert streamed == path.read_text(encoding="utf-8")
+    assert "[ILLUSTRATION : Schéma]" in streamed
+    assert "\n\n\n" not in streamed
+
+
+def test_binary_formats_render_in_memory():
+    assert render_pdf_bytes(NOTE).startswith(b"%PDF")
+    texts = [p.text for p in Document(io.BytesIO(render_docx_bytes(NOTE))).paragraphs]
+    assert "Intro." in texts and "Point" in texts
+
+
+@pytest.mark.parametrize("render", [render_pdf_bytes, render_docx_bytes])
+def test_binary_renders_are_deterministic(render):
+    # Une reprise de téléchargement relance le rendu : les octets doivent être identiques
+    first = render(NOTE)
+    time.sleep(2.1)  # Résolution des dates du ZIP : 2 s
+    assert render(NOTE) == first
+
+
+def test_if_range_serves_range_only_for_current_etag():
+    etag = content_etag(b"contenu")
+    assert parse_range("bytes=0-9", 1000, if_range=etag, etag=etag) == (0, 9)
+    assert parse_range("bytes=0-9", 1000, if_range='"autre"', etag=etag) is None
+    assert parse_range("bytes=0-9", 1000, if_range="Wed, 21 Oct 2026 07:28:00 GMT", etag=etag) is None
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.services.export import pdf as pdf_module
+from app.services.media.image_derivatives import ImageDerivatives
+
+
+def _capture(path, width, height=None, seed=0):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (height or width * 9 // 16, width, 3), dtype=np.uint8)
+    cv2.imwrite(str(path), image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    return path
+
+
+@pytest.fixture
+def derivatives(tmp_path):
+    return ImageDerivatives(tmp_path / "derivatives", dpi=150, jpeg_quality=80)
+
+
+def test_large_capture_is_scaled_to_display_width(derivatives, tmp_path):
+    source = _capture(tmp_path / "frame.jpg", 3840)
+
+    path = derivatives.for_width(source, 450)
+
+    assert path != source
+    assert cv2.imread(str(path)).shape[1] == derivatives.target_pixels(450) == 938
+    assert path.stat().st_size < source.stat().st_size
+
+
+def test_derivative_is_cached(derivatives, tmp_path):
+    source = _capture(tmp_path / "frame.jpg", 2000)
+    first = derivatives.for_width(source, 360)
+    mtime = first.stat().st_mtime_ns
+
+    assert derivatives.for_width(source, 360) == first
+    assert first.stat().st_mtime_ns == mtime
+    # Une autre largeur affichée donne un autre dérivé
+    assert derivatives.for_width(source, 200) != first
+
+
+def test_small_or_unreadable_source_is_kept(derivatives, tmp_path):
+    small = _capture(tmp_path / "small.jpg", 640)
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"pas une image")
+
+    assert derivatives.for_width(small, 450) == small
+    assert derivatives.for_width(broken, 450) == broken
+    assert derivatives.for_width(tmp_path / "absent.jpg", 450) == tmp_path / "absent.jpg"
+
+
+def test_pdf_embeds_derivatives(derivatives, tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_module, "image_derivatives", derivatives)
+    sources = [_capture(tmp_path / f"frame{i}.jpg", 3840, seed=i) for i in range(3)]
+    content = "\n".join(f"![Capture {i}]({path})" for i, path in enumerate(sources))
+
+    data = pdf_module.render_pdf_bytes({"title": "Cours", "content": content})
+
+    assert data.startswith(b"%PDF")
+    assert len(data) < sum(path.stat().st_size for path in sources) / 4
@@ -0,0 +1,82 @@
+import asyncio
+
+from docx import Document
+
+from app.services.export.docx import docx_exporter, generate_docx
+from app.services.export.pdf import generate_pdf, pdf_exporter
+from app.services.export.txt import generate_txt, txt_exporter
+from app.services.nlp.document_structurer import DocumentStructurer
+from app.services.nlp.markdown_ast import (
+    BLANK, BULLET, HEADING, IMAGE, NUMBERED, PARAGRAPH, QUOTE, parse_markdown,
+)
+
+NOTE = (
+    "# Électricité\n"
+    "Intro **importante**.\n"
+    "\n"
+    "## Loi d'Ohm\n"
+    "> ⚠️ **IMPORTANT** : couper le courant\n"
+    "- U = R x I\n"
+    "* P = U x I\n"
+    "2. Mesurer\n"
+    "3.5 V aux bornes\n"
+    "![Illustration technique 1](/nulle/part.jpg)\n"
+    "#### Détail\n"
+    "# Magnétisme\n"
+    "Fin."
+)
+
+
+def test_blocks_kinds_and_fields():
+    blocks = parse_markdown(NOTE)
+
+    assert [b.kind for b in blocks] == [
+        HEADING, PARAGRAPH, BLANK, HEADING, QUOTE, BULLET, BULLET, NUMBERED, PARAGRAPH, IMAGE, HEADING, HEADING, PARAGRAPH,
+    ]
+    assert (blocks[3].text, blocks[3].level) == ("Loi d'Ohm", 2)
+    assert blocks[4].text == "⚠️ **IMPORTANT** : couper le courant"
+    assert (blocks[7].text, blocks[7].level) == ("Mesurer", 2)
+    assert (blocks[9].text, blocks[9].src) == ("Illustration technique 1", "/nulle/part.jpg")
+    assert blocks[10].level == 4
+    assert "\n".join(b.raw for b in blocks) == NOTE
+
+
+def test_structurer_sections_from_blocks():
+    structured = DocumentStructurer().structure_for_export(NOTE)
+
+    assert structured["title"] == "Électricité"
+    assert [s["title"] for s in structured["sections"]] == ["Électricité", "Magnétisme"]
+    assert structured["sections"][0]["content"].startswith("Intro **importante**.")
+    assert structured["blocks"] is parse_markdown(NOTE)
+
+
+def test_all_formats_share_one_parse(monkeypatch, tmp_path):
+    for exporter in (pdf_exporter, docx_exporter, txt_exporter):
+        monkeypatch.setattr(exporter, "output_dir", tmp_path)
+    parse_markdown.cache_clear()
+    # Blocs analysés une fois par le structureur puis envoyés au pool de rendu
+    note = {"title": "Cours", "content": NOTE, "blocks": parse_markdown(NOTE)}
+
+    async def export_all():
+        return [await fn(note) for fn in (generate_pdf, generate_docx, generate_txt)]
+
+    (_, pdf_size), (docx_path, _), (txt_path, _) = asyncio.run(export_all())
+
+    assert parse_markdown.cache_info().misses == 1
+    assert pdf_size > 0
+    texts = [p.text for p in Document(docx_path).paragraphs]
+    assert "couper le courant" in " ".join(texts)
+    assert "Mesurer" in texts and "3.5 V aux bornes" in texts
+    txt = open(txt_path, encoding="utf-8").read()
+    assert "[ILLUSTRATION : Illustration technique 1]" in txt
+    assert "## Loi d'Ohm" in txt
+
+
+def test_inline_images_keep_surrounding_text():
+    content = "Voir ![Schéma](/a.jpg) ici\n![B](/b.jpg) suite du texte"
+    blocks = parse_markdown(content)
+
+    assert [(b.kind, b.text) for b in blocks] == [(PARAGRAPH, "Voir ici"), (PARAGRAPH, "suite du texte")]
+    assert [[i.src for i in b.images] for b in blocks] == [["/a.jpg"], ["/b.jpg"]]
+    txt = "".join(txt_exporter.iter_text({"title": "Cours", "content": content}))
+    assert txt.endswith("Voir [ILLUSTRATION : Schéma] ici\n[ILLUSTRATION : B] suite du texte")
@@ -0,0 +1,89 @@
+import pytest
+from app.services.ia.tokens import estimate_tokens, split_text_to_budget, split_text_with_separators
+from app.services.ia.router import (
+    ModelRouter,
+    ModelSpec,
+    TIER_FAST,
+    TIER_SMART,
+)
+
+
+@pytest.fixture
+def router():
+    return ModelRouter([
+        ModelSpec("big", context_window=8000, max_output_tokens=2000, tier=TIER_SMART),
+        ModelSpec("small", context_window=4000, max_output_tokens=4000, tier=TIER_FAST),
+        ModelSpec("small-long", context_window=16000, max_output_tokens=4000, tier=TIER_FAST),
+    ])
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("le chat") == 2
+    # Mot long découpé en plusieurs tokens, ponctuation comptée
+    assert estimate_tokens("transcription.") == 5
+    assert estimate_tokens("a\nb") == 3
+
+
+def test_split_text_to_budget_keeps_all_words():
+    text = "\n\n".join(f"Paragraphe numéro {i} avec quelques mots." for i in range(50))
+    chunks = split_text_to_budget(text, 40)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 40 for c in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_split_text_without_punctuation():
+    text = " ".join(["mot"] * 500)
+    chunks = split_text_to_budget(text, 50)
+    assert all(estimate_tokens(c) <= 50 for c in chunks)
+    assert sum(len(c.split()) for c in chunks) == 500
+
+
+def test_split_long_paragraph_keeps_sentences_inline():
+    paragraph = " ".join(f"Phrase numéro {i} du même paragraphe." for i in range(40))
+    chunks = split_text_to_budget(paragraph + "\n\nParagraphe suivant.", 60)
+
+    assert all(estimate_tokens(c) <= 60 for c in chunks)
+    # Les phrases d'un même paragraphe restent séparées par des espaces :
+    # seul le vrai changement de paragraphe peut produire "\n\n"
+    assert all(c.count("\n\n") == c.count("\n\nParagraphe suivant.") for c in chunks)
+    assert chunks[-1].endswith("Paragraphe suivant.")
+    assert " ".join(chunks).split() == (paragraph + " Paragraphe suivant.").split()
+
+
+def test_separators_mark_cuts_inside_a_paragraph():
+    paragraph = " ".join(f"Phrase numéro {i} du même paragraphe." for i in range(40))
+    text = "Introduction.\n\n" + paragraph + "\n\nParagraphe suivant."
+    chunks = split_text_with_separators(text, 60)
+
+    assert chunks[0][0] == ""
+    assert {separator for separator, _ in chunks[1:]} == {" ", "\n\n"}
+    # Recollés avec leurs séparateurs, les morceaux redonnent la structure d'origine
+    assert "".join(separator + chunk for separator, chunk in chunks) == text
+
+
+def test_pick_smallest_fitting_model(router):
+    assert router.pick("classify", 100).name == "small"
+    # Le petit modèle est trop court : on passe au fast à long contexte, pas au 70b
+    assert router.pick("refine", 6000, 1000).name == "small-long"
+    assert router.pick("notes", 100).name == "big"
+
+
+def test_pick_falls_back_to_largest_context(router):
+    assert router.pick("refine", 50000).name == "small-long"
+
+
+def test_plan_refine_splits_and_sizes_output(router, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "LLM_REFINE_CHUNK_TOKENS", 100)
+
+    text = "\n\n".join("Une phrase de transcription à corriger." for _ in range(40))
+    plan = router.plan_refine(text, "system")
+
+    assert len(plan) > 1
+    for chunk in plan:
+        assert estimate_tokens(chunk.text) <= 100
+        assert chunk.max_tokens > estimate_tokens(chunk.text)
+        assert chunk.model.tier == TIER_FAST
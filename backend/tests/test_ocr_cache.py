@@ -0,0 +1,125 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.media import ocr_cache as cache_module
+from app.services.media import ocr_engine as engine_module
+from app.services.media.ocr_cache import OCRCache, ocr_hash
+from app.services.media.ocr_engine import OCREngine
+
+
+def _slide(text, noise_seed=None):
+    image = np.full((360, 640), 240, dtype=np.uint8)
+    cv2.putText(image, text, (40, 180), cv2.FONT_HERSHEY_SIMPLEX, 1.6, 20, 3)
+    if noise_seed is not None:
+        # Re-compression / bruit de capture
+        noise = np.random.default_rng(noise_seed).integers(-6, 7, image.shape)
+        image = np.clip(image.astype(int) + noise, 0, 255).astype(np.uint8)
+    return image
+
+
+def test_default_reuses_only_identical_slides():
+    cache = OCRCache()
+    cache.put(ocr_hash(_slide("Exercice 1")), "fra", "t", "Exercice 1")
+
+    assert cache.get(ocr_hash(_slide("Exercice 1")), "fra", "t") == "Exercice 1"
+    # Un seul chiffre change : quelques bits seulement, le texte ne doit pas être réutilisé
+    assert cache.get(ocr_hash(_slide("Exercice 7")), "fra", "t") is None
+
+
+def test_near_duplicates_hit_and_different_slides_miss():
+    cache = OCRCache(max_distance=8)
+    cache.put(ocr_hash(_slide("Chapitre 1")), "fra", "tesseract-5", "Chapitre 1")
+
+    assert cache.get(ocr_hash(_slide("Chapitre 1", noise_seed=1)), "fra", "tesseract-5") == "Chapitre 1"
+    assert cache.get(ocr_hash(_slide("Conclusion")), "fra", "tesseract-5") is None
+    # Langue ou version du moteur différentes : pas de réutilisation
+    assert cache.get(ocr_hash(_slide("Chapitre 1")), "eng", "tesseract-5") is None
+    assert cache.get(ocr_hash(_slide("Chapitre 1")), "fra", "tesseract-4") is None
+
+
+def test_lru_eviction_and_disk_fallback(tmp_path):
+    db = tmp_path / "ocr.sqlite3"
+    cache = OCRCache(db_path=db, max_entries=1, max_distance=8)
+    first, second = ocr_hash(_slide("Slide A")), ocr_hash(_slide("Slide B"))
+    cache.put(first, "fra", "t", "A")
+    cache.put(second, "fra", "t", "B")
+
+    assert len(cache._memory) == 1
+    # Évincé de la mémoire mais retrouvé sur disque, y compris par un autre process / upload
+    assert cache.get(first, "fra", "t") == "A"
+    assert OCRCache(db_path=db, max_distance=8).get(ocr_hash(_slide("Slide B", noise_seed=2)), "fra", "t") == "B"
+
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(1, 100))
+    monkeypatch.setattr(cache_module.time, "time", lambda: next(clock))
+    db = tmp_path / "ocr.sqlite3"
+    cache = OCRCache(db_path=db, max_entries=1, max_disk_entries=2, evict_every=1)
+    a, b, c = (ocr_hash(_slide(t)) for t in ("Slide A", "Slide B", "Slide C"))
+    cache.put(a, "fra", "t", "A")
+    cache.put(b, "fra", "t", "B")
+    assert cache.get(a, "fra", "t") == "A"  # A redevient la plus récente
+    cache.put(c, "fra", "t", "C")
+
+    fresh = OCRCache(db_path=db)
+    assert fresh._connection().execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0] == 2
+    assert fresh.get(a, "fra", "t") == "A"
+    assert fresh.get(b, "fra", "t") is None
+    assert fresh.get(c, "fra", "t") == "C"
+
+
+def test_disk_writes_are_batched(tmp_path, monkeypatch):
+    clock = iter(range(1, 100))
+    monkeypatch.setattr(cache_module.time, "time", lambda: next(clock))
+    db = tmp_path / "ocr.sqlite3"
+    cache = OCRCache(db_path=db, max_entries=1, max_disk_entries=1, evict_every=3)
+    a, b = ocr_hash(_slide("Slide A")), ocr_hash(_slide("Slide B"))
+    cache.put(a, "fra", "t", "A")
+    cache.put(b, "fra", "t", "B")
+    rows = lambda: dict(OCRCache(db_path=db)._connection().execute("SELECT text, used FROM ocr_cache"))
+
+    # Pas encore d'éviction : elle n'a lieu que toutes les 3 insertions
+    assert sorted(rows()) == ["A", "B"]
+    used = rows()["A"]
+    assert cache.get(a, "fra", "t") == "A"
+    assert rows()["A"] == used  # Date du hit en attente, pas de commit par hit
+    cache.flush()
+    assert rows()["A"] > used
+
+
+class _CountingEngine(OCREngine):
+    def __init__(self):
+        super().__init__(engine="tesseract")
+        self.ocr_calls = 0
+        self._engine_version = "tesseract-test"
+
+    def _run_batch(self, images, indices, lang, timeout):
+        self.ocr_calls += len(indices)
+        return {i: f"texte {i}" for i in indices}
+
+
+def test_batch_ocrs_repeated_slides_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "OCR_CACHE_ENABLED", True)
+    monkeypatch.setattr(engine_module, "ocr_cache", OCRCache(db_path=tmp_path / "ocr.sqlite3", max_distance=8))
+    engine = _CountingEngine()
+    frames = [_slide("Intro"), _slide("Intro", noise_seed=3), _slide("Partie 2"), _slide("Intro", noise_seed=4)]
+
+    assert engine.ocr_batch(frames) == ["texte 0", "texte 0", "texte 2", "texte 0"]
+    assert engine.ocr_calls == 2
+
+    # Ré-upload du même support : tout vient du cache
+    assert engine.ocr_batch(frames) == ["texte 0", "texte 0", "texte 2", "texte 0"]
+    assert engine.ocr_calls == 2
+
+
+def test_batch_does_not_share_text_between_near_slides(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "OCR_CACHE_ENABLED", True)
+    monkeypatch.setattr(engine_module, "ocr_cache", OCRCache(db_path=tmp_path / "ocr.sqlite3"))
+    engine = _CountingEngine()
+    frames = [_slide("Exercice 1"), _slide("Exercice 7"), _slide("Exercice 1")]
+
+    assert engine.ocr_batch(frames) == ["texte 0", "texte 1", "texte 0"]
+    assert engine.ocr_calls == 2
@@ -0,0 +1,163 @@
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytesseract
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.media import ocr_engine as module
+from app.services.media.ocr_engine import OCREngine
+
+
+def _fake_image_to_string(image, lang=None, timeout=0, **kwargs):
+    """Tesseract simulé : renvoie la largeur de l'image ; 999 px simule un blocage."""
+    if image.width == 999:
+        raise RuntimeError("Tesseract process timeout")
+    time.sleep(0.05)
+    return f"  largeur {image.width}\n"
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for width in (10, 20, 999, 40, 50):
+        path = tmp_path / f"img_{width}.png"
+        Image.new("L", (width, 10), 255).save(path)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    # Patch posé avant la création du pool : les process forkés en héritent
+    monkeypatch.setattr(pytesseract, "image_to_string", _fake_image_to_string)
+    monkeypatch.setattr(settings, "OCR_WORKERS", 2)
+    monkeypatch.setattr(settings, "OCR_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "OCR_MIN_CONFIDENCE", 0)
+    engine = OCREngine(engine="tesseract")
+    yield engine
+    engine.close()
+
+
+def test_batch_preserves_order_and_isolates_failures(engine, images):
+    missing = Path(images[0]).with_name("absent.png")
+    texts = engine.ocr_batch(images + [missing], timeout=5)
+
+    assert texts == ["largeur 10", "largeur 20", "", "largeur 40", "largeur 50", ""]
+
+
+def test_keyframes_drop_empty_results(engine, images):
+    results = engine.extract_text_from_keyframes(images)
+
+    assert list(results) == [str(p) for p in images if "999" not in p.name]
+
+
+def test_low_confidence_words_are_dropped(monkeypatch, tmp_path):
+    def fake_image_to_data(image, lang=None, timeout=0, output_type=None, **kwargs):
+        words = [("Loi", 96, 1), ("d'Ohm", 91, 1), ("~#", 12, 1), ("U=RI", 88, 2), ("", -1, 2), ("|", 30, 3)]
+        return {
+            "text": [w for w, _, _ in words],
+            "conf": [c for _, c, _ in words],
+            "page_num": [1] * len(words),
+            "block_num": [1] * len(words),
+            "par_num": [1] * len(words),
+            "line_num": [line for _, _, line in words],
+        }
+
+    monkeypatch.setattr(module, "TESSEROCR_AVAILABLE", False)
+    monkeypatch.setattr(pytesseract, "image_to_data", fake_image_to_data)
+    monkeypatch.setattr(settings, "OCR_MIN_CONFIDENCE", 60)
+
+    text = OCREngine(engine="tesseract").extract_text(np.zeros((10, 10), dtype=np.uint8))
+    assert text == "Loi d'Ohm\nU=RI"
+
+
+class _FakeTessAPI:
+    """API tesserocr simulée : compte les chargements de modèle."""
+    created = 0
+
+    def __init__(self, lang):
+        type(self).created += 1
+        self.lang = lang
+        self.image = None
+
+    def SetImage(self, image):
+        self.image = image
+
+    def Recognize(self, timeout=0):
+        return True
+
+    def GetUTF8Text(self):
+        return f"{self.lang} {self.image.mode} {self.image.width}\n"
+
+    def Clear(self):
+        self.image = None
+
+
+def test_tesserocr_api_is_loaded_once_and_accepts_arrays(monkeypatch, tmp_path):
+    monkeypatch.setattr(module, "TESSEROCR_AVAILABLE", True)
+    monkeypatch.setattr(module, "tesserocr", type("T", (), {"PyTessBaseAPI": _FakeTessAPI}), raising=False)
+    monkeypatch.setattr(module, "_tess_apis", {})
+    monkeypatch.setattr(settings, "OCR_MIN_CONFIDENCE", 0)
+    _FakeTessAPI.created = 0
+
+    module.warm_up_ocr("fra")
+    engine = OCREngine(engine="tesseract")
+    path = tmp_path / "page.png"
+    Image.new("L", (30, 10), 255).save(path)
+
+    assert engine.extract_text(np.zeros((10, 20, 3), dtype=np.uint8), lang="fra") == "fra RGB 20"
+    assert engine.extract_text(np.zeros((10, 25), dtype=np.uint8), lang="fra") == "fra L 25"
+    assert engine.extract_text(path, lang="fra") == "fra L 30"
+    assert _FakeTessAPI.created == 1
+
+
+class _FakePaddle:
+    """Modèle PaddleOCR simulé : une "ligne" par rectangle noir, texte = sa hauteur."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def ocr(self, board, cls=True):
+        self.calls += 1
+        gray = cv2.cvtColor(board, cv2.COLOR_BGR2GRAY)
+        contours, _ = cv2.findContours(255 - gray, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        lines = []
+        for contour in sorted(contours, key=lambda c: cv2.boundingRect(c)[1]):
+            x, y, w, h = cv2.boundingRect(contour)
+            box = [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+            lines.append([box, (f"h{h}", 0.99)])
+        return [lines]
+
+
+def test_paddle_batches_images_per_call(monkeypatch):
+    fake = _FakePaddle()
+    monkeypatch.setattr(module, "PADDLEOCR_AVAILABLE", True)
+    monkeypatch.setattr(module, "_get_paddle_model", lambda: fake)
+    monkeypatch.setattr(settings, "PADDLE_OCR_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "OCR_MIN_CONFIDENCE", 0)
+    monkeypatch.setattr(settings, "OCR_CACHE_ENABLED", False)
+
+    images = []
+    for height in (10, 20, 30):
+        image = np.full((100, 80 + height, 3), 255, dtype=np.uint8)
+        cv2.rectangle(image, (5, 5), (60, 4 + height), (0, 0, 0), -1)
+        cv2.rectangle(image, (5, 70), (60, 69 + height // 2), (0, 0, 0), -1)
+        images.append(image)
+
+    texts = OCREngine(engine="paddleocr").ocr_batch(images)
+
+    assert texts == ["h10\nh5", "h20\nh10", "h30\nh15"]
+    assert fake.calls == 2
+
+
+def test_engines_are_lazy_per_process_singletons(monkeypatch):
+    monkeypatch.setattr(module, "_engines", {})
+    monkeypatch.setattr(settings, "OCR_ENGINE", "tesseract")
+
+    assert module.get_ocr_engine() is module.get_ocr_engine("TESSERACT")
+    with pytest.raises(ValueError):
+        module.get_ocr_engine("easyocr")
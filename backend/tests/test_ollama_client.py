@@ -0,0 +1,216 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from aiohttp import web
+from groq import RateLimitError
+
+from app.core.config import settings
+from app.services.ia.llm_dispatcher import LLMDispatcher
+from app.services.ia.local.ollama_client import OllamaClient
+from app.services.ia.tokens import estimate_chat_tokens
+
+
+@asynccontextmanager
+async def fake_ollama_server():
+    """Faux serveur Ollama local qui répond en NDJSON morceau par morceau."""
+    state = {"requests": [], "peers": set()}
+
+    async def chat(request):
+        payload = await request.json()
+        state["requests"].append(payload)
+        state["peers"].add(request.transport.get_extra_info("peername"))
+
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await resp.prepare(request)
+        for piece in ["Bonjour", " le", " monde"]:
+            line = {"message": {"role": "assistant", "content": piece}, "done": False}
+            await resp.write((json.dumps(line) + "\n").encode())
+        await resp.write((json.dumps({"done": True}) + "\n").encode())
+        await resp.write_eof()
+        return resp
+
+    async def generate(request):
+        payload = await request.json()
+        state["requests"].append(payload)
+        body = "".join(json.dumps({"response": p, "done": False}) + "\n" for p in ["ok", "!"])
+        body += json.dumps({"done": True}) + "\n"
+        return web.Response(text=body, content_type="application/x-ndjson")
+
+    app = web.Application()
+    app.router.add_post("/api/chat", chat)
+    app.router.add_post("/api/generate", generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    state["url"] = f"http://127.0.0.1:{port}"
+    try:
+        yield state
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_stream_and_reuse_connection():
+    async with fake_ollama_server() as fake_ollama:
+        client = OllamaClient(base_url=fake_ollama["url"])
+        try:
+            out1 = await client.generate_completion("salut", system_msg="sys", max_tokens=32)
+            out2 = await client.generate_completion("encore")
+            pieces = [p async for p in client.stream_chat([{"role": "user", "content": "x"}])]
+        finally:
+            await client.close()
+
+        assert out1 == out2 == "Bonjour le monde"
+        assert pieces == ["Bonjour", " le", " monde"]
+        # Keep-alive : une seule connexion TCP pour les trois appels
+        assert len(fake_ollama["peers"]) == 1
+
+        first = fake_ollama["requests"][0]
+        assert first["stream"] is True
+        assert first["options"]["num_predict"] == 32
+        assert first["messages"][0] == {"role": "system", "content": "sys"}
+
+
+@pytest.mark.asyncio
+async def test_generate_endpoint():
+    async with fake_ollama_server() as fake_ollama:
+        client = OllamaClient(base_url=fake_ollama["url"])
+        try:
+            assert await client.generate("prompt") == "ok!"
+        finally:
+            await client.close()
+
+
+def test_session_is_closed_when_event_loop_changes():
+    client = OllamaClient(base_url="http://127.0.0.1:1")
+
+    async def get_session():
+        return await client._get_session()
+
+    # Deux tâches Celery successives avec chacune son event loop
+    loop1, loop2 = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        first = loop1.run_until_complete(get_session())
+        assert loop1.run_until_complete(get_session()) is first
+        second = loop2.run_until_complete(get_session())
+
+        assert second is not first
+        assert first.closed and not second.closed
+        loop2.run_until_complete(client.close())
+        assert second.closed
+    finally:
+        loop1.close()
+        loop2.close()
+
+
+class _FakeCloud:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    async def refine_text(self, raw_text):
+        return await self.generate_completion(raw_text)
+
+    async def generate_completion(self, prompt, **kwargs):
+        self.calls += 1
+        if self.fail:
+            response = httpx.Response(
+                429, request=httpx.Request("POST", "http://groq"), headers={"retry-after": "120"}
+            )
+            raise RateLimitError("quota", response=response, body=None)
+        return "cloud"
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_overflows_to_local_on_quota(monkeypatch):
+    async with fake_ollama_server() as fake_ollama:
+        monkeypatch.setattr(settings, "LOCAL_LLM_ENABLED", True)
+        monkeypatch.setattr(settings, "LOCAL_LLM_MAX_TIER", 0)
+        local = OllamaClient(base_url=fake_ollama["url"])
+        cloud = _FakeCloud(fail=True)
+        dispatcher = LLMDispatcher(cloud, local)
+        try:
+            assert await dispatcher.refine_text("texte brut") == "Bonjour le monde"
+            assert dispatcher.cloud_paused
+            # Pendant la pause, Groq n'est plus sollicité
+            assert await dispatcher.refine_text("autre texte") == "Bonjour le monde"
+            assert cloud.calls == 1
+        finally:
+            await local.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_routes_by_tier(monkeypatch):
+    async with fake_ollama_server() as fake_ollama:
+        local = OllamaClient(base_url=fake_ollama["url"])
+        dispatcher = LLMDispatcher(_FakeCloud(), local)
+        try:
+            monkeypatch.setattr(settings, "LOCAL_LLM_ENABLED", False)
+            assert await dispatcher.generate_completion("p", task="classify") == "cloud"
+
+            monkeypatch.setattr(settings, "LOCAL_LLM_ENABLED", True)
+            monkeypatch.setattr(settings, "LOCAL_LLM_MAX_TIER", 1)
+            assert await dispatcher.generate_completion("p", task="classify") == "Bonjour le monde"
+            assert await dispatcher.generate_completion("p", task="notes") == "cloud"
+        finally:
+            await local.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_retries_instead_of_overflowing_long_prompts(monkeypatch):
+    async with fake_ollama_server() as fake_ollama:
+        monkeypatch.setattr(settings, "LOCAL_LLM_ENABLED", True)
+        monkeypatch.setattr(settings, "LOCAL_LLM_MAX_TIER", 0)
+        monkeypatch.setattr(settings, "OLLAMA_NUM_CTX", 2048)
+        local = OllamaClient(base_url=fake_ollama["url"])
+        cloud = _FakeCloud(fail=True)
+        dispatcher = LLMDispatcher(cloud, local)
+        try:
+            # Notes dimensionnées pour Groq : le 429 remonte (retry Celery), rien n'est tronqué
+            with pytest.raises(RateLimitError):
+                await dispatcher.generate_completion("mot " * 5000, task="notes", max_tokens=1024)
+            assert fake_ollama["requests"] == []
+            # Pendant la pause, un prompt qui tient dans le contexte local déborde normalement
+            assert await dispatcher.generate_completion("court", task="notes", max_tokens=256) == "Bonjour le monde"
+            assert cloud.calls == 1
+        finally:
+            await local.close()
+
+
+@pytest.mark.asyncio
+async def test_long_prompt_is_refitted_without_losing_system_message(monkeypatch):
+    monkeypatch.setattr(settings, "OLLAMA_NUM_CTX", 2048)
+    async with fake_ollama_server() as fake_ollama:
+        local = OllamaClient(base_url=fake_ollama["url"])
+        try:
+            await local.generate_completion("mot " * 5000, system_msg="Consignes.", max_tokens=4096)
+        finally:
+            await local.close()
+
+    payload = fake_ollama["requests"][0]
+    system, user = payload["messages"]
+    assert system["content"] == "Consignes."
+    assert payload["options"]["num_predict"] == 1024
+    assert estimate_chat_tokens(system["content"], user["content"]) + 1024 <= 2048
+
+
+@pytest.mark.asyncio
+async def test_refine_rejoins_a_split_paragraph_with_a_space(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_REFINE_CHUNK_TOKENS", 60)
+    local = OllamaClient(base_url="http://127.0.0.1:1")
+
+    async def echo(prompt, **kwargs):
+        return prompt.upper()
+
+    monkeypatch.setattr(local, "generate_completion", echo)
+    paragraph = " ".join(f"phrase {i} du même paragraphe." for i in range(40))
+
+    refined = await local.refine_text(paragraph + "\n\nparagraphe suivant.")
+
+    assert refined == (paragraph + "\n\nparagraphe suivant.").upper()
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.utils.process_pool import LazyProcessPool, _BilliardExecutor
+
+
+def _pid(_):
+    return os.getpid()
+
+
+def _crash():
+    os._exit(1)
+
+
+def _hang():
+    time.sleep(3600)
+
+
+def _fail():
+    raise ValueError("page illisible")
+
+
+def _use_pool_in_daemon(queue):
+    # Comme un worker Celery prefork : process daemon qui a besoin d'un pool
+    pool = LazyProcessPool("test")
+    try:
+        executor = pool.get(2)
+        queue.put((type(executor).__name__, {executor.submit(_pid, i).result(timeout=30) for i in range(8)}))
+    finally:
+        pool.close()
+
+
+def test_daemon_process_gets_a_process_pool():
+    queue = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_use_pool_in_daemon, args=(queue,), daemon=True)
+    child.start()
+    executor_name, pids = queue.get(timeout=60)
+    child.join(timeout=10)
+
+    assert executor_name == "_BilliardExecutor"
+    # Exécuté dans des process dédiés, pas dans des threads du process daemon
+    assert child.pid not in pids
+
+
+def test_lazy_pool_is_created_once():
+    pool = LazyProcessPool("test")
+    try:
+        assert pool.get(1) is pool.get(4)
+        assert pool.size == 1
+    finally:
+        pool.close()
+
+
+def test_billiard_executor_propagates_errors():
+    executor = _BilliardExecutor(1)
+    try:
+        assert executor.submit(_pid, 0).result(timeout=30) != os.getpid()
+        with pytest.raises(ValueError, match="page illisible"):
+            executor.submit(_fail).result(timeout=30)
+    finally:
+        executor.shutdown(wait=True)
+
+
+def test_lazy_pool_recovers_after_a_worker_dies():
+    pool = LazyProcessPool("test")
+    try:
+        with pytest.raises(BrokenProcessPool):
+            pool.get(1).submit(_crash).result(timeout=30)
+        assert pool.get(1).submit(_pid, 0).result(timeout=30) != os.getpid()
+    finally:
+        pool.close()
+
+
+@pytest.mark.parametrize("daemon_like", [False, True])
+def test_terminate_kills_stuck_tasks(monkeypatch, daemon_like):
+    if daemon_like:
+        monkeypatch.setattr("app.utils.process_pool.create_process_pool", lambda n, *a: _BilliardExecutor(n, *a))
+    pool = LazyProcessPool("test")
+    try:
+        stuck = pool.get(1).submit(_hang)
+        time.sleep(0.5)
+        pool.terminate()
+        with pytest.raises(BrokenProcessPool):
+            stuck.result(timeout=10)
+        assert pool.get(1).submit(_pid, 0).result(timeout=30) != os.getpid()
+    finally:
+        pool.close()
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.export.render_pool import ExportQueueFull, RenderPool
+
+
+def _pid_square(x):
+    return os.getpid(), x * x
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(workers=1, max_pending=1, timeout=5)
+    yield pool
+    pool.close()
+
+
+def test_render_runs_outside_the_caller_process(pool):
+    pid, result = asyncio.run(pool.run(_pid_square, 7))
+    assert result == 49
+    assert pid != os.getpid()
+    assert pool.pending == 0
+
+
+def test_queue_limit_rejects_extra_renders(pool):
+    async def scenario():
+        first = asyncio.create_task(pool.run(_sleep, 0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(ExportQueueFull):
+            await pool.run(_sleep, 0)
+        return await first
+
+    assert asyncio.run(scenario()) == 0.5
+    assert pool.pending == 0
+
+
+def test_timeout_recycles_the_stuck_worker(pool):
+    pool.timeout = 0.2
+    with pytest.raises(TimeoutError):
+        asyncio.run(pool.run(_sleep, 3600))
+    # Process bloqué tué : sa place est rendue et le pool sert à nouveau
+    time.sleep(0.5)
+    assert pool.pending == 0
+    pool.timeout = 30
+    pid, result = asyncio.run(pool.run(_pid_square, 3))
+    assert result == 9
+
+
+def test_renders_interrupted_by_a_recycle_are_retried():
+    pool = RenderPool(workers=2, max_pending=4, timeout=30)
+    try:
+        async def scenario():
+            other = asyncio.create_task(pool.run(_sleep, 1))
+            await asyncio.sleep(0.3)
+            pool._pool.terminate()  # Comme après le timeout d'un autre rendu
+            return await other
+
+        assert asyncio.run(scenario()) == 1
+        assert pool.pending == 0
+    finally:
+        pool.close()
@@ -0,0 +1,86 @@
+import pytest
+
+from app.services.ia import segment_refiner as module
+from app.services.ia.segment_refiner import SegmentRefiner
+
+
+class _FakeLLM:
+    def __init__(self):
+        self.prompts = []
+        self.refine_calls = 0
+
+    async def generate_completion(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        # Renvoie chaque passage en majuscules, avec ses repères
+        return prompt.upper()
+
+    async def refine_text(self, raw_text):
+        self.refine_calls += 1
+        return "raffiné"
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    llm = _FakeLLM()
+    monkeypatch.setattr(module, "llm_client", llm)
+    return llm
+
+
+def _seg(text, logprob=-0.1, no_speech=0.01, compression=1.2):
+    return {
+        "text": text,
+        "avg_logprob": logprob,
+        "no_speech_prob": no_speech,
+        "compression_ratio": compression,
+    }
+
+
+@pytest.mark.asyncio
+async def test_clean_audio_skips_llm(fake_llm):
+    segments = [_seg(" bonjour à tous"), _seg("le le moteur tourne")]
+    result = await SegmentRefiner().refine(segments, "ignored")
+
+    assert result.text == "Bonjour à tous le moteur tourne."
+    assert result.sent_to_llm == 0
+    assert fake_llm.prompts == []
+
+
+@pytest.mark.asyncio
+async def test_hallucinations_are_dropped(fake_llm):
+    segments = [
+        _seg("cours de mécanique"),
+        _seg("Sous-titres réalisés par la communauté", logprob=-1.5, no_speech=0.9),
+        _seg("merci merci merci merci merci", compression=3.1),
+    ]
+    result = await SegmentRefiner().refine(segments)
+
+    assert result.dropped == 2
+    assert len(result.segments) == 1
+    assert "Sous-titres" not in result.text
+
+
+@pytest.mark.asyncio
+async def test_low_confidence_spans_batched(fake_llm):
+    segments = [
+        _seg("début fiable"),
+        _seg("passage douteux un", logprob=-0.9),
+        _seg("passage douteux deux", logprob=-0.8),
+        _seg("milieu fiable"),
+        _seg("autre doute", logprob=-1.2),
+    ]
+    result = await SegmentRefiner().refine(segments)
+
+    # Un seul appel LLM pour deux spans (segments consécutifs fusionnés)
+    assert len(fake_llm.prompts) == 1
+    assert fake_llm.prompts[0].count("[[") == 2
+    assert result.sent_to_llm == 3
+    assert "PASSAGE DOUTEUX UN PASSAGE DOUTEUX DEUX" in result.text
+    assert "AUTRE DOUTE" in result.text
+    assert "milieu fiable" in result.text
+
+
+@pytest.mark.asyncio
+async def test_without_segments_falls_back_to_full_refine(fake_llm):
+    result = await SegmentRefiner().refine([], "texte brut")
+    assert result.text == "raffiné"
+    assert fake_llm.refine_calls == 1
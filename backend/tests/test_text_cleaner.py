@@ -0,0 +1,27 @@
+import pytest
+
+from app.services.nlp.text_cleaner import text_cleaner
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Voir www.example.com et e.g. ceci", "Voir www.example.com et e.g. ceci."),
+    ("le cas i.e. celui-ci. ensuite", "Le cas i.e. celui-ci. Ensuite."),
+    ("cf. ci-dessous", "Cf. ci-dessous."),
+    ("la valeur 3.5 reste", "La valeur 3.5 reste."),
+    ("oui. non. peut-être", "Oui. Non. Peut-être."),
+    ("bonjour,tout le monde . fin", "Bonjour, tout le monde. Fin."),
+])
+def test_fix_punctuation_keeps_tokens_intact(raw, expected):
+    assert text_cleaner.fix_punctuation(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("le le moteur tourne", "le moteur tourne"),
+    ("on va on va partir", "on va partir"),
+    ("nous nous sommes trompés", "nous nous sommes trompés"),
+    ("il mesure 10 10 mètres", "il mesure 10 10 mètres"),
+    ("la page 12 page 12", "la page 12 page 12"),
+    ("2 x 2 x 3", "2 x 2 x 3"),
+])
+def test_collapse_repetitions_ignores_numbers(raw, expected):
+    assert text_cleaner.collapse_repetitions(raw) == expected
@@ -0,0 +1,36 @@
+from app.services.nlp.text_condenser import TextCondenser
+
+
+def test_ocr_variants_collapse_but_distinct_content_survives():
+    lines = [
+        "Chapitre 3 : Les circuits électriques",
+        "Loi d'Ohm appliquée au dipôle résistif : U = R.I",
+        "Chapitre 3 - Les circuits electriques.",
+        "Loi d'0hm appliquée au dipole résistif : U = RI",
+        "Chapitre 4 : Les circuits électriques",
+        "Chapitre 3 : Les circuits magnétiques",
+    ]
+    collapsed = TextCondenser().collapse(lines)
+
+    assert len(collapsed) == 4
+    assert collapsed[1] == "Loi d'Ohm appliquée au dipôle résistif : U = R.I"
+    assert "Chapitre 4 : Les circuits électriques" in collapsed
+    assert "Chapitre 3 : Les circuits magnétiques" in collapsed
+
+
+def test_condense_drops_noise_and_keeps_densest_lines_in_order():
+    lines = [
+        "— | .",
+        "La puissance électrique P = U x I s'exprime en watts",
+        "et et et et et et et et et et et et et et et et",
+        "ok",
+        "Théorème de Thévenin : générateur équivalent Eth, Rth",
+    ]
+    condenser = TextCondenser()
+
+    full = condenser.condense(lines, max_chars=5000)
+    assert full.splitlines() == [lines[1], lines[4]]
+
+    # Budget serré : seule la ligne la plus dense tient, pas une coupe au milieu d'une ligne
+    short = condenser.condense(lines, max_chars=60)
+    assert short == lines[4]
@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+
+from app.services.media.text_detector import TextDetector
+
+
+def _slide(dark=False):
+    background, ink = (30, 30, 30), (235, 235, 235)
+    if not dark:
+        background, ink = ink, background
+    image = np.full((1080, 1920, 3), background, dtype=np.uint8)
+    for line in range(4):
+        cv2.putText(image, f"Point {line} : vitesse de 12 m/s", (400, 400 + line * 110),
+                    cv2.FONT_HERSHEY_SIMPLEX, 2, ink, 3)
+    return image
+
+
+def _speaker():
+    """Fond dégradé + "visage" : formes pleines, aucune ligne de texte."""
+    yy, xx = np.mgrid[0:1080, 0:1920]
+    image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    image[..., 1] = (127 + 100 * np.sin(xx / 200) * np.cos(yy / 150)).astype(np.uint8)
+    cv2.ellipse(image, (960, 540), (250, 330), 0, 0, 360, (150, 170, 210), -1)
+    cv2.circle(image, (880, 470), 25, (20, 20, 20), -1)
+    cv2.circle(image, (1040, 470), 25, (20, 20, 20), -1)
+    return image
+
+
+def test_frames_without_text_are_skipped():
+    detector = TextDetector()
+    assert detector.prepare(_speaker()) is None
+    assert detector.prepare(np.full((720, 1280, 3), 128, dtype=np.uint8)) is None
+
+
+def test_text_is_cropped_and_binarized():
+    detector = TextDetector()
+    for dark in (False, True):
+        crop = detector.prepare(_slide(dark))
+
+        assert crop is not None and crop.ndim == 2
+        # Recadré autour des lignes (x 400-1650, y 350-760), pas la slide entière
+        assert crop.shape[0] < 600 and crop.shape[1] < 1400
+        assert set(np.unique(crop)) <= {0, 255}
+        # Toujours du texte sombre sur fond clair
+        assert crop.mean() > 127
@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+from reportlab.pdfgen import canvas
+
+from app.core.config import settings
+from app.services.document import text_extractor
+from app.services.document.text_extractor import extract_text_from_pdf, iter_pdf_pages
+
+
+def _make_pdf(path, pages):
+    pdf = canvas.Canvas(str(path))
+    for page in range(1, pages + 1):
+        pdf.drawString(72, 720, f"Page {page} du polycopie")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+@pytest.fixture
+def small_ranges(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_PARALLEL_MIN_PAGES", 4)
+    monkeypatch.setattr(settings, "PDF_PAGES_PER_TASK", 3)
+    monkeypatch.setattr(settings, "PDF_WORKERS", 2)
+    yield
+    text_extractor.close_pdf_pool()
+
+
+def test_parallel_pages_are_yielded_in_order(small_ranges, tmp_path):
+    pdf = _make_pdf(tmp_path / "cours.pdf", 20)
+
+    pages = list(iter_pdf_pages(pdf))
+
+    assert [num for num, _ in pages] == list(range(1, 21))
+    assert all(f"Page {num} du polycopie" in text for num, text in pages)
+
+
+def test_consumer_can_stop_before_last_page(small_ranges, tmp_path):
+    pdf = _make_pdf(tmp_path / "cours.pdf", 40)
+
+    pages = iter_pdf_pages(pdf)
+    first = next(pages)
+    pages.close()
+
+    assert first[0] == 1
+
+
+def test_extract_text_from_pdf_keeps_page_markers(tmp_path):
+    pdf = _make_pdf(tmp_path / "court.pdf", 2)
+
+    text = extract_text_from_pdf(pdf)
+
+    assert text.startswith("--- Page 1 ---\nPage 1 du polycopie")
+    assert "--- Page 2 ---" in text
+
+
+class _FakeOCR:
+    def __init__(self):
+        self.batches = []
+
+    def ocr_batch(self, images, lang="fra+eng", timeout=None):
+        self.batches.append(list(images))
+        return [f"texte OCR de {Path(image).name}" for image in images]
+
+
+def _make_scanned_pdf(path, tmp_path, pages):
+    """Pages 2..n : une image de texte, sans couche texte (comme un scan)."""
+    scan = tmp_path / "scan.png"
+    image = np.full((400, 600), 255, dtype=np.uint8)
+    cv2.putText(image, "Exercice corrige", (30, 200), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    cv2.imwrite(str(scan), image)
+
+    pdf = canvas.Canvas(str(path))
+    pdf.drawString(72, 720, "Page 1 du polycopie, avec une vraie couche texte")
+    pdf.showPage()
+    for _ in range(pages - 1):
+        pdf.drawImage(str(scan), 72, 300, width=450, height=300)
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def test_scanned_pages_are_rasterized_once_and_ocred(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(settings, "PDF_OCR_DPI", 72)
+    fake = _FakeOCR()
+    pdf = _make_scanned_pdf(tmp_path / "scan.pdf", tmp_path, pages=3)
+
+    # Échec de l'OCR : les pages rastérisées sont gardées pour la reprise
+    def failing_ocr():
+        raise RuntimeError("OCR indisponible")
+
+    monkeypatch.setattr(text_extractor, "get_ocr_engine", failing_ocr)
+    with pytest.raises(RuntimeError):
+        dict(iter_pdf_pages(pdf))
+    raster_dir = text_extractor._raster_cache_dir(pdf)
+    assert sorted(p.name for p in raster_dir.iterdir()) == ["p00002-72.png", "p00003-72.png"]
+
+    # Retry : les pages viennent du cache, rien n'est rastérisé à nouveau
+    def no_render(*args, **kwargs):
+        raise AssertionError("page rastérisée à nouveau")
+
+    monkeypatch.setattr(text_extractor, "get_ocr_engine", lambda: fake)
+    monkeypatch.setattr(text_extractor.pdfium, "PdfDocument", no_render)
+    pages = dict(iter_pdf_pages(pdf))
+
+    assert pages[1].startswith("Page 1 du polycopie")
+    assert pages[2] == "texte OCR de p00002-72.png"
+    assert pages[3] == "texte OCR de p00003-72.png"
+    assert [len(batch) for batch in fake.batches] == [2]
+    # Extraction réussie : le cache de rastérisation est supprimé
+    assert not raster_dir.exists()
@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.nlp.transcript_compressor import transcript_compressor
+
+
+def test_fillers_and_repetitions_removed():
+    text = "Euh, du coup, on va on va voir le moteu- le moteur, voilà. Bon ben, le le piston."
+    result = transcript_compressor.compress(text)
+
+    assert result.text == "On va voir le moteur. Le piston."
+    assert result.tokens_saved > 0
+    assert result.tokens_after < result.tokens_before
+
+
+def test_every_figure_is_preserved():
+    text = "Hein, le prix c'est 700 000 FCFA, en fait, soit 15 pour cent du budget de 2024, quoi."
+    result = transcript_compressor.compress(text)
+
+    assert "700 000 FCFA" in result.text
+    assert "15 %" in result.text
+    assert "2024" in result.text
+
+
+def test_compression_aborted_when_figures_would_change():
+    # "10 10" serait fusionné par la suppression des répétitions : on garde l'original
+    result = transcript_compressor.compress("Euh, les valeurs sont 10 10 et 20.")
+    assert "10 10" in result.text
+
+
+def test_legit_repetitions_kept():
+    result = transcript_compressor.compress("Nous nous sommes trompés.")
+    assert result.text == "Nous nous sommes trompés."
+
+
+@pytest.mark.parametrize("text", [
+    "Ce module en fait partie.",
+    "Le genre humain est varié.",
+    "Vous savez résoudre cette équation.",
+    "Nous disons que x est pair.",
+    "Le commerce en gros et en détail.",
+])
+def test_ambiguous_fillers_kept_outside_interjections(text):
+    assert transcript_compressor.compress(text).text == text
+
+
+def test_interjections_removed_at_clause_start():
+    result = transcript_compressor.compress("En fait, le moteur chauffe, genre, très vite.")
+    assert result.text == "Le moteur chauffe très vite."
+
+
+@pytest.mark.parametrize("text", [
+    "Tu fais quoi? Rien.",
+    "La dérivée de quoi. Voilà.",
+    "Quoi? Voilà la réponse.",
+])
+def test_quoi_and_voila_kept_when_meaningful(text):
+    assert transcript_compressor.compress(text).text == text
+
+
+def test_trailing_filler_removed_after_comma():
+    assert transcript_compressor.compress("C'est simple, voilà.").text == "C'est simple."
+    assert transcript_compressor.compress("Il a fini, quoi; ensuite on part.").text == "Il a fini; ensuite on part."
+
+
+def test_incise_removed_with_both_commas():
+    result = transcript_compressor.compress("Le genre humain, genre, est complexe.")
+    assert result.text == "Le genre humain est complexe."
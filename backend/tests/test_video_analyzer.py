@@ -0,0 +1,120 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.services.media.video_analyzer import VideoAnalyzer
+
+
+@pytest.fixture
+def sample_video(tmp_path):
+    """Vidéo 10 fps de 6 s : la couleur change à chaque seconde."""
+    path = tmp_path / "sample.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (320, 240))
+    for i in range(60):
+        frame = np.full((240, 320, 3), (i // 10) * 40, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def test_extract_keyframes_samples_expected_frames(sample_video, tmp_path):
+    frames = VideoAnalyzer().extract_keyframes(sample_video, tmp_path / "out", interval_seconds=2)
+
+    assert [p.name for p in frames] == [
+        "keyframe_0000_0.jpg",
+        "keyframe_0001_20.jpg",
+        "keyframe_0002_40.jpg",
+    ]
+    img = cv2.imread(str(frames[1]))
+    assert abs(int(img.mean()) - 80) < 5  # frame 20 -> seconde 2 -> niveau 80
+
+
+def test_extract_keyframes_downscale_and_limit(sample_video, tmp_path):
+    frames = VideoAnalyzer().extract_keyframes(
+        sample_video, tmp_path / "out", interval_seconds=1, max_frames=2, max_width=160
+    )
+
+    assert len(frames) == 2
+    assert cv2.imread(str(frames[0])).shape[:2] == (120, 160)
+
+
+def test_extract_keyframes_with_seek(sample_video, tmp_path, monkeypatch):
+    from app.services.media import video_analyzer as module
+    monkeypatch.setattr(module, "SEEK_MIN_FRAME_INTERVAL", 10)
+
+    frames = VideoAnalyzer().extract_keyframes(sample_video, tmp_path / "out", interval_seconds=2)
+    assert [p.name for p in frames] == [
+        "keyframe_0000_0.jpg",
+        "keyframe_0001_20.jpg",
+        "keyframe_0002_40.jpg",
+    ]
+
+
+def test_scene_keyframes_emit_only_on_change(tmp_path):
+    """Trois "slides" de 10 s chacune, avec un pointeur qui bouge en permanence."""
+    path = tmp_path / "slides.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 5, (320, 180))
+    for i in range(150):
+        slide = i // 50
+        frame = np.full((180, 320, 3), 240, dtype=np.uint8)
+        cv2.putText(frame, f"Slide {slide}", (30 + slide * 60, 60 + slide * 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 3)
+        cv2.circle(frame, (20 + (i * 3) % 280, 160), 3, (0, 0, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+    frames = VideoAnalyzer().extract_scene_keyframes(path, tmp_path / "out", sample_seconds=1.0)
+
+    assert [int(p.stem.split("_")[-1]) for p in frames] == [0, 50, 100]
+
+
+def test_scene_keyframes_max_gap_on_slow_drift(tmp_path):
+    """Tableau qui se remplit lentement : aucune frame ne dépasse le seuil, mais max_gap force l'émission."""
+    path = tmp_path / "board.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 5, (320, 180))
+    frame = np.full((180, 320, 3), 250, dtype=np.uint8)
+    for i in range(100):
+        cv2.line(frame, (10 + i * 3, 90), (12 + i * 3, 95), (0, 0, 0), 1)
+        writer.write(frame)
+    writer.release()
+
+    frames = VideoAnalyzer().extract_scene_keyframes(
+        path, tmp_path / "out", sample_seconds=1.0, max_gap_seconds=8.0, hash_threshold=64, diff_threshold=50
+    )
+    assert len(frames) == 3  # t=0, t=8, t=16
+
+
+def test_iter_scene_keyframes_stays_in_memory(sample_video, tmp_path):
+    analyzer = VideoAnalyzer()
+    keyframes = list(analyzer.iter_scene_keyframes(sample_video, max_width=160, jpeg_quality=70))
+
+    # Changement de couleur chaque seconde, min_gap 2 s : une keyframe toutes les 2 s
+    assert [kf.frame_number for kf in keyframes] == [0, 20, 40]
+    # Gardée en JPEG, décodée à la demande
+    assert keyframes[1].jpeg.startswith(b"\xff\xd8")
+    assert keyframes[1].image.shape == (120, 160, 3)
+    assert list(tmp_path.iterdir()) == [sample_video]
+    assert [kf.frame_number for kf in analyzer.iter_scene_keyframes(sample_video, max_frames=2)] == [0, 20]
+
+    path = analyzer.save_keyframe(keyframes[1], tmp_path)
+    assert path.name == "keyframe_0001_20.jpg"
+    assert abs(int(cv2.imread(str(path)).mean()) - 80) < 5
+
+
+def test_extract_slides_detects_each_slide(tmp_path):
+    path = tmp_path / "lecture.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (320, 180))
+    for i in range(90):
+        slide = i // 30
+        frame = np.full((180, 320, 3), 245, dtype=np.uint8)
+        for line in range(3):
+            cv2.putText(frame, f"S{slide} ligne {line * (slide + 1)}", (20, 40 + line * 45 + slide * 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (20, 20, 20), 2)
+        cv2.circle(frame, (20 + (i * 4) % 280, 170), 2, (0, 0, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+    slides = VideoAnalyzer().extract_slides(path, tmp_path / "slides", sample_seconds=0.5)
+
+    assert [p.name for p in slides] == ["slide_0000.jpg", "slide_0001.jpg", "slide_0002.jpg"]
+    assert all(cv2.imread(str(p)).shape == (180, 320, 3) for p in slides)